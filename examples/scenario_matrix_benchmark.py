@@ -0,0 +1,49 @@
+import random
+from timeit import timeit
+
+from pina import PinchAnalyzer, ScenarioMatrix, make_stream
+
+# Random problem whose heat flows vary between 60% and 120% of their nominal
+# values
+rng = random.Random(0)
+streams = []
+for _ in range(200):
+    supply_temp = rng.uniform(0, 300)
+    target_temp = rng.uniform(0, 300)
+    heat_flow = rng.choice([-1, 1]) * rng.uniform(1, 100)
+    streams.append(make_stream(heat_flow, supply_temp, target_temp))
+
+temp_shift = 5
+heat_flows = [
+    [s.heat_flow * rng.uniform(0.6, 1.2) for s in streams] for _ in range(200)
+]
+
+
+def analyzer_targets():
+    results = []
+    for row in heat_flows:
+        analyzer = PinchAnalyzer(temp_shift)
+        analyzer.add_streams(
+            *(
+                make_stream(h, s.supply_temp, s.target_temp)
+                for s, h in zip(streams, row)
+            )
+        )
+        results.append(analyzer.hot_utility_target)
+    return results
+
+
+def matrix_targets():
+    matrix = ScenarioMatrix(streams, temp_shift)
+    return [t.hot_utility_target for t in matrix.targets(heat_flows)]
+
+
+if __name__ == "__main__":
+    for expected, result in zip(analyzer_targets(), matrix_targets()):
+        assert abs(expected - result) <= 1e-9 * max(abs(expected), 1)
+    for name, function in [
+        ("PinchAnalyzer:", analyzer_targets),
+        ("ScenarioMatrix:", matrix_targets),
+    ]:
+        seconds = timeit(function, number=3) / 3
+        print("{:15} {:.3f} s".format(name, seconds))
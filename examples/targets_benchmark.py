@@ -0,0 +1,39 @@
+import random
+from timeit import timeit
+
+from pina import PinchAnalyzer, make_segmented_stream, targets
+
+# Random problems with sensible and latent segments
+rng = random.Random(0)
+streams = []
+for _ in range(20000):
+    supply_temp = rng.uniform(0, 300)
+    target_temp = supply_temp if rng.random() < 0.1 else rng.uniform(0, 300)
+    heat_flow = rng.choice([-1, 1]) * rng.uniform(1, 100)
+    streams.append(make_segmented_stream([heat_flow, supply_temp, target_temp]))
+
+temp_shift = 5
+
+
+def analyzer_targets():
+    analyzer = PinchAnalyzer(temp_shift)
+    analyzer.add_streams(*streams)
+    return (
+        analyzer.hot_utility_target,
+        analyzer.cold_utility_target,
+        analyzer.pinch_temps,
+    )
+
+
+def problem_table_targets():
+    return tuple(targets(streams, temp_shift))
+
+
+if __name__ == "__main__":
+    assert analyzer_targets() == problem_table_targets()
+    for name, function in [
+        ("PinchAnalyzer:", analyzer_targets),
+        ("targets:", problem_table_targets),
+    ]:
+        seconds = timeit(function, number=5) / 5
+        print("{:15} {:.3f} s".format(name, seconds))
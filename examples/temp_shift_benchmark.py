@@ -0,0 +1,59 @@
+import math
+import random
+from timeit import timeit
+
+from pina import PinchAnalyzer, TempShiftTargets, make_segmented_stream
+
+# Random problems with sensible and latent segments
+rng = random.Random(0)
+streams = []
+for _ in range(100):
+    supply_temp = rng.uniform(0, 300)
+    target_temp = supply_temp if rng.random() < 0.1 else rng.uniform(0, 300)
+    heat_flow = rng.choice([-1, 1]) * rng.uniform(1, 100)
+    streams.append(make_segmented_stream([heat_flow, supply_temp, target_temp]))
+
+min_temp_shift = 5
+max_temp_shift = 30
+# The temperature shifts sampled by the loop over separate analyzers
+temp_shifts = [
+    min_temp_shift + (max_temp_shift - min_temp_shift) * i / 199 for i in range(200)
+]
+
+
+def per_shift_targets():
+    results = []
+    for temp_shift in temp_shifts:
+        analyzer = PinchAnalyzer(temp_shift)
+        analyzer.add_streams(*streams)
+        results.append(
+            (
+                analyzer.hot_utility_target,
+                analyzer.cold_utility_target,
+                analyzer.pinch_temps,
+            )
+        )
+    return results
+
+
+def temp_shift_targets():
+    targets = TempShiftTargets(streams, min_temp_shift, max_temp_shift)
+    return [tuple(targets.at(temp_shift)) for temp_shift in temp_shifts]
+
+
+def close(a, b):
+    # The analyzers round the shifted temperatures, TempShiftTargets does not
+    return len(a) == len(b) and all(
+        math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-9) for x, y in zip(a, b)
+    )
+
+
+if __name__ == "__main__":
+    for expected, result in zip(per_shift_targets(), temp_shift_targets()):
+        assert close(expected[:2], result[:2]) and close(expected[2], result[2])
+    for name, function in [
+        ("PinchAnalyzer:", per_shift_targets),
+        ("TempShiftTargets:", temp_shift_targets),
+    ]:
+        seconds = timeit(function, number=1)
+        print("{:18} {:.3f} s".format(name, seconds))
@@ -1,8 +1,39 @@
 """A lightweight pinch analysis package"""
 
+from pina.batch import analyze_many
+from pina.exact import exact_targets
+from pina.io import read_stream_tables_csv, read_streams_csv
+from pina.monte_carlo import StreamUncertainty, monte_carlo
+from pina.multi_period import MultiPeriodAnalyzer
 from pina.pinch_analyzer import PinchAnalyzer
+from pina.problem_table import targets
+from pina.scenario_matrix import ScenarioMatrix
+from pina.sensitivity import sensitivities
+from pina.snapshot import load_snapshot, save_snapshot
 from pina.stream import make_segmented_stream, make_stream
+from pina.stream_table import StreamTable
+from pina.temp_shift_targets import TempShiftTargets
+from pina.total_site import TotalSite
 
 __version__ = "0.1.1"
 
-__all__ = ["PinchAnalyzer", "make_segmented_stream", "make_stream"]
+__all__ = [
+    "MultiPeriodAnalyzer",
+    "PinchAnalyzer",
+    "ScenarioMatrix",
+    "StreamTable",
+    "StreamUncertainty",
+    "TempShiftTargets",
+    "TotalSite",
+    "analyze_many",
+    "exact_targets",
+    "make_segmented_stream",
+    "load_snapshot",
+    "make_stream",
+    "monte_carlo",
+    "read_stream_tables_csv",
+    "read_streams_csv",
+    "save_snapshot",
+    "sensitivities",
+    "targets",
+]
@@ -0,0 +1,163 @@
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from pina.enums import HeatType
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.segments.latent_segment import LatentSegment
+from pina.segments.sensible_segment import SensibleSegment
+from pina.stream import Stream
+
+AnalysisResult = namedtuple(
+    "AnalysisResult",
+    [
+        "heating_demand",
+        "cooling_demand",
+        "hot_utility_target",
+        "cold_utility_target",
+        "heat_recovery_target",
+        "pinch_temps",
+    ],
+)
+AnalysisResult.__doc__ = """
+Results of the pinch analysis of one problem.
+"""
+
+# Number of chunks per worker. More chunks balance the load better if the
+# problems differ in size, fewer chunks mean less communication overhead.
+_CHUNKS_PER_WORKER = 4
+
+
+def analyze_many(problems, default_temp_shift=None, workers=None, chunksize=None):
+    """
+    Analyzes many independent problems in parallel and returns a list of
+    AnalysisResults in the order of the problems. Each problem is an iterable
+    of streams.
+
+    The problems are distributed over `workers` processes (by default the
+    number of CPUs) in chunks of `chunksize` problems. Only plain tuples of
+    numbers are sent to the workers. With workers=1, the problems are analyzed
+    in the current process.
+    """
+    problems = list(problems)
+    return map_analyzers(
+        _results, problems, [default_temp_shift] * len(problems), workers, chunksize
+    )
+
+
+def map_analyzers(
+    function,
+    problems,
+    default_temp_shifts,
+    workers=None,
+    chunksize=None,
+    tolerances=None,
+):
+    """
+    Creates a PinchAnalyzer for each problem (an iterable of streams) with
+    the corresponding default temperature shift, calls `function` with it in
+    a worker process and returns a list of the return values in the order of
+    the problems. The workers and chunks are chosen like in analyze_many.
+    `function` and its return values must be picklable, e.g. `function` must
+    be defined at the top level of a module.
+
+    `tolerances` contains an (abs_tol, rel_tol) tuple for each problem, which
+    is passed to its PinchAnalyzer. By default, the tolerances are zero.
+    """
+    rows = [_problem_rows(p) for p in problems]
+    default_temp_shifts = list(default_temp_shifts)
+    if len(default_temp_shifts) != len(rows):
+        raise ValueError(
+            "Number of default temperature shifts ({}) does not match number "
+            "of problems ({})".format(len(default_temp_shifts), len(rows))
+        )
+    if tolerances is None:
+        tolerances = [(0, 0)] * len(rows)
+    tolerances = list(tolerances)
+    if len(tolerances) != len(rows):
+        raise ValueError(
+            "Number of tolerances ({}) does not match number of problems "
+            "({})".format(len(tolerances), len(rows))
+        )
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Invalid number of workers: {}".format(workers))
+
+    if workers == 1 or len(rows) <= 1:
+        return [
+            _apply(function, r, d, t)
+            for r, d, t in zip(rows, default_temp_shifts, tolerances)
+        ]
+
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(rows) / (workers * _CHUNKS_PER_WORKER)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                _apply,
+                [function] * len(rows),
+                rows,
+                default_temp_shifts,
+                tolerances,
+                chunksize=chunksize,
+            )
+        )
+
+
+def _problem_rows(streams):
+    # Converts the streams to a tuple of streams, each of which is a tuple of
+    # (latent, value, supply_temp, target_temp, temp_shift) tuples. latent
+    # tells the segment's heat type, which cannot be inferred from the
+    # temperatures of a sensible segment without a temperature span. The value
+    # is the heat capacity flow rate of sensible segments and the heat flow of
+    # latent segments, so the segments can be restored without rounding
+    # errors.
+    return tuple(
+        tuple(
+            (
+                s.heat_type == HeatType.LATENT,
+                (
+                    s.heat_flow
+                    if s.heat_type == HeatType.LATENT
+                    else s.heat_capacity_flow_rate
+                ),
+                s.supply_temp,
+                s.target_temp,
+                s.temp_shift,
+            )
+            for s in stream.segments
+        )
+        for stream in streams
+    )
+
+
+def _stream(rows):
+    return Stream(
+        *(
+            (
+                LatentSegment(value, supply_temp, temp_shift)
+                if latent
+                else SensibleSegment(value, supply_temp, target_temp, temp_shift)
+            )
+            for latent, value, supply_temp, target_temp, temp_shift in rows
+        )
+    )
+
+
+def _apply(function, rows, default_temp_shift, tolerances):
+    analyzer = PinchAnalyzer(default_temp_shift, *tolerances)
+    analyzer.add_streams(*(_stream(stream) for stream in rows))
+    return function(analyzer)
+
+
+def _results(analyzer):
+    return AnalysisResult(
+        analyzer.heating_demand,
+        analyzer.cooling_demand,
+        analyzer.hot_utility_target,
+        analyzer.cold_utility_target,
+        analyzer.heat_recovery_target,
+        analyzer.pinch_temps,
+    )
@@ -0,0 +1,210 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from fractions import Fraction
+from itertools import accumulate
+from numbers import Number
+
+from pina.sweep import from_exact
+
+
+class CompositeCurve(namedtuple("CompositeCurve", ["heat_flows", "temps"])):
+    """
+    Composite curve as a tuple of the heat flows and the temperatures of its
+    breakpoints, sorted by temperature, like the result of
+    HeatCascade.cumulative_heat_flow. A latent heat flow is a jump: two
+    breakpoints at the same temperature.
+
+    The queries use binary searches over the breakpoints. Each query accepts a
+    single number or a sequence of numbers (e.g. a NumPy array) and returns a
+    number or a tuple, respectively. Ints and fractions are interpolated
+    exactly, all other numbers as floats.
+    """
+
+    def heat_flow_at(self, temp, after=False):
+        """
+        Returns the heat flow of the curve at the given temperature(s), before
+        the latent heat flow at that temperature or, if `after` is True,
+        after it. The curve is constant beyond its lowest and highest
+        temperatures.
+        """
+        return _map(lambda t: self._heat_flow_at(t, after), temp)
+
+    def temp_at(self, heat_flow):
+        """
+        Returns the lowest temperature at which the curve reaches the given
+        heat flow(s). For curves which are not monotonic, like the grand
+        composite curve, this is the first crossing from the low temperature
+        end.
+
+        Raises a ValueError if the curve does not reach a heat flow.
+        """
+        return _map(self._temp_at, heat_flow)
+
+    def simplified(self, heat_flow_error=None, temp_error=None, keep_temps=()):
+        """
+        Returns a CompositeCurve with fewer breakpoints, e.g. for plotting.
+        A breakpoint is removed only if the simplified curve stays within
+        heat_flow_error of it at its temperature and within temp_error of it
+        at its heat flow (if given). Without any errors, only the breakpoints
+        on straight lines are removed. The end points (the utility targets),
+        the points with the minimum heat flow (the pinch points of the grand
+        composite curve) and the points at `keep_temps` are always kept.
+
+        First, the breakpoints on straight lines are removed in one pass. The
+        curve is then simplified with the Douglas-Peucker algorithm between
+        the breakpoints which are kept.
+
+        Raises a ValueError if an error is negative.
+        """
+        if heat_flow_error is None and temp_error is None:
+            heat_flow_error = 0
+        for error in (heat_flow_error, temp_error):
+            if error is not None and error < 0:
+                raise ValueError("Invalid error: {}".format(error))
+
+        heat_flows, temps = self
+        if len(temps) <= 2:
+            return self
+
+        keep_temps = set(keep_temps)
+        min_heat_flow = min(heat_flows)
+        fixed = [
+            i in (0, len(temps) - 1)
+            or heat_flows[i] == min_heat_flow
+            or temps[i] in keep_temps
+            for i in range(len(temps))
+        ]
+
+        def violates(start, index, end):
+            # Returns the heat flow and temperature deviations of the
+            # breakpoint from the line between start and end, if they exceed
+            # the errors
+            heat_flow_deviation, temp_deviation = self._deviations(start, index, end)
+            if heat_flow_error is None or heat_flow_deviation <= heat_flow_error:
+                heat_flow_deviation = None
+            if temp_error is None or temp_deviation <= temp_error:
+                temp_deviation = None
+            return heat_flow_deviation, temp_deviation
+
+        # Breakpoints on straight lines. The deviations of the original curve
+        # from a line are linear between the remaining breakpoints, so they
+        # need not be checked again.
+        indices = []
+        for i in range(len(temps)):
+            while (
+                len(indices) >= 2
+                and not fixed[indices[-1]]
+                and self._deviations(indices[-2], indices[-1], i)[0] == 0
+            ):
+                indices.pop()
+            indices.append(i)
+
+        # Douglas-Peucker between the fixed breakpoints
+        positions = [p for p, i in enumerate(indices) if fixed[i]]
+        kept = [indices[p] for p in positions]
+        sections = list(zip(positions, positions[1:]))
+        while sections:
+            start, end = sections.pop()
+            worst = None
+            for position in range(start + 1, end):
+                deviations = violates(indices[start], indices[position], indices[end])
+                if deviations != (None, None):
+                    key = tuple(-1 if d is None else d for d in deviations)
+                    if worst is None or key > worst[0]:
+                        worst = (key, position)
+            if worst is not None:
+                kept.append(indices[worst[1]])
+                sections += [(start, worst[1]), (worst[1], end)]
+
+        kept.sort()
+        return CompositeCurve(
+            tuple(heat_flows[i] for i in kept), tuple(temps[i] for i in kept)
+        )
+
+    def _deviations(self, start, index, end):
+        # Returns the deviations of the breakpoint at index from the line
+        # between the breakpoints at start and end: in the heat flow at its
+        # temperature and in the temperature at its heat flow. The latter is
+        # infinite if the line does not reach the heat flow.
+        heat_flows, temps = self
+        h0, h, h1 = heat_flows[start], heat_flows[index], heat_flows[end]
+        t0, t, t1 = temps[start], temps[index], temps[end]
+        if t0 == t1:
+            heat_flow_deviation = max(min(h0, h1) - h, h - max(h0, h1), 0)
+        else:
+            heat_flow_deviation = abs(h - _interpolate(t, t0, t1, h0, h1))
+
+        if h0 == h1:
+            temp_deviation = 0 if h == h0 else math.inf
+        elif min(h0, h1) <= h <= max(h0, h1):
+            temp_deviation = abs(t - _interpolate(h, h0, h1, t0, t1))
+        else:
+            temp_deviation = math.inf
+
+        return heat_flow_deviation, temp_deviation
+
+    def _heat_flow_at(self, temp, after):
+        heat_flows, temps = self
+        if not temps:
+            return 0
+
+        if after:
+            i = bisect_right(temps, temp)
+            if i > 0 and temps[i - 1] == temp:
+                return heat_flows[i - 1]
+        else:
+            i = bisect_left(temps, temp)
+            if i < len(temps) and temps[i] == temp:
+                return heat_flows[i]
+        if i == 0:
+            return heat_flows[0]
+        if i == len(temps):
+            return heat_flows[-1]
+
+        return _interpolate(
+            temp, temps[i - 1], temps[i], heat_flows[i - 1], heat_flows[i]
+        )
+
+    def _temp_at(self, heat_flow):
+        heat_flows, temps = self
+        # The running maximum (and the negated running minimum) of the heat
+        # flows from the low temperature end are sorted, so the first
+        # breakpoint which reaches the heat flow can be found by bisection
+        if "_running_max" not in self.__dict__:
+            self._running_max = list(accumulate(heat_flows, max))
+            self._running_min = list(accumulate((-h for h in heat_flows), max))
+
+        if not temps:
+            i = 0
+        elif heat_flow >= heat_flows[0]:
+            i = bisect_left(self._running_max, heat_flow)
+        else:
+            i = bisect_left(self._running_min, -heat_flow)
+        if i == len(temps):
+            raise ValueError(
+                "Heat flow {} is not reached by the curve".format(heat_flow)
+            )
+        if i == 0 or temps[i - 1] == temps[i]:
+            return temps[i]
+
+        return _interpolate(
+            heat_flow, heat_flows[i - 1], heat_flows[i], temps[i - 1], temps[i]
+        )
+
+
+def _map(function, values):
+    # Applies the function to a single number or to each number of a sequence
+    if isinstance(values, Number):
+        return function(values)
+
+    return tuple(function(v) for v in values)
+
+
+def _interpolate(x, x0, x1, y0, y1):
+    # Returns the value at x of the line through (x0, y0) and (x1, y1)
+    if all(isinstance(v, (int, Fraction)) for v in (x, x0, x1, y0, y1)):
+        return from_exact(y0 + (y1 - y0) * Fraction(x - x0) / (x1 - x0), False)
+
+    x, x0, x1, y0, y1 = (float(v) for v in (x, x0, x1, y0, y1))
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
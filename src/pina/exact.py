@@ -0,0 +1,250 @@
+import sys
+from bisect import bisect_left
+from collections import namedtuple
+from fractions import Fraction
+from heapq import heappop, heappush
+from itertools import groupby
+from math import gcd
+from operator import attrgetter, itemgetter
+
+from pina.enums import HeatType
+from pina.problem_table import Targets
+from pina.sweep import common_denominator, from_exact, integer_ratio, to_exact
+
+# A segment of the grand cascade. float_min and float_max are the shifted
+# temperatures, rounded to floats. heat_flow is the (inverted) heat flow which
+# the segment adds to the cascade, as an integer ratio, float_heat_flow is its
+# float value. min_temp and max_temp are the unshifted temperatures and offset
+# is the temperature shift, with its sign.
+_Row = namedtuple(
+    "_Row",
+    [
+        "float_min",
+        "float_max",
+        "heat_flow",
+        "float_heat_flow",
+        "min_temp",
+        "max_temp",
+        "offset",
+        "latent",
+    ],
+)
+
+
+def exact_targets(streams, default_temp_shift=None):
+    """
+    Returns the Targets of the streams with exact results: the utility targets
+    and the pinch temperatures are ints or fractions, also for float stream
+    data, whose values are taken exactly as they are stored. Unlike in
+    PinchAnalyzer, the shifted temperatures are exact as well.
+
+    Feeding fractions through the heat cascades is slow, so the grand cascade
+    is first computed with floats. This pre-pass orders the breakpoints and
+    finds the pinch candidates: the temperatures whose float heat flow is
+    within a conservative bound of the rounding errors of the minimum. Only
+    the heat flows at the candidates are computed exactly. The heat flows of
+    the segments below a candidate are summed as integers, scaled by their
+    common denominator, and only the segments which span the candidate use
+    fractions.
+
+    Raises a ValueError if a temperature shift is missing.
+    """
+    rows = _grand_rows(streams, default_temp_shift)
+    if not rows:
+        return Targets(0, 0, [])
+
+    # Fixed-point prefix sums of the heat flows, ordered by float_max
+    rows.sort(key=attrgetter("float_max"))
+    float_maxs = [r.float_max for r in rows]
+    denominator = common_denominator(r.heat_flow[1] for r in rows)
+    prefix = [0]
+    for numerator, d in (r.heat_flow for r in rows):
+        prefix.append(prefix[-1] + numerator * (denominator // d))
+
+    # The candidates are sorted, so the rows spanning them are kept in an
+    # active set while sweeping: a heap of the rows which start at or below
+    # the candidate, ordered by float_max
+    by_min = sorted(range(len(rows)), key=lambda i: rows[i].float_min)
+    next_row = 0
+    active = []
+    values = []
+    for float_temp in _candidates(rows):
+        while next_row < len(by_min) and rows[by_min[next_row]].float_min <= float_temp:
+            heappush(active, (rows[by_min[next_row]].float_max, by_min[next_row]))
+            next_row += 1
+        while active and active[0][0] < float_temp:
+            heappop(active)
+
+        index = bisect_left(float_maxs, float_temp)
+        spanning = [rows[i] for _, i in active]
+        values += _exact_values(
+            float_temp, Fraction(prefix[index], denominator), spanning
+        )
+
+    min_heat_flow = min(min(before, after) for _, before, after, _ in values)
+    pinch_temps = sorted(
+        temp
+        for temp, before, after, is_point in values
+        if is_point and min_heat_flow in (before, after)
+    )
+    return Targets(
+        from_exact(Fraction(prefix[-1], denominator) - min_heat_flow, False),
+        from_exact(-min_heat_flow, False),
+        [from_exact(t, False) for t in pinch_temps],
+    )
+
+
+def _grand_rows(streams, default_temp_shift):
+    # Returns the _Row of each hot and cold segment of the streams
+    rows = []
+    for stream in streams:
+        for s in stream.cold_segments + stream.hot_segments:
+            temp_shift = default_temp_shift if s.temp_shift is None else s.temp_shift
+            if temp_shift is None:
+                raise ValueError("No temperature shift given.")
+
+            offset = -temp_shift if s.heat_flow > 0 else temp_shift
+            if s.heat_type == HeatType.LATENT:
+                numerator, denominator = integer_ratio(s.heat_flow)
+                heat_flow = (-numerator, denominator)
+            else:
+                # The exact heat flow of the heat capacity flow rate and the
+                # temperatures, without the rounding of s.heat_flow
+                rate_numerator, rate_denominator = integer_ratio(
+                    s.heat_capacity_flow_rate
+                )
+                supply_numerator, supply_denominator = integer_ratio(s.supply_temp)
+                target_numerator, target_denominator = integer_ratio(s.target_temp)
+                numerator = rate_numerator * (
+                    target_numerator * supply_denominator
+                    - supply_numerator * target_denominator
+                )
+                denominator = rate_denominator * supply_denominator * target_denominator
+                divisor = gcd(numerator, denominator)
+                heat_flow = (numerator // divisor, denominator // divisor)
+
+            rows.append(
+                _Row(
+                    _float_sum(s.min_temp, offset),
+                    _float_sum(s.max_temp, offset),
+                    heat_flow,
+                    -float(s.heat_flow),
+                    s.min_temp,
+                    s.max_temp,
+                    offset,
+                    s.heat_type == HeatType.LATENT,
+                )
+            )
+
+    return rows
+
+
+def _candidates(rows):
+    # Sweeps over the float temperatures of the rows and returns those at
+    # which the exact heat flow may be minimal
+    events = []
+    abs_heat_flow = 0
+    abs_rate = 0
+    for r in rows:
+        heat_flow = r.float_heat_flow
+        abs_heat_flow += abs(heat_flow)
+        if r.float_min == r.float_max:
+            events.append((r.float_min, 0, heat_flow))
+        else:
+            rate = heat_flow / (r.float_max - r.float_min)
+            abs_rate += abs(rate)
+            events.append((r.float_min, rate, 0))
+            events.append((r.float_max, -rate, 0))
+    events.sort(key=itemgetter(0))
+
+    # Each bound is a (temp, lower, upper) tuple: bounds of the float heat
+    # flows at temp. If several exact temperatures round to temp, the heat
+    # flow between them may be lower than before and after all of them.
+    bounds = []
+    heat_flow = 0
+    rate = 0
+    prev_temp = events[0][0]
+    for temp, group in groupby(events, key=itemgetter(0)):
+        heat_flow += rate * (temp - prev_temp)
+        before = heat_flow
+        drop = 0
+        for _, rate_change, latent_heat_flow in group:
+            rate += rate_change
+            heat_flow += latent_heat_flow
+            drop += min(latent_heat_flow, 0)
+        bounds.append(
+            (temp, min(before, heat_flow, before + drop), min(before, heat_flow))
+        )
+        prev_temp = temp
+
+    # Rounding errors of the shifted temperatures and of the sums
+    width = max(abs(events[0][0]), abs(events[-1][0])) + events[-1][0] - events[0][0]
+    error = (
+        8 * sys.float_info.epsilon * len(events) * (abs_heat_flow + abs_rate * width)
+    )
+    upper = min(u for _, _, u in bounds) + 2 * error
+    return [temp for temp, lower, _ in bounds if lower <= upper]
+
+
+def _exact_values(float_temp, below, spanning):
+    # Returns a (temp, before, after, is_point) tuple for each exact shifted
+    # temperature which rounds to float_temp. below is the exact heat flow of
+    # the segments below float_temp, spanning contains the other segments
+    # which start at or below float_temp.
+    exact = [
+        (
+            r,
+            to_exact(r.min_temp) + to_exact(r.offset),
+            to_exact(r.max_temp) + to_exact(r.offset),
+        )
+        for r in spanning
+    ]
+    temps = {
+        t
+        for _, min_temp, max_temp in exact
+        for t in (min_temp, max_temp)
+        if float(t) == float_temp
+    }
+
+    values = []
+    for temp in sorted(temps):
+        before = below
+        latent_heat_flow = 0
+        # Heat capacity flow rates of the sensible segments ending and
+        # starting at temp. Those of the segments spanning temp do not change.
+        rate_below = 0
+        rate_above = 0
+        for r, min_temp, max_temp in exact:
+            heat_flow = Fraction(*r.heat_flow)
+            if r.latent:
+                if min_temp < temp:
+                    before += heat_flow
+                elif min_temp == temp:
+                    latent_heat_flow += heat_flow
+            elif max_temp <= temp:
+                before += heat_flow
+                if max_temp == temp:
+                    rate_below += heat_flow / (max_temp - min_temp)
+            elif min_temp < temp:
+                before += heat_flow * (temp - min_temp) / (max_temp - min_temp)
+            elif min_temp == temp:
+                rate_above += heat_flow / (max_temp - min_temp)
+
+        is_point = latent_heat_flow != 0 or rate_below != rate_above
+        values.append((temp, before, before + latent_heat_flow, is_point))
+
+    return values
+
+
+def _float_sum(a, b):
+    # Returns the exact sum of a and b, rounded to a float. A float addition
+    # rounds the exact sum once, so it is used whenever both numbers are
+    # floats without rounding.
+    if _is_double(a) and _is_double(b):
+        return float(a) + float(b)
+
+    return float(to_exact(a) + to_exact(b))
+
+
+def _is_double(value):
+    return isinstance(value, float) or (isinstance(value, int) and abs(value) <= 2**53)
@@ -1,16 +1,142 @@
+from bisect import bisect_left
+from math import gcd
+
+from pina.enums import HeatType
+from pina.segments.latent_segment import LatentSegment
+from pina.segments.sensible_segment import SensibleSegment
+from pina.skip_list import SkipList
+from pina.sweep import (
+    common_denominator,
+    from_scaled,
+    integer_ratio,
+    scaled_heat_flow,
+    scaled_intervals,
+    segment_rows,
+)
+
+
 class HeatCascade:
     """
     Heat cascade consisting of temperature intervals, each of which has a
     constant heat capacity flow rate.
+
+    With a nonzero absolute or relative tolerance, values are compared like
+    math.isclose: adjacent sensible intervals with close heat capacity flow
+    rates are linked, sensible intervals whose temperatures are close are
+    turned into latent intervals (so the breakpoints are snapped together),
+    latent intervals at close temperatures are added and intervals whose heat
+    flow is within abs_tol of 0 are dropped. Linking and snapping preserve the
+    heat flows, only dropped intervals change the net heat flow.
+
+    The intervals have no temperature shift (their temp_shift is None), as
+    they combine segments with different temperature shifts. The heat capacity
+    flow rates and latent heat flows of the intervals are kept exactly, as integers scaled by a common denominator, and rounded only
+    for the interval segments. So with float data, each interval's value is
+    the correctly rounded sum of its segments' values, no matter in which
+    order the segments were added, and removing a segment restores the
+    previous intervals exactly. The cumulative heat flows are summed exactly
+    as well and rounded once.
     """
 
-    def __init__(self):
-        # List of intervals (which are simply segments) in the cascade
-        self._intervals = []
+    def __init__(self, abs_tol=0, rel_tol=0):
+        """
+        Raises a ValueError if a tolerance is negative.
+        """
+        if abs_tol < 0 or rel_tol < 0:
+            raise ValueError(
+                "Tolerances must not be negative: abs_tol = {}, rel_tol = {}".format(
+                    abs_tol, rel_tol
+                )
+            )
+
+        self._abs_tol = abs_tol
+        self._rel_tol = rel_tol
+        # Intervals (which are simply segments) in the cascade, ordered by
+        # temperature
+        self._index = SkipList(key=_interval_key)
+        # Maps the key of each interval to its exact value (the heat capacity
+        # flow rate or the latent heat flow), scaled by _denominator
+        self._scaled = {}
+        self._denominator = 1
+        # True if any of the values was a float
+        self._inexact = False
+        self._invalidate()
+
+    @classmethod
+    def from_segments(cls, *segments, abs_tol=0, rel_tol=0):
+        """
+        Creates a heat cascade from the given segments in a single pass. The
+        result is the same as adding the segments to an empty cascade one by
+        one with add_segments, but the breakpoints of all segments are sorted
+        only once, which makes this O(n log n) instead of O(n^2).
+        """
+        return cls.from_rows(*segment_rows(segments), abs_tol=abs_tol, rel_tol=rel_tol)
+
+    @classmethod
+    def from_rows(cls, sensible, latent, abs_tol=0, rel_tol=0):
+        """
+        Creates a heat cascade from the sensible and latent rows of
+        sweep_intervals, without creating segment objects for them.
+        """
+        cascade = cls(abs_tol, rel_tol)
+        rows, cascade._denominator, cascade._inexact = scaled_intervals(
+            sensible, latent
+        )
+        if cascade._tolerant():
+            intervals = cascade._coalesce(cascade._interval(row) for row in rows)
+            for interval in intervals:
+                cascade._scaled[_interval_key(interval)] = cascade._to_scaled(
+                    _value_of(interval)
+                )
+        else:
+            intervals = [cascade._interval(row) for row in rows]
+            cascade._scaled = {
+                _interval_key(interval): row[2]
+                for interval, row in zip(intervals, rows)
+            }
+        cascade._index = SkipList(_interval_key, intervals)
+        return cascade
+
+    @property
+    def abs_tol(self):
+        return self._abs_tol
+
+    @property
+    def rel_tol(self):
+        return self._rel_tol
 
     @property
     def intervals(self):
-        return self._intervals
+        """
+        Returns a list of the cascade's intervals, sorted by temperature.
+        """
+        return list(self._interval_tuple())
+
+    @property
+    def denominator(self):
+        """
+        The common denominator of the exact interval values of scaled_rows.
+        """
+        return self._denominator
+
+    @property
+    def inexact(self):
+        """
+        True if any of the values added to the cascade was a float, so the
+        exact values are rounded to floats.
+        """
+        return self._inexact
+
+    def scaled_rows(self):
+        """
+        Returns a list of the intervals as (min_temp, max_temp, value) rows,
+        sorted by temperature. The value is the exact heat capacity flow rate
+        or latent heat flow, as an integer scaled by the denominator.
+        """
+        return [
+            (i.min_temp, i.max_temp, self._scaled[_interval_key(i)])
+            for i in self._interval_tuple()
+        ]
 
     def add_segments(self, *segments):
         """
@@ -20,101 +146,358 @@ class HeatCascade:
         for s in segments:
             self._add_one(s)
 
+    def add_segment(self, segment):
+        """
+        Adds a single segment like add_segments. Returns a tuple of two lists
+        of rows like scaled_rows, with the values scaled by the denominator
+        after adding the segment: the intervals which were taken out of the
+        cascade and the intervals which replaced them. All other intervals
+        are unchanged, so data derived from the cascade can be updated
+        incrementally.
+        """
+        return self._add_one(segment)
+
+    def remove_segments(self, *segments):
+        """
+        Removes segments from the heat cascade, i.e. each segment's heat flow
+        is subtracted at the respective temperature range. Only the intervals
+        overlapping a segment and their neighbors are relinked.
+        """
+        for s in segments:
+            self._add_one(s.with_inverted_heat_flow())
+
     def net_heat_flow(self):
         """
         Returns the net heat flow summed over all intervals.
         """
-        return sum(i.heat_flow for i in self.intervals)
+        if self._net_heat_flow is None:
+            self._net_heat_flow = sum(i.heat_flow for i in self._interval_tuple())
+
+        return self._net_heat_flow
 
     def cumulative_heat_flow(self, heat_offset=0):
         """
-        Returns a tuple of two lists:
-        * The first list contains the cumulative heat flows at the beginning
+        Returns a tuple of two tuples:
+        * The first tuple contains the cumulative heat flows at the beginning
           and end of each interval.
-        * The second list contains the corresponding temperatures.
-        The two lists are sorted by temperature, from lowest to highest.
+        * The second tuple contains the corresponding temperatures.
+        The two tuples are sorted by temperature, from lowest to highest.
         The cumulative heat flow at the lowest temperature is set to
         heat_offset.
 
-        The two lists form the coordinates of the composite curves.
+        The two tuples form the coordinates of the composite curves. The
+        result for the most recent heat_offset is cached until the cascade
+        changes.
         """
+        if self._curve is not None and self._curve[0] == heat_offset:
+            return self._curve[1]
+
+        rows = self.scaled_rows()
+        temp_denominator = common_denominator(
+            integer_ratio(t)[1] for row in rows for t in row[:2]
+        )
+        inexact = self._inexact or any(
+            isinstance(t, float) for row in rows for t in row[:2]
+        )
         temperatures = []
         heat_flows = []
-        if self.intervals:
-            temperatures.append(self.intervals[0].supply_temp)
-            heat_flows.append(heat_offset)
-            for i in self.intervals:
-                if i.supply_temp != temperatures[-1]:
+        if rows:
+            temperatures.append(rows[0][0])
+            heat_flows.append(0)
+            for min_temp, max_temp, value in rows:
+                if min_temp != temperatures[-1]:
                     # There is a temperature gap between 2 intervals
-                    temperatures.append(i.supply_temp)
+                    temperatures.append(min_temp)
                     heat_flows.append(heat_flows[-1])
-                temperatures.append(i.target_temp)
-                heat_flows.append(heat_flows[-1] + i.heat_flow)
+                temperatures.append(max_temp)
+                heat_flows.append(
+                    heat_flows[-1]
+                    + scaled_heat_flow(min_temp, max_temp, value, temp_denominator)
+                )
 
-        return heat_flows, temperatures
+        # The heat flows are rounded once and the offset is added last, so the
+        # curves for different offsets only differ by the offset
+        denominator = self._denominator * temp_denominator
+        heat_flows[1:] = [from_scaled(h, denominator, inexact) for h in heat_flows[1:]]
+        curve = (tuple(h + heat_offset for h in heat_flows), tuple(temperatures))
+        self._curve = (heat_offset, curve)
+        return curve
 
-    def _add_one(self, segment):
-        # Split new segment and existing intervals to get rid of overlaps
-        subsegments = segment.with_low_supply_temp().split(
-            temperature
-            for interval in self.intervals
-            for temperature in [interval.min_temp, interval.max_temp]
-        )
-        self._intervals = [
-            new_interval
-            for old_interval in self._intervals
-            for new_interval in old_interval.split([segment.min_temp, segment.max_temp])
-        ]
+    def curve_positions(self, temp):
+        """
+        Returns the positions at temp which are points of the cumulative heat
+        flow curve: 0 stands for the point before and 1 for the point after
+        a latent interval at temp. Returns () if temp is not a breakpoint of
+        the curve, (0,) if it is a breakpoint without latent heat flow and
+        (0, 1) if there is a latent interval at temp.
+        """
+        key = _key_of(temp, None)
+        below = self._index.find_lt(key)
+        above = next(self._index.iter_from(key), None)
+        if above is not None and above.min_temp == temp:
+            return (0, 1) if above.heat_type == HeatType.LATENT else (0,)
+        elif below is not None and below.max_temp == temp:
+            return (0,)
+        else:
+            return ()
 
-        self._add_tailored(subsegments)
-        self._link_intervals()
+    def _interval_tuple(self):
+        if self._intervals is None:
+            self._intervals = tuple(self._index)
 
-    def _add_tailored(self, segments):
-        # Add the segments to the heat cascade.
-        #
-        # The temperature range of each segment and each existing interval must
-        # not overlap. They must either match exactly or be separated.
-        index = 0
-        for s in segments:
-            while index < len(self.intervals):
-                if s.min_temp >= self.intervals[index].max_temp:
-                    # The segment will be added at higher temperatures
-                    index += 1
-                    continue
-
-                try:
-                    # Add segment to interval
-                    self._intervals[index] = self.intervals[index].add(s)
-                except ValueError:
-                    # No matching interval found, insert new one
-                    self._intervals.insert(index, s)
+        return self._intervals
+
+    def _invalidate(self):
+        # Drops the cached results, which are computed again on demand
+        self._intervals = None
+        self._net_heat_flow = None
+        self._curve = None
+
+    def _add_one(self, segment):
+        # Only the intervals overlapping the new segment and their direct
+        # neighbors are affected. They are taken out of the index, merged with
+        # the new segment and reinserted. Returns the removed and the inserted
+        # rows (see add_segment).
+        self._invalidate()
+        segment = segment.with_low_supply_temp()
+        if (
+            segment.heat_type == HeatType.SENSIBLE
+            and segment.min_temp == segment.max_temp
+        ):
+            # No heat flow and no breakpoint
+            return [], []
 
+        # Scaled before the window is taken out, as it may rescale all values
+        scaled = self._to_scaled(_value_of(segment))
+        # With tolerances, the window extends one more interval to each side,
+        # so intervals at its edges are linked or snapped together with their
+        # neighbors
+        margin = 2 if self._tolerant() else 1
+        window = []
+        key = _key_of(segment.min_temp, None)
+        while len(window) < margin:
+            predecessor = self._index.find_lt(key)
+            if predecessor is None:
                 break
-            else:
-                # No matching interval found, append new one
-                self._intervals.append(s)
-
-    def _link_intervals(self):
-        # Links adjacent intervals, if possible.
-        index = 0
-        while index < len(self.intervals) - 1:
-            try:
-                self._intervals[index] = self.intervals[index].link(
-                    self.intervals[index + 1]
+            window.insert(0, predecessor)
+            key = _interval_key(predecessor)
+        for interval in self._index.iter_from(_key_of(segment.min_temp, None)):
+            if interval.min_temp > segment.max_temp:
+                if self._tolerant():
+                    window.append(interval)
+                break
+            window.append(interval)
+
+        removed = []
+        for interval in window:
+            self._index.remove(interval)
+            removed.append(
+                (
+                    interval.min_temp,
+                    interval.max_temp,
+                    self._scaled.pop(_interval_key(interval)),
                 )
-            except ValueError:
-                pass
-            else:
-                self._intervals.pop(index + 1)
+            )
+
+        rows = _added_rows(removed, (segment.min_temp, segment.max_temp, scaled))
+        denominator = self._denominator
+        if self._tolerant():
+            inserted = self._coalesce(self._interval(row) for row in rows)
+            for interval in inserted:
+                self._scaled[_interval_key(interval)] = self._to_scaled(
+                    _value_of(interval)
+                )
+                self._index.insert(interval)
+            inserted = [
+                (i.min_temp, i.max_temp, self._scaled[_interval_key(i)])
+                for i in inserted
+            ]
+            # The values may have been rescaled while coalescing
+            factor = self._denominator // denominator
+            if factor != 1:
+                removed = [
+                    (min_temp, max_temp, value * factor)
+                    for min_temp, max_temp, value in removed
+                ]
+        else:
+            inserted = rows
+            for row in rows:
+                interval = self._interval(row)
+                self._scaled[_interval_key(interval)] = row[2]
+                self._index.insert(interval)
+
+        return removed, inserted
+
+    def _to_scaled(self, value):
+        # Returns the value as an integer scaled by _denominator, rescaling all
+        # values first if the value's denominator does not divide it
+        numerator, denominator = integer_ratio(value)
+        self._inexact |= isinstance(value, float)
+        if self._denominator % denominator:
+            factor = denominator // gcd(self._denominator, denominator)
+            self._denominator *= factor
+            for key in self._scaled:
+                self._scaled[key] *= factor
+
+        return numerator * (self._denominator // denominator)
+
+    def _interval(self, row):
+        # Returns the interval segment of a (min_temp, max_temp, scaled value)
+        # row
+        min_temp, max_temp, scaled = row
+        value = from_scaled(scaled, self._denominator, self._inexact)
+        if min_temp == max_temp:
+            return LatentSegment(value, min_temp)
+
+        return SensibleSegment(value, min_temp, max_temp)
 
-            if self.intervals[index].heat_flow == 0:
-                self._intervals.pop(index)
-                continue
+    def _tolerant(self):
+        return self._abs_tol > 0 or self._rel_tol > 0
 
-            index += 1
+    def _close(self, a, b):
+        return abs(a - b) <= max(self._rel_tol * max(abs(a), abs(b)), self._abs_tol)
 
-        if self.intervals and self.intervals[-1].heat_flow == 0:
-            self._intervals.pop(-1)
+    def _coalesce(self, intervals):
+        # Returns a list of the intervals (sorted by temperature), linked,
+        # snapped and dropped within the tolerances in one pass
+        result = []
+        # (old, new) temperature: the interval starting at the old temperature
+        # is stretched to start at the new one
+        snapped = None
+        for interval in intervals:
+            if snapped is not None and interval.min_temp == snapped[0]:
+                interval = _with_min_temp(interval, snapped[1])
+            snapped = None
+            if interval.heat_type == HeatType.SENSIBLE and self._close(
+                interval.min_temp, interval.max_temp
+            ):
+                snapped = (interval.max_temp, interval.min_temp)
+                interval = LatentSegment(interval.heat_flow, interval.min_temp)
+
+            while result:
+                merged = self._merge(result[-1], interval)
+                if merged is not None:
+                    result.pop()
+                    interval = merged
+                elif abs(result[-1].heat_flow) <= self._abs_tol:
+                    # The neighbors of the dropped interval may be mergeable
+                    result.pop()
+                else:
+                    break
+            result.append(interval)
+
+        while result and abs(result[-1].heat_flow) <= self._abs_tol:
+            result.pop()
+
+        return result
+
+    def _merge(self, lower, upper):
+        # Returns the interval combining two neighboring intervals if they are
+        # close enough, otherwise None
+        if lower.heat_type != upper.heat_type:
+            return None
+
+        if lower.heat_type == HeatType.LATENT:
+            if self._close(lower.min_temp, upper.min_temp):
+                return LatentSegment(lower.heat_flow + upper.heat_flow, lower.min_temp)
+        elif lower.max_temp == upper.min_temp and self._close(
+            lower.heat_capacity_flow_rate, upper.heat_capacity_flow_rate
+        ):
+            return SensibleSegment.new(
+                lower.heat_flow + upper.heat_flow, lower.min_temp, upper.max_temp
+            )
+
+        return None
+
+    def __len__(self):
+        return len(self._index)
 
     def __eq__(self, other):
-        return self.intervals == other.intervals
+        return self._interval_tuple() == other._interval_tuple()
+
+
+def _key_of(min_temp, heat_type):
+    # Latent intervals come before sensible intervals starting at the same
+    # temperature. The key of a segment without heat type is less than both.
+    if heat_type is None:
+        return (min_temp, 0)
+    elif heat_type == HeatType.LATENT:
+        return (min_temp, 1)
+    else:
+        return (min_temp, 2)
+
+
+def _with_min_temp(interval, min_temp):
+    # Returns the interval with the given minimum temperature and the same heat
+    # flow
+    if interval.heat_type == HeatType.LATENT:
+        return LatentSegment(interval.heat_flow, min_temp)
+
+    return SensibleSegment.new(interval.heat_flow, min_temp, interval.max_temp)
+
+
+def _interval_key(interval):
+    return _key_of(interval.min_temp, interval.heat_type)
+
+
+def _value_of(interval):
+    # Returns the latent heat flow or the heat capacity flow rate of an
+    # interval with low supply temperature
+    if interval.heat_type == HeatType.LATENT:
+        return interval.heat_flow
+
+    return interval.heat_capacity_flow_rate
+
+
+def _added_rows(rows, new_row):
+    # Adds a (min_temp, max_temp, scaled value) row to a list of such rows,
+    # which are sorted by temperature and do not overlap. Rows with
+    # min_temp == max_temp are latent. Returns the resulting rows: split at
+    # the breakpoints of all rows, with the values added where they overlap,
+    # adjacent sensible rows with equal values linked and zero rows dropped.
+    new_min, new_max, new_value = new_row
+    temps = sorted(
+        {t for min_temp, max_temp, _ in rows for t in (min_temp, max_temp)}
+        | {new_min, new_max}
+    )
+    # Map the temperatures to the values of the latent rows and the lower
+    # temperatures of the split sensible rows to their values
+    latent = {}
+    sensible = {}
+    for min_temp, max_temp, value in rows:
+        if min_temp == max_temp:
+            latent[min_temp] = value
+        else:
+            for low in temps[
+                bisect_left(temps, min_temp) : bisect_left(temps, max_temp)
+            ]:
+                sensible[low] = value
+
+    if new_min == new_max:
+        pieces = latent
+        lows = [new_min]
+    else:
+        pieces = sensible
+        lows = temps[bisect_left(temps, new_min) : bisect_left(temps, new_max)]
+    for low in lows:
+        pieces[low] = pieces.get(low, 0) + new_value
+
+    result = []
+    for low, high in zip(temps, temps[1:] + [None]):
+        if latent.get(low, 0) != 0:
+            result.append((low, low, latent[low]))
+        if sensible.get(low, 0) != 0:
+            value = sensible[low]
+            last = result[-1] if result else None
+            if (
+                last is not None
+                and last[0] != last[1]
+                and last[1] == low
+                and last[2] == value
+            ):
+                # Link with the previous row
+                result[-1] = (last[0], high, value)
+            else:
+                result.append((low, high, value))
+
+    return result
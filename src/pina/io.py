@@ -0,0 +1,135 @@
+import csv
+import os
+
+from pina.segments import make_segment
+from pina.stream import Stream
+from pina.stream_table import StreamTable
+
+# Columns which must be present in the header of a stream data file
+_REQUIRED_COLUMNS = ("heat_flow", "supply_temp", "target_temp")
+
+
+def read_streams_csv(file, **fmtparams):
+    """
+    Reads a CSV file of stream segments and yields its streams one by one.
+    `file` is a path or a text file object. Only the rows of the current
+    stream are held in memory.
+
+    The first row of the file is a header with the column names. The columns
+    heat_flow, supply_temp and target_temp are required. The optional column
+    temp_shift contains the individual temperature shifts of the segments (an
+    empty field means none). Other columns are ignored. Each row is one
+    segment, and consecutive rows are grouped into segmented streams:
+    * If the file has a stream_id column, consecutive rows with equal stream
+      ids form one stream. A ValueError is raised if there is a temperature
+      gap between them.
+    * Otherwise, a row continues the stream of the previous row if its supply
+      temperature equals the previous target temperature, like the continuity
+      rule of Stream. Otherwise it starts a new stream.
+
+    Further keyword arguments (e.g. delimiter) are passed to csv.reader.
+    """
+    for rows in _stream_rows(file, fmtparams):
+        yield Stream(*(make_segment(*row) for row in rows))
+
+
+def read_stream_tables_csv(file, chunk_size=100000, **fmtparams):
+    """
+    Reads a CSV file of stream segments like read_streams_csv, but yields
+    StreamTables with about `chunk_size` rows each, without creating any
+    segment or stream objects. A stream is never split across tables, so a
+    table may have more rows if a stream is longer than the remaining part of
+    the chunk. Each table can be added to a PinchAnalyzer directly.
+    """
+    if chunk_size < 1:
+        raise ValueError("Invalid chunk size: {}".format(chunk_size))
+
+    columns = ([], [], [], [], [])
+    stream_id = 0
+    for rows in _stream_rows(file, fmtparams):
+        for row in rows:
+            for column, value in zip(columns, (*row, stream_id)):
+                column.append(value)
+        stream_id += 1
+        if len(columns[0]) >= chunk_size:
+            yield StreamTable(*columns)
+            columns = ([], [], [], [], [])
+            stream_id = 0
+
+    if columns[0]:
+        yield StreamTable(*columns)
+
+
+def _stream_rows(file, fmtparams):
+    # Yields a list of (heat_flow, supply_temp, target_temp, temp_shift) tuples
+    # for each stream of the file
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, newline="") as f:
+            yield from _stream_rows(f, fmtparams)
+        return
+
+    reader = csv.reader(file, **fmtparams)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    header = [name.strip() for name in header]
+    missing = [c for c in _REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError("Missing columns: {}".format(", ".join(missing)))
+
+    indices = [header.index(c) for c in _REQUIRED_COLUMNS]
+    temp_shift_index = header.index("temp_shift") if "temp_shift" in header else None
+    id_index = header.index("stream_id") if "stream_id" in header else None
+
+    rows = []
+    prev_id = None
+    for fields in reader:
+        if not any(f.strip() for f in fields):
+            continue
+
+        line = reader.line_num
+        try:
+            heat_flow, supply_temp, target_temp = (
+                _number(fields[i], line) for i in indices
+            )
+            temp_shift = None
+            if temp_shift_index is not None and fields[temp_shift_index].strip():
+                temp_shift = _number(fields[temp_shift_index], line)
+            stream_id = None if id_index is None else fields[id_index].strip()
+        except IndexError:
+            raise ValueError("Line {}: missing fields".format(line)) from None
+
+        if rows:
+            if id_index is not None:
+                same_stream = stream_id == prev_id
+                if same_stream and supply_temp != rows[-1][2]:
+                    raise ValueError(
+                        "Line {}: temperature gap between adjacent segments of "
+                        "stream {}".format(line, stream_id)
+                    )
+            else:
+                same_stream = supply_temp == rows[-1][2]
+            if not same_stream:
+                yield rows
+                rows = []
+
+        rows.append((heat_flow, supply_temp, target_temp, temp_shift))
+        prev_id = stream_id
+
+    if rows:
+        yield rows
+
+
+def _number(text, line):
+    # Parses integers exactly and all other numbers as floats
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("Line {}: invalid number: {!r}".format(line, text)) from None
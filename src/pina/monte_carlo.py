@@ -0,0 +1,226 @@
+import random
+from collections import namedtuple
+
+from pina.problem_table import targets_at
+
+StreamUncertainty = namedtuple(
+    "StreamUncertainty", ["heat_flow", "supply_temp", "target_temp"]
+)
+StreamUncertainty.__doc__ = """
+Standard deviations of the heat flow and the supply and target temperatures of
+a stream.
+"""
+
+MonteCarloResult = namedtuple(
+    "MonteCarloResult", ["hot_utility_targets", "cold_utility_targets", "pinch_temps"]
+)
+MonteCarloResult.__doc__ = """
+Energy targets of all samples of a Monte Carlo analysis, one entry per sample.
+"""
+
+
+def monte_carlo(
+    streams, uncertainties, default_temp_shift=None, samples=1000, seed=None
+):
+    """
+    Samples the streams' heat flows and temperatures from normal distributions
+    and returns the energy targets of all samples as a MonteCarloResult.
+
+    `uncertainties` contains one StreamUncertainty (or None for an exact
+    stream) per stream. The heat flows of all segments of a stream are scaled
+    by the same factor and its intermediate temperatures are mapped linearly
+    to the sampled supply and target temperatures.
+
+    The random numbers are drawn column by column, i.e. per stream and
+    quantity for all samples. If only heat flows are uncertain and no sampled
+    heat flow changes its sign, which would turn a hot stream into a cold one,
+    the shifted temperatures are the same in all samples. Then the grand
+    cascade is swept only once and all samples are evaluated at once, one
+    column of values per temperature. Otherwise the order of the temperatures
+    changes from sample to sample, so each sample is evaluated on its own, on
+    plain tuples of numbers without creating any stream or cascade objects.
+    """
+    streams = list(streams)
+    uncertainties = list(uncertainties)
+    if len(streams) != len(uncertainties):
+        raise ValueError(
+            "Number of uncertainties ({}) does not match number of streams "
+            "({})".format(len(uncertainties), len(streams))
+        )
+
+    rng = random.Random(seed)
+    columns = []
+    fixed_temps = True
+    for stream, uncertainty in zip(streams, uncertainties):
+        if uncertainty is None:
+            uncertainty = StreamUncertainty(0, 0, 0)
+        heat_flow_noise, supply_noise, target_noise = [
+            _normal(rng, std, samples) for std in uncertainty
+        ]
+        # The factors by which the stream's heat flows are scaled
+        heat_flow = stream.heat_flow
+        scales = [
+            (heat_flow + n) / heat_flow if heat_flow else 1 for n in heat_flow_noise
+        ]
+        fixed_temps &= (
+            not uncertainty.supply_temp
+            and not uncertainty.target_temp
+            and all(scale > 0 for scale in scales)
+        )
+        columns.append(
+            (
+                _stream_rows(stream, default_temp_shift),
+                stream.supply_temp,
+                stream.target_temp,
+                scales,
+                supply_noise,
+                target_noise,
+            )
+        )
+
+    if fixed_temps:
+        return _fixed_temp_targets(columns, samples)
+
+    hot_utility_targets = []
+    cold_utility_targets = []
+    pinch_temps = []
+    for sample in range(samples):
+        rows = []
+        for (
+            stream_rows,
+            supply_temp,
+            target_temp,
+            scales,
+            supply_noise,
+            target_noise,
+        ) in columns:
+            rows += _sampled_rows(
+                stream_rows,
+                scales[sample],
+                supply_temp,
+                target_temp,
+                supply_temp + supply_noise[sample],
+                target_temp + target_noise[sample],
+            )
+
+        targets = targets_at(rows, 0, True)
+        hot_utility_targets.append(targets.hot_utility_target)
+        cold_utility_targets.append(targets.cold_utility_target)
+        pinch_temps.append(targets.pinch_temps)
+
+    return MonteCarloResult(
+        tuple(hot_utility_targets), tuple(cold_utility_targets), tuple(pinch_temps)
+    )
+
+
+def _fixed_temp_targets(columns, samples):
+    # Returns the MonteCarloResult if the shifted temperatures are the same in
+    # all samples. The heat flows of each stream's rows are scaled by the same
+    # factor in each sample, so the grand cascade is swept once over the rows
+    # of the exact streams while the heat capacity flow rates and cumulative
+    # heat flows of all samples are updated column by column.
+    events = {}
+    for stream_rows, supply_temp, target_temp, scales, _, _ in columns:
+        for min_temp, max_temp, _, value in _sampled_rows(
+            stream_rows, 1, supply_temp, target_temp, supply_temp, target_temp
+        ):
+            if min_temp == max_temp:
+                events.setdefault(min_temp, []).append((scales, 0, value))
+            else:
+                events.setdefault(min_temp, []).append((scales, value, 0))
+                events.setdefault(max_temp, []).append((scales, -value, 0))
+
+    min_heat_flows = [0] * samples
+    pinch_temps = [[] for _ in range(samples)]
+    heat_flows = [0] * samples
+    rates = [0] * samples
+    prev_temp = None
+    for temp in sorted(events):
+        if prev_temp is not None:
+            width = temp - prev_temp
+            heat_flows = [h - r * width for h, r in zip(heat_flows, rates)]
+
+        rates_below = rates
+        latent_heat_flows = [0] * samples
+        for scales, rate_change, latent_heat_flow in events[temp]:
+            if rate_change:
+                rates = [r + rate_change * s for r, s in zip(rates, scales)]
+            if latent_heat_flow:
+                latent_heat_flows = [
+                    h + latent_heat_flow * s for h, s in zip(latent_heat_flows, scales)
+                ]
+        after = [h + l for h, l in zip(heat_flows, latent_heat_flows)]
+
+        for sample in range(samples):
+            heat_flow = min(heat_flows[sample], after[sample])
+            is_point = (
+                latent_heat_flows[sample] != 0 or rates_below[sample] != rates[sample]
+            )
+            if heat_flow < min_heat_flows[sample]:
+                min_heat_flows[sample] = heat_flow
+                pinch_temps[sample] = [temp] if is_point else []
+            elif heat_flow == min_heat_flows[sample] and is_point:
+                pinch_temps[sample].append(temp)
+
+        heat_flows = after
+        prev_temp = temp
+
+    return MonteCarloResult(
+        tuple(float(h - m) for h, m in zip(heat_flows, min_heat_flows)),
+        tuple(float(-m) for m in min_heat_flows),
+        tuple(pinch_temps),
+    )
+
+
+def _normal(rng, std, samples):
+    if not std:
+        return [0] * samples
+
+    return [rng.gauss(0, std) for _ in range(samples)]
+
+
+def _stream_rows(stream, default_temp_shift):
+    # Returns a list of (heat_flow, supply_temp, target_temp, temp_shift)
+    # tuples of the stream's hot and cold segments
+    rows = []
+    for s in stream.cold_segments + stream.hot_segments:
+        temp_shift = s.temp_shift if s.temp_shift is not None else default_temp_shift
+        if temp_shift is None:
+            raise ValueError("No temperature shift given.")
+        rows.append((s.heat_flow, s.supply_temp, s.target_temp, temp_shift))
+
+    return rows
+
+
+def _sampled_rows(
+    stream_rows, scale, supply_temp, target_temp, new_supply_temp, new_target_temp
+):
+    # Returns the grand cascade rows (see problem_table.grand_rows) of the
+    # sampled stream, with shifted temperatures and a slope of 0
+    if supply_temp == target_temp:
+
+        def new_temp(temp):
+            return temp + new_supply_temp - supply_temp
+
+    else:
+        ratio = (new_target_temp - new_supply_temp) / (target_temp - supply_temp)
+
+        def new_temp(temp):
+            return new_supply_temp + (temp - supply_temp) * ratio
+
+    rows = []
+    for heat_flow, segment_supply_temp, segment_target_temp, temp_shift in stream_rows:
+        heat_flow *= scale
+        if heat_flow == 0:
+            continue
+
+        temps = sorted((new_temp(segment_supply_temp), new_temp(segment_target_temp)))
+        shift = temp_shift if heat_flow < 0 else -temp_shift
+        min_temp = temps[0] + shift
+        max_temp = temps[1] + shift
+        if min_temp == max_temp:
+            rows.append((min_temp, max_temp, 0, -heat_flow))
+        else:
+            rows.append((min_temp, max_temp, 0, heat_flow / (max_temp - min_temp)))
+
+    return rows
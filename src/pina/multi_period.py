@@ -0,0 +1,308 @@
+from collections import namedtuple
+from fractions import Fraction
+
+from pina.scenario_matrix import (
+    cascade_targets,
+    grid_cascade,
+    grid_events,
+    scaled_widths,
+)
+from pina.sweep import common_denominator, from_exact, from_scaled, to_exact
+
+StorageTargets = namedtuple(
+    "StorageTargets",
+    [
+        "hot_utility_demand",
+        "cold_utility_demand",
+        "hot_utility_target",
+        "cold_utility_target",
+        "storage_heat_recovery",
+        "storage_capacities",
+        "storage_capacity",
+    ],
+)
+StorageTargets.__doc__ = """
+Energy targets of a multi-period process with heat storage. The utility
+demands are the utility energies without storage (the sum of the targets of
+all periods, multiplied by their durations), the utility targets those with
+ideal storage (the time average model). storage_heat_recovery is the energy
+recovered by the storage. storage_capacities contains the storage capacity at
+each temperature of the grid, and storage_capacity is their maximum.
+"""
+
+
+class MultiPeriodAnalyzer:
+    """
+    Pinch analysis of a process whose streams are only present in some
+    periods (time slices), e.g. a batch plant.
+
+    All periods share one grid of the streams' shifted temperatures (see
+    ScenarioMatrix). The grid events of a period are the sum of the events of
+    its active streams. The periods are evaluated in order on one running set
+    of events, and only the events of the streams which start or stop between
+    two periods are added or subtracted, so long profiles with few changes per
+    period are cheap to evaluate. The heat flows are scaled to integers by
+    their common denominator, so the results are exact.
+    """
+
+    def __init__(self, streams, active_periods, durations, default_temp_shift=None):
+        """
+        `active_periods` contains, for each stream, an iterable of the indices
+        of the periods in which the stream is present. `durations` contains
+        the duration of each period; they are the weights of the time average
+        model.
+
+        Raises a ValueError if the numbers of streams and active periods
+        differ, if a period index is out of range, if a duration is not
+        positive or if a temperature shift is missing.
+        """
+        self._streams = list(streams)
+        active_periods = [sorted(set(p)) for p in active_periods]
+        self._durations = list(durations)
+        if len(active_periods) != len(self._streams):
+            raise ValueError(
+                "Number of active periods ({}) does not match number of "
+                "streams ({})".format(len(active_periods), len(self._streams))
+            )
+        for duration in self._durations:
+            if duration <= 0:
+                raise ValueError("Invalid duration: {}".format(duration))
+        for periods in active_periods:
+            if periods and not (0 <= periods[0] and periods[-1] < len(self._durations)):
+                raise ValueError("Period index out of range: {}".format(periods))
+
+        self._temps, events, self._inexact = grid_events(
+            self._streams, default_temp_shift
+        )
+        self._active_periods = active_periods
+
+        # The events of the streams as integers, scaled by self._scale
+        self._widths, width_scale = scaled_widths(self._temps)
+        scale = common_denominator(
+            Fraction(value).denominator
+            for stream_events in events
+            for _, heat_flow, rate_change, _ in stream_events
+            for value in (heat_flow, rate_change)
+        )
+        self._events = [
+            [
+                (
+                    index,
+                    int(heat_flow * scale * width_scale),
+                    int(rate_change * scale),
+                    count_change,
+                )
+                for index, heat_flow, rate_change, count_change in stream_events
+            ]
+            for stream_events in events
+        ]
+        self._scale = scale * width_scale
+
+        # Maps the index of each period to the changes of the active streams
+        # compared to the previous period, as (stream index, factor) tuples
+        self._changes = [[] for _ in self._durations]
+        for index, periods in enumerate(active_periods):
+            prev = None
+            for period in periods:
+                if prev is None or period != prev + 1:
+                    self._changes[period].append((index, 1))
+                    if prev is not None and prev + 1 < len(self._durations):
+                        self._changes[prev + 1].append((index, -1))
+                prev = period
+            if prev is not None and prev + 1 < len(self._durations):
+                self._changes[prev + 1].append((index, -1))
+
+    @property
+    def streams(self):
+        return self._streams
+
+    @property
+    def durations(self):
+        return self._durations
+
+    @property
+    def temps(self):
+        """
+        Returns a tuple of the shifted temperatures of the shared grid.
+        """
+        return tuple(self._temps)
+
+    @property
+    def heating_demands(self):
+        """
+        Returns a list with the heating demand of each period.
+        """
+        return self._demands(lambda s: s.cold_segments)
+
+    @property
+    def cooling_demands(self):
+        """
+        Returns a list with the cooling demand of each period.
+        """
+        return self._demands(lambda s: s.hot_segments)
+
+    @property
+    def grand_cascades(self):
+        """
+        Returns a list with the grand cascade of each period. Each grand
+        cascade is a tuple of the cumulative heat flows at the two positions
+        of each grid temperature, before and after its latent heat flow.
+        """
+        return [
+            tuple(from_scaled(h, self._scale, self._inexact) for h in cascade)
+            for cascade, _ in self._period_cascades()
+        ]
+
+    @property
+    def targets(self):
+        """
+        Returns a list with the Targets of each period.
+        """
+
+        def convert(value):
+            return from_scaled(value, self._scale, self._inexact)
+
+        return [
+            cascade_targets(self._temps, cascade, convert, is_point)
+            for cascade, is_point in self._period_cascades()
+        ]
+
+    @property
+    def time_average_targets(self):
+        """
+        Returns the Targets of the time average model, in which the heat flow
+        of each stream is multiplied by the fraction of the total duration in
+        which it is present.
+        """
+        inexact = self._inexact or any(isinstance(d, float) for d in self._durations)
+        durations, _ = _scaled_durations(self._durations)
+        total = sum(durations)
+        events = _Events(len(self._temps))
+        for periods, stream_events in zip(self._active_periods, self._events):
+            events.add(stream_events, sum(durations[p] for p in periods))
+
+        def convert(value):
+            return from_scaled(value, self._scale * total, inexact)
+
+        return cascade_targets(
+            self._temps, events.cascade(self._widths), convert, events.is_point
+        )
+
+    def storage_targets(self):
+        """
+        Returns the StorageTargets of the process with ideal heat storage
+        between the periods.
+
+        With storage, every period is operated like the time average model
+        and the storage makes up for the difference. The heat which has to
+        cross a shifted temperature in period p is the grand cascade value at
+        that temperature. The storage balance of the temperature accumulates
+        the differences between the time average and each period's value,
+        multiplied by the period's duration. The storage capacity at the
+        temperature is the range of this cumulative balance over time (before
+        the first and after each period). The balances are computed for all
+        temperatures at once on integer arrays, scaled so that all heat flows
+        and durations are integers.
+        """
+        inexact = self._inexact or any(isinstance(d, float) for d in self._durations)
+        if not self._temps:
+            zero = from_exact(0, inexact)
+            return StorageTargets(zero, zero, zero, zero, zero, (), zero)
+
+        durations, duration_scale = _scaled_durations(self._durations)
+        total = sum(durations)
+
+        # Time average cascade, multiplied by the total duration
+        events = _Events(len(self._temps))
+        for periods, stream_events in zip(self._active_periods, self._events):
+            events.add(stream_events, sum(durations[p] for p in periods))
+        average = events.cascade(self._widths)
+
+        balance = lowest = highest = [0] * len(average)
+        hot_utility = cold_utility = 0
+        for duration, (cascade, _) in zip(durations, self._period_cascades()):
+            min_heat_flow = min(cascade)
+            hot_utility += duration * (cascade[-1] - min_heat_flow)
+            cold_utility -= duration * min_heat_flow
+            balance = [
+                b + duration * (a - total * h)
+                for b, a, h in zip(balance, average, cascade)
+            ]
+            lowest = list(map(min, lowest, balance))
+            highest = list(map(max, highest, balance))
+
+        def energy(value, scale):
+            return from_scaled(value, scale, inexact)
+
+        scale = duration_scale * self._scale
+        capacities = [
+            energy(max(h1 - l1, h2 - l2), scale * total)
+            for h1, l1, h2, l2 in zip(
+                highest[::2], lowest[::2], highest[1::2], lowest[1::2]
+            )
+        ]
+        hot_target = average[-1] - min(average)
+        cold_target = -min(average)
+        return StorageTargets(
+            energy(hot_utility, scale),
+            energy(cold_utility, scale),
+            energy(hot_target, scale),
+            energy(cold_target, scale),
+            energy(hot_utility - hot_target, scale),
+            tuple(capacities),
+            max(capacities),
+        )
+
+    def _period_cascades(self):
+        # Yields the scaled grand cascade of each period and a function
+        # telling whether the index-th temperature is a point of it. The
+        # events of all periods are kept in one running _Events, so the
+        # function is only valid until the next period is yielded.
+        events = _Events(len(self._temps))
+        for changes in self._changes:
+            for index, factor in changes:
+                events.add(self._events[index], factor)
+            yield events.cascade(self._widths), events.is_point
+
+    def _demands(self, segments_of):
+        demands = [0] * len(self._durations)
+        inexact = False
+        for stream, periods in zip(self._streams, self._active_periods):
+            heat_flow = sum(abs(to_exact(s.heat_flow)) for s in segments_of(stream))
+            inexact |= any(isinstance(s.heat_flow, float) for s in segments_of(stream))
+            for period in periods:
+                demands[period] += heat_flow
+
+        return [from_exact(d, inexact) for d in demands]
+
+
+class _Events:
+    # The sums of the scaled events of several streams on the grid, each
+    # multiplied by a factor
+
+    def __init__(self, size):
+        self.heat_flows = [0] * size
+        self.rate_changes = [0] * size
+        self.count_changes = [0] * size
+
+    def add(self, events, factor):
+        for index, heat_flow, rate_change, count_change in events:
+            self.heat_flows[index] += heat_flow * factor
+            self.rate_changes[index] += rate_change * factor
+            self.count_changes[index] += count_change * factor
+
+    def cascade(self, widths):
+        return grid_cascade(
+            self.heat_flows, self.rate_changes, widths, self.count_changes
+        )
+
+    def is_point(self, index):
+        return self.heat_flows[index] != 0 or self.rate_changes[index] != 0
+
+
+def _scaled_durations(durations):
+    # Returns the durations as integers, scaled by their common denominator,
+    # and the denominator
+    durations = [to_exact(d) for d in durations]
+    scale = common_denominator(Fraction(d).denominator for d in durations)
+    return [int(d * scale) for d in durations], scale
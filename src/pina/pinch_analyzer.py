@@ -1,4 +1,8 @@
+from pina.composite_curve import CompositeCurve
 from pina.heat_cascade import HeatCascade
+from pina.stream_table import StreamTable
+from pina.sweep import common_denominator, from_scaled, integer_ratio, segment_rows
+from pina.treap import MinTreap
 
 
 class PinchAnalyzer:
@@ -6,35 +10,76 @@ class PinchAnalyzer:
     This class performs pinch analysis calculations on a list of streams:
     heating and cooling requirements, heat cascades and the pinch
     temperature(s).
+
+    The heat cascades are built lazily: adding or removing streams only
+    queues the change, and each cascade is built or updated when a property
+    that needs it is read for the first time.
+
+    abs_tol and rel_tol are passed to the heat cascades (see HeatCascade). With
+    floating-point stream data, nonzero tolerances keep rounding errors from
+    fragmenting the cascades into many tiny intervals.
     """
 
-    def __init__(self, default_temp_shift=None):
+    def __init__(self, default_temp_shift=None, abs_tol=0, rel_tol=0):
+        """
+        Raises a ValueError if a tolerance is negative.
+        """
+        if abs_tol < 0 or rel_tol < 0:
+            raise ValueError(
+                "Tolerances must not be negative: abs_tol = {}, rel_tol = {}".format(
+                    abs_tol, rel_tol
+                )
+            )
+
         self._default_temp_shift = default_temp_shift
+        self._abs_tol = abs_tol
+        self._rel_tol = rel_tol
         self._streams = []
+        self._tables = []
+        self._targets_valid = True
         self._pinch_temps = []
         self._cold_utility_target = 0
         self._hot_utility_target = 0
 
-        self._cold_cascade = HeatCascade()
-        self._hot_cascade = HeatCascade()
-        self._shifted_cold_cascade = HeatCascade()
-        self._shifted_hot_cascade = HeatCascade()
-        self._grand_cascade = HeatCascade()
+        # Maps the name of each cascade to the cascade, or to None if it has
+        # not been built yet
+        self._cascades = dict.fromkeys(_CASCADE_SEGMENTS)
+        # Maps the name of each built cascade to a list of (stream, remove)
+        # tuples which have not been applied to the cascade yet
+        self._pending = {name: [] for name in _CASCADE_SEGMENTS}
+        # Maps the name of each property to its value, until the streams
+        # change
+        self._cache = {}
+
+        # Exact cumulative heat flows of the grand cascade at the points of
+        # its curve, keyed by (temp, position): position 0 is before and 1
+        # after a latent heat flow at temp. The values are integers scaled by
+        # _tree_denominators: the cascade's denominator times the common
+        # denominator of the temperatures.
+        self._target_tree = None
+        self._tree_denominators = (1, 1)
+        self._tree_inexact = False
 
     @property
     def cooling_demand(self):
-        return self._hot_cascade.net_heat_flow()
+        return self._cached(
+            "cooling_demand", lambda: self._cascade("hot").net_heat_flow()
+        )
 
     @property
     def heating_demand(self):
-        return self._cold_cascade.net_heat_flow()
+        return self._cached(
+            "heating_demand", lambda: self._cascade("cold").net_heat_flow()
+        )
 
     @property
     def cold_utility_target(self):
+        self._compute_targets()
         return self._cold_utility_target
 
     @property
     def hot_utility_target(self):
+        self._compute_targets()
         return self._hot_utility_target
 
     @property
@@ -43,70 +88,457 @@ class PinchAnalyzer:
 
     @property
     def pinch_temps(self):
+        self._compute_targets()
         return self._pinch_temps
 
     @property
     def default_temp_shift(self):
         return self._default_temp_shift
 
+    @property
+    def abs_tol(self):
+        return self._abs_tol
+
+    @property
+    def rel_tol(self):
+        return self._rel_tol
+
     @property
     def streams(self):
-        return self._streams
+        """
+        Returns a list of the streams, including those of the stream tables.
+        """
+        return self._streams + [s for t in self._tables for s in t.streams]
 
     @property
     def cold_composite_curve(self):
-        return self._cold_cascade.cumulative_heat_flow(self.cold_utility_target)
+        return self._composite_curve("cold", self.cold_utility_target)
 
     @property
     def hot_composite_curve(self):
-        return self._hot_cascade.cumulative_heat_flow()
+        return self._composite_curve("hot", 0)
 
     @property
     def shifted_cold_composite_curve(self):
-        return self._shifted_cold_cascade.cumulative_heat_flow(self.cold_utility_target)
+        return self._composite_curve("shifted_cold", self.cold_utility_target)
 
     @property
     def shifted_hot_composite_curve(self):
-        return self._shifted_hot_cascade.cumulative_heat_flow()
+        return self._composite_curve("shifted_hot", 0)
 
     @property
     def grand_composite_curve(self):
-        return self._grand_cascade.cumulative_heat_flow(self.cold_utility_target)
+        return self._composite_curve("grand", self.cold_utility_target)
 
     def add_streams(self, *streams):
         """
-        Adds the given streams to the stream group.
+        Adds the given streams to the stream group. Each argument may also be
+        a StreamTable, whose rows are added without creating segment objects.
+        The cascades are then rebuilt in bulk when they are needed.
         """
         for s in streams:
-            self._add_one(s)
+            self._check_temp_shifts(s)
 
-        self._compute_targets()
+        for s in streams:
+            if isinstance(s, StreamTable):
+                self._tables.append(s)
+                self._reset_cascades()
+            else:
+                self._add_one(s)
+
+    def remove_streams(self, *streams):
+        """
+        Removes the given streams (or StreamTables) from the stream group. Only
+        the cascade intervals overlapping the streams' segments are updated.
+
+        A single stream of a StreamTable can be removed as well. The table's
+        other streams are then kept as stream objects, and the cascades are
+        rebuilt in bulk when they are needed, like after removing a table.
+
+        Raises a ValueError if one of the streams is not part of the stream
+        group.
+        """
+        for s in streams:
+            if isinstance(s, StreamTable):
+                self._remove_table(s)
+            else:
+                self._remove_one(s)
+
+    def replace_stream(self, old_stream, new_stream):
+        """
+        Replaces old_stream by new_stream, keeping its position in the list of
+        streams. old_stream may be a stream of a StreamTable, whose other
+        streams are then kept as stream objects like in remove_streams.
+        Raises a ValueError if old_stream is not part of the stream group.
+        """
+        self._check_temp_shifts(new_stream)
+        index = self._remove_one(old_stream)
+        self._add_one(new_stream)
+        self._streams.insert(index, self._streams.pop())
+
+    def _cached(self, key, compute):
+        # Returns the cached value for key, computing it if necessary
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = compute()
+            return value
+
+    def _composite_curve(self, name, heat_offset):
+        # The curves are tuples, so the cached values cannot be modified
+        return self._cached(
+            name,
+            lambda: CompositeCurve(
+                *self._cascade(name).cumulative_heat_flow(heat_offset)
+            ),
+        )
+
+    def _check_temp_shifts(self, stream):
+        # Fail early, before the stream is queued
+        if self.default_temp_shift is None:
+            if isinstance(stream, StreamTable):
+                if stream.missing_temp_shift():
+                    raise ValueError("No temperature shift given.")
+                return
+
+            for s in stream.cold_segments + stream.hot_segments:
+                if s.temp_shift is None:
+                    raise ValueError("No temperature shift given.")
+
+    def _remove_table(self, table):
+        for index, t in enumerate(self._tables):
+            if t is table:
+                self._tables.pop(index)
+                self._reset_cascades()
+                return
+
+        raise ValueError("Stream table not found: {}".format(table))
+
+    def _remove_from_table(self, stream):
+        # Replaces the table containing the stream by its other streams.
+        # Returns the index the stream would have had among them.
+        for index, table in enumerate(self._tables):
+            streams = list(table.streams)
+            if stream in streams:
+                stream_index = len(self._streams) + streams.index(stream)
+                streams.remove(stream)
+                self._tables.pop(index)
+                self._streams += streams
+                self._reset_cascades()
+                return stream_index
+
+        raise ValueError("Stream not found: {}".format(stream))
+
+    def _reset_cascades(self):
+        # The cascades are rebuilt from scratch when they are needed
+        self._targets_valid = False
+        self._cache.clear()
+        for name in self._cascades:
+            self._cascades[name] = None
+            self._pending[name].clear()
+
+    def _index_of(self, stream):
+        try:
+            return self._streams.index(stream)
+        except ValueError:
+            raise ValueError("Stream not found: {}".format(stream)) from None
+
+    def _row_count(self):
+        # The number of streams plus the number of rows of the tables
+        return len(self._streams) + sum(len(t) for t in self._tables)
 
     def _add_one(self, stream):
         self._streams.append(stream)
+        self._queue(stream, remove=False)
 
-        for s in stream.cold_segments:
-            self._cold_cascade.add_segments(s.with_absolute_heat_flow())
-            shifted = s.shift(self.default_temp_shift)
-            self._shifted_cold_cascade.add_segments(shifted.with_absolute_heat_flow())
-            self._grand_cascade.add_segments(shifted.with_inverted_heat_flow())
+    def _remove_one(self, stream):
+        # Returns the index of the removed stream in _streams
+        if stream not in self._streams:
+            return self._remove_from_table(stream)
 
-        for s in stream.hot_segments:
-            self._hot_cascade.add_segments(s.with_absolute_heat_flow())
-            shifted = s.shift(self.default_temp_shift)
-            self._shifted_hot_cascade.add_segments(shifted.with_absolute_heat_flow())
-            self._grand_cascade.add_segments(shifted.with_inverted_heat_flow())
+        index = self._index_of(stream)
+        self._streams.pop(index)
+        self._queue(stream, remove=True)
+        return index
+
+    def _queue(self, stream, remove):
+        self._targets_valid = False
+        self._cache.clear()
+        for name, cascade in self._cascades.items():
+            if cascade is not None:
+                self._pending[name].append((stream, remove))
+
+    def _cascade(self, name):
+        # Returns the cascade with the given name, after building it or
+        # applying the pending changes to it
+        cascade = self._cascades[name]
+        pending = self._pending[name]
+        segments_of = _CASCADE_SEGMENTS[name]
+        if cascade is None or len(pending) > self._row_count():
+            # Building the cascade from scratch in one bulk pass is cheaper
+            # than applying the pending changes one by one
+            sensible, latent = segment_rows(
+                segment
+                for stream in self._streams
+                for segment in segments_of(stream, self.default_temp_shift)
+            )
+            for table in self._tables:
+                table_sensible, table_latent = table.cascade_rows(
+                    *_CASCADE_ROWS[name], self.default_temp_shift
+                )
+                sensible += table_sensible
+                latent += table_latent
+            cascade = HeatCascade.from_rows(
+                sensible, latent, self._abs_tol, self._rel_tol
+            )
+            self._cascades[name] = cascade
+            if name == "grand":
+                self._target_tree = None
+        else:
+            for stream, remove in pending:
+                for segment in segments_of(stream, self.default_temp_shift):
+                    if name == "grand":
+                        self._update_grand_cascade(segment, remove)
+                    elif remove:
+                        cascade.remove_segments(segment)
+                    else:
+                        cascade.add_segments(segment)
+
+        pending.clear()
+        return cascade
+
+    def _update_grand_cascade(self, segment, remove):
+        if remove:
+            segment = segment.with_inverted_heat_flow()
+        removed, inserted = self._cascades["grand"].add_segment(segment)
+        if self._target_tree is not None:
+            self._update_target_tree(removed, inserted)
 
     def _compute_targets(self):
-        heat_flows, temps = self._grand_cascade.cumulative_heat_flow()
-        if heat_flows:
-            min_heat_flow = min(heat_flows)
-            self._pinch_temps = [
-                t for t, h in zip(temps, heat_flows) if h == min_heat_flow
-            ]
-            self._cold_utility_target = heat_flows[0] - min_heat_flow
-            self._hot_utility_target = heat_flows[-1] - min_heat_flow
+        if self._targets_valid:
+            return
+
+        self._cascade("grand")
+        if self._target_tree is None:
+            self._build_target_tree()
+
+        self._targets_valid = True
+        tree = self._target_tree
+        if len(tree):
+            # Like the end points of the grand composite curve: the cumulative
+            # heat flows are rounded once, relative to the first point, which
+            # is 0
+            denominator = self._tree_denominators[0] * self._tree_denominators[1]
+            min_heat_flow = tree.min()
+            if min_heat_flow != 0:
+                min_heat_flow = from_scaled(
+                    min_heat_flow, denominator, self._tree_inexact
+                )
+            self._pinch_temps = sorted({temp for temp, _ in tree.argmins()})
+            self._cold_utility_target = 0 - min_heat_flow
+            self._hot_utility_target = (
+                from_scaled(tree.last()[1], denominator, self._tree_inexact)
+                + self._cold_utility_target
+            )
         else:
             self._pinch_temps = []
             self._cold_utility_target = 0
             self._hot_utility_target = 0
+
+    def _build_target_tree(self):
+        # Builds the tree from the grand cascade in O(n). The values are exact,
+        # so the targets do not depend on the order in which the streams were
+        # added or removed, and they match the grand composite curve.
+        grand_cascade = self._cascades["grand"]
+        rows = grand_cascade.scaled_rows()
+        ratios = _temp_ratios(rows)
+        temp_denominator = common_denominator(d for _, d in ratios.values())
+        keys = _curve_keys(rows)
+        values = _cumulative_values(
+            rows, keys, _scaled_temps(ratios, temp_denominator), temp_denominator
+        )
+        self._target_tree = MinTreap(zip(keys, values))
+        self._tree_denominators = (grand_cascade.denominator, temp_denominator)
+        self._tree_inexact = grand_cascade.inexact or any(
+            isinstance(t, float) for t in ratios
+        )
+
+    def _update_target_tree(self, removed, inserted):
+        # Replaces the contributions of the cascade rows which were removed by
+        # those of the rows which were inserted, in expected O(k + log n),
+        # where k is the number of tree items within their temperature range
+        if not removed and not inserted:
+            return
+
+        grand_cascade = self._cascades["grand"]
+        tree = self._target_tree
+        ratios = _temp_ratios(removed + inserted)
+        denominator, temp_denominator = self._tree_denominators
+        new_temp_denominator = common_denominator(
+            [temp_denominator] + [d for _, d in ratios.values()]
+        )
+        factor = grand_cascade.denominator // denominator
+        factor *= new_temp_denominator // temp_denominator
+        if factor != 1:
+            tree.scale(factor)
+            temp_denominator = new_temp_denominator
+            self._tree_denominators = (grand_cascade.denominator, temp_denominator)
+        self._tree_inexact |= grand_cascade.inexact or any(
+            isinstance(t, float) for t in ratios
+        )
+        # The temperatures of all keys within the range are those of the rows
+        scaled_temps = _scaled_temps(ratios, temp_denominator)
+
+        # The points of the curve within the range are those of the inserted
+        # rows. At its ends, intervals outside the range may start or end.
+        low = min(ratios)
+        high = max(ratios)
+        start = (low, 0)
+        stop = (high, 1)
+        keys = sorted(
+            [key for key in _curve_keys(inserted) if low < key[0] < high]
+            + [
+                (temp, position)
+                for temp in {low, high}
+                for position in grand_cascade.curve_positions(temp)
+            ]
+        )
+        # The last value is the total of the inserted rows
+        new_values = _cumulative_values(
+            inserted, keys + [stop], scaled_temps, temp_denominator
+        )
+
+        # The values of the inserted rows are relative to the cumulative heat
+        # flow before the range, plus any latent heat flow at its lower end
+        # which is not part of the removed rows, so they are offset by the
+        # difference of the previous item to the removed rows' values
+        old_items = tree.items(start, stop)
+        old_values = _cumulative_values(
+            removed,
+            [key for key, _ in old_items] + [stop],
+            scaled_temps,
+            temp_denominator,
+        )
+        below = tree.find_lt(start)
+        offset = 0 if below is None else below[1]
+        items = []
+        index = 0
+        for key, value in zip(keys, new_values[:-1]):
+            while index < len(old_items) and old_items[index][0] <= key:
+                offset = old_items[index][1] - old_values[index]
+                index += 1
+            items.append((key, offset + value))
+
+        tree.replace(start, stop, items, new_values[-1] - old_values[-1])
+
+
+def _curve_keys(rows):
+    # Returns the sorted (temp, position) keys of the curve points of the rows
+    # (sorted by temperature): the temperatures of the rows at position 0,
+    # and at position 1 if there is a latent row
+    keys = []
+    for min_temp, max_temp, _ in rows:
+        if min_temp == max_temp:
+            row_keys = [(min_temp, 0), (min_temp, 1)]
+        else:
+            row_keys = [(min_temp, 0), (max_temp, 0)]
+        for key in row_keys:
+            if not keys or keys[-1] < key:
+                keys.append(key)
+
+    return keys
+
+
+def _temp_ratios(rows):
+    # Maps the temperatures of the rows to their integer ratios
+    return {temp: integer_ratio(temp) for row in rows for temp in row[:2]}
+
+
+def _scaled_temps(ratios, temp_denominator):
+    # Maps the temperatures to integers scaled by temp_denominator, which is a
+    # multiple of their denominators
+    return {
+        temp: numerator * (temp_denominator // denominator)
+        for temp, (numerator, denominator) in ratios.items()
+    }
+
+
+def _cumulative_values(rows, keys, scaled_temps, temp_denominator):
+    # Returns the cumulative heat flows of the rows (sorted by temperature) at
+    # the sorted (temp, position) keys, scaled by temp_denominator times the
+    # denominator of the rows' values. A latent heat flow at temp is included
+    # from position 1. scaled_temps maps the temperatures of the rows and keys
+    # to integers scaled by temp_denominator.
+    values = []
+    cumulative = 0
+    index = 0
+    for temp, position in keys:
+        while index < len(rows):
+            min_temp, max_temp, value = rows[index]
+            if min_temp == max_temp:
+                if min_temp > temp or (min_temp == temp and position == 0):
+                    break
+                cumulative += value * temp_denominator
+            elif max_temp > temp:
+                break
+            else:
+                cumulative += value * (scaled_temps[min_temp] - scaled_temps[max_temp])
+            index += 1
+
+        value = cumulative
+        if index < len(rows) and rows[index][0] < temp:
+            # Within a sensible row
+            min_temp, _, rate = rows[index]
+            value += rate * (scaled_temps[min_temp] - scaled_temps[temp])
+        values.append(value)
+
+    return values
+
+
+def _cold_segments(stream, default_temp_shift):
+    return [s.with_absolute_heat_flow() for s in stream.cold_segments]
+
+
+def _hot_segments(stream, default_temp_shift):
+    return [s.with_absolute_heat_flow() for s in stream.hot_segments]
+
+
+def _shifted_cold_segments(stream, default_temp_shift):
+    return [
+        s.shift(default_temp_shift).with_absolute_heat_flow()
+        for s in stream.cold_segments
+    ]
+
+
+def _shifted_hot_segments(stream, default_temp_shift):
+    return [
+        s.shift(default_temp_shift).with_absolute_heat_flow()
+        for s in stream.hot_segments
+    ]
+
+
+def _grand_segments(stream, default_temp_shift):
+    return [
+        s.shift(default_temp_shift).with_inverted_heat_flow()
+        for s in stream.cold_segments + stream.hot_segments
+    ]
+
+
+# The arguments of StreamTable.cascade_rows for each cascade: heat sign,
+# shifted, inverted
+_CASCADE_ROWS = {
+    "cold": (-1, False, False),
+    "hot": (1, False, False),
+    "shifted_cold": (-1, True, False),
+    "shifted_hot": (1, True, False),
+    "grand": (0, True, True),
+}
+
+# The segments which each stream contributes to each cascade
+_CASCADE_SEGMENTS = {
+    "cold": _cold_segments,
+    "hot": _hot_segments,
+    "shifted_cold": _shifted_cold_segments,
+    "shifted_hot": _shifted_hot_segments,
+    "grand": _grand_segments,
+}
@@ -0,0 +1,248 @@
+from collections import namedtuple
+from itertools import groupby
+from operator import itemgetter
+
+from pina.enums import HeatType
+from pina.stream_table import StreamTable
+from pina.sweep import (
+    common_denominator,
+    from_exact,
+    from_scaled,
+    integer_ratio,
+    scaled_heat_flow,
+    scaled_intervals,
+    to_exact,
+)
+
+Targets = namedtuple(
+    "Targets", ["hot_utility_target", "cold_utility_target", "pinch_temps"]
+)
+Targets.__doc__ = """
+Energy targets of a set of streams for one temperature shift.
+"""
+
+
+def targets(streams, default_temp_shift=None):
+    """
+    Returns the Targets of the streams (or StreamTables) with the classic
+    Problem Table Algorithm, with the same results as PinchAnalyzer. Only the
+    grand cascade is built: its rows are computed straight from the stream
+    data, without creating shifted or inverted segments, and the heat
+    balances of the shifted temperature intervals are computed in one sorted
+    pass.
+
+    Raises a ValueError if a temperature shift is missing.
+    """
+    sensible = []
+    latent = []
+    for stream in streams:
+        if isinstance(stream, StreamTable):
+            table_sensible, table_latent = stream.cascade_rows(
+                0, True, True, default_temp_shift
+            )
+            sensible += table_sensible
+            latent += table_latent
+            continue
+
+        for s in stream.cold_segments + stream.hot_segments:
+            # Shifted like BaseSegment.shift
+            shift_by = default_temp_shift if s.temp_shift is None else s.temp_shift
+            if shift_by is None:
+                raise ValueError("No temperature shift given.")
+            if s.heat_flow > 0:
+                shift_by *= -1
+
+            if s.heat_type == HeatType.LATENT:
+                latent.append((s.supply_temp + shift_by, -s.heat_flow))
+            else:
+                # Heat capacity flow rate of the inverted segment with low
+                # supply temperature
+                rate = s.heat_capacity_flow_rate
+                if s.supply_temp < s.target_temp:
+                    rate = -rate
+                min_temp = s.min_temp + shift_by
+                max_temp = s.max_temp + shift_by
+                if min_temp != max_temp:
+                    sensible.append((min_temp, max_temp, rate))
+
+    # Each shifted temperature has two positions: before and after its latent
+    # heat flow. rates contains the heat capacity flow rate above each
+    # temperature. The heat flows are summed exactly, scaled by the
+    # denominators of the values and the temperatures, and rounded like in
+    # HeatCascade.cumulative_heat_flow.
+    rows, denominator, inexact = scaled_intervals(sensible, latent)
+    if not rows:
+        return Targets(0, 0, [])
+
+    temp_denominator = common_denominator(
+        integer_ratio(t)[1] for row in rows for t in row[:2]
+    )
+    inexact |= any(isinstance(t, float) for row in rows for t in row[:2])
+    temps = []
+    heat_flows = []
+    latent_heat_flows = []
+    rates = []
+    heat_flow = 0
+    for min_temp, max_temp, value in rows:
+        if not temps or temps[-1] != min_temp:
+            temps.append(min_temp)
+            heat_flows += [heat_flow, heat_flow]
+            latent_heat_flows.append(0)
+            rates.append(0)
+        heat_flow += scaled_heat_flow(min_temp, max_temp, value, temp_denominator)
+        if min_temp == max_temp:
+            latent_heat_flows[-1] = value
+            heat_flows[-1] = heat_flow
+        else:
+            rates[-1] = value
+            temps.append(max_temp)
+            heat_flows += [heat_flow, heat_flow]
+            latent_heat_flows.append(0)
+            rates.append(0)
+
+    min_heat_flow = min(heat_flows)
+    pinch_temps = []
+    for i, temp in enumerate(temps):
+        if min_heat_flow not in heat_flows[2 * i : 2 * i + 2]:
+            continue
+        rate_below = rates[i - 1] if i > 0 else 0
+        if latent_heat_flows[i] != 0 or rate_below != rates[i]:
+            pinch_temps.append(temp)
+
+    # The first heat flow is 0, like the first point of the curve
+    denominator *= temp_denominator
+    if min_heat_flow != 0:
+        min_heat_flow = from_scaled(min_heat_flow, denominator, inexact)
+    cold_utility_target = 0 - min_heat_flow
+    return Targets(
+        from_scaled(heat_flows[-1], denominator, inexact) + cold_utility_target,
+        cold_utility_target,
+        pinch_temps,
+    )
+
+
+def grand_rows(streams):
+    """
+    Converts the hot and cold segments of the streams to the rows of the grand
+    cascade. Returns a tuple of the rows and a flag telling whether any of the
+    inputs was a float.
+
+    Each row is a (min_temp, max_temp, slope, value) tuple with exact numbers.
+    The shifted temperatures of the row are min_temp + slope * temp_shift and
+    max_temp + slope * temp_shift, where temp_shift is the default temperature
+    shift. The slope is 0 for segments with an individual temperature shift,
+    which is already included in min_temp and max_temp. Sensible rows have
+    min_temp < max_temp and their value is the heat capacity flow rate of the
+    inverted segment with low supply temperature. Latent rows have
+    min_temp == max_temp and their value is the inverted heat flow.
+    """
+    rows = []
+    inexact = False
+    for stream in streams:
+        for s in stream.cold_segments + stream.hot_segments:
+            direction = -1 if s.heat_flow > 0 else 1
+            if s.temp_shift is None:
+                offset = 0
+                slope = direction
+            else:
+                offset = direction * to_exact(s.temp_shift)
+                slope = 0
+
+            s = s.with_inverted_heat_flow().with_low_supply_temp()
+            if s.min_temp == s.max_temp:
+                value = s.heat_flow
+            else:
+                value = s.heat_capacity_flow_rate
+            inexact |= any(
+                isinstance(x, float) for x in (s.min_temp, s.max_temp, value)
+            )
+            inexact |= isinstance(s.temp_shift, float)
+            rows.append(
+                (
+                    to_exact(s.min_temp) + offset,
+                    to_exact(s.max_temp) + offset,
+                    slope,
+                    to_exact(value),
+                )
+            )
+
+    return rows, inexact
+
+
+def grand_points(rows, temp_shift, inexact):
+    """
+    Sweeps over the shifted temperatures of the grand cascade rows for the
+    given (exact) default temperature shift. Returns a list of
+    (temp, temp_line, before, after, is_point) tuples, one for each distinct
+    shifted temperature, sorted by temperature:
+    * temp is the shifted temperature.
+    * temp_line, before and after are (a, b) tuples of lines a + b * t in the
+      temperature shift t: the shifted temperature and the cumulative heat
+      flow of the grand cascade before and after the latent heat flow at
+      temp. The lines are valid as long as the order of the shifted
+      temperatures does not change.
+    * is_point tells whether temp is a point of the grand composite curve.
+    """
+    events = []
+    for min_temp, max_temp, slope, value in rows:
+        if min_temp == max_temp:
+            events.append((min_temp + slope * temp_shift, min_temp, slope, 0, value))
+        else:
+            events.append((min_temp + slope * temp_shift, min_temp, slope, value, 0))
+            events.append((max_temp + slope * temp_shift, max_temp, slope, -value, 0))
+    events.sort(key=itemgetter(0))
+
+    points = []
+    rate = 0
+    heat_flow = (0, 0)
+    prev_line = None
+    for temp, group in groupby(events, key=itemgetter(0)):
+        group = list(group)
+        temp_line = group[0][1:3]
+        if prev_line is not None:
+            heat_flow = (
+                heat_flow[0] - rate * (temp_line[0] - prev_line[0]),
+                heat_flow[1] - rate * (temp_line[1] - prev_line[1]),
+            )
+
+        rate_below = rate
+        latent_heat_flow = 0
+        for event in group:
+            rate += event[3]
+            latent_heat_flow += event[4]
+        after = (heat_flow[0] + latent_heat_flow, heat_flow[1])
+        is_point = from_exact(latent_heat_flow, inexact) != 0 or from_exact(
+            rate_below, inexact
+        ) != from_exact(rate, inexact)
+        points.append((temp, temp_line, heat_flow, after, is_point))
+        heat_flow = after
+        prev_line = temp_line
+
+    return points
+
+
+def targets_at(rows, temp_shift, inexact):
+    """
+    Returns the Targets of the grand cascade rows for the given default
+    temperature shift, with the same results as PinchAnalyzer.
+    """
+    inexact |= isinstance(temp_shift, float)
+    temp_shift = to_exact(temp_shift)
+    points = grand_points(rows, temp_shift, inexact)
+    if not points:
+        return Targets(0, 0, [])
+
+    def value(line):
+        return line[0] + line[1] * temp_shift
+
+    min_heat_flow = min(value(line) for p in points for line in p[2:4])
+    pinch_temps = [
+        from_exact(temp, inexact)
+        for temp, _, before, after, is_point in points
+        if is_point and min_heat_flow in (value(before), value(after))
+    ]
+    return Targets(
+        from_exact(value(points[-1][3]) - min_heat_flow, inexact),
+        from_exact(-min_heat_flow, inexact),
+        pinch_temps,
+    )
@@ -0,0 +1,317 @@
+from fractions import Fraction
+
+from pina.enums import HeatType
+from pina.problem_table import Targets
+from pina.sweep import common_denominator, from_scaled, integer_ratio, to_exact
+
+
+class ScenarioMatrix:
+    """
+    Evaluates the energy targets of many scenarios in which only the heat
+    flows of the streams change, while their temperatures stay fixed.
+
+    The shifted temperatures of all streams form a grid which is built only
+    once. Each temperature of the grid has two positions: before and after the
+    latent heat flow at that temperature. Each stream contributes a few events
+    to the grid, in proportion to its heat flow: its latent heat flows and the
+    changes of its heat capacity flow rate where its segments start and end.
+    For a matrix of heat flows (one row per scenario, one column per stream),
+    the events of each scenario are therefore a sparse matrix product, and
+    the grand cascade is a single sweep over the grid.
+
+    With float data, the scenarios are evaluated with floats, so the results
+    may differ from those of PinchAnalyzer by rounding errors. Otherwise, the
+    heat flows are scaled to integers by their common denominator and the
+    results are exact.
+    """
+
+    def __init__(self, streams, default_temp_shift=None):
+        """
+        Raises a ValueError if a stream has no net heat flow, because it
+        cannot be scaled, or if a temperature shift is missing.
+        """
+        self._streams = list(streams)
+        for stream in self._streams:
+            if stream.heat_flow == 0:
+                raise ValueError("Stream without heat flow: {}".format(stream))
+
+        self._temps, events, self._inexact = grid_events(
+            self._streams, default_temp_shift
+        )
+        # The exact events of each stream per unit of the stream's heat flow,
+        # and the events at each temperature as (stream index, heat flow,
+        # rate change) tuples
+        self._events = []
+        self._events_at = [[] for _ in self._temps]
+        self._count_changes = [0] * len(self._temps)
+        for stream_index, (stream, stream_events) in enumerate(
+            zip(self._streams, events)
+        ):
+            self._inexact |= isinstance(stream.heat_flow, float)
+            per_unit = 1 / Fraction(stream.heat_flow)
+            unit_events = []
+            for index, heat_flow, rate_change, count_change in stream_events:
+                heat_flow *= per_unit
+                rate_change *= per_unit
+                unit_events.append((index, heat_flow, rate_change))
+                self._events_at[index].append((stream_index, heat_flow, rate_change))
+                self._count_changes[index] += count_change
+            self._events.append(unit_events)
+
+        self._float_grid = None
+        self._scaled_grid = None
+
+    @property
+    def streams(self):
+        return self._streams
+
+    @property
+    def temps(self):
+        """
+        Returns a tuple of the shifted temperatures of the grid.
+        """
+        return tuple(self._temps)
+
+    def grand_cascades(self, heat_flows):
+        """
+        Returns a list with the grand cascade of each scenario. `heat_flows`
+        is a matrix with one row per scenario and one column per stream. Each
+        grand cascade is a tuple of the cumulative heat flows at the two
+        positions of each grid temperature, before and after its latent heat
+        flow.
+        """
+        return [
+            tuple(convert(h) for h in cascade)
+            for cascade, convert, _ in self._cascades(heat_flows)
+        ]
+
+    def targets(self, heat_flows):
+        """
+        Returns a list with the Targets of each scenario. `heat_flows` is a
+        matrix with one row per scenario and one column per stream.
+        """
+        return [
+            cascade_targets(self._temps, cascade, convert, is_point)
+            for cascade, convert, is_point in self._cascades(heat_flows)
+        ]
+
+    def _cascades(self, heat_flows):
+        # Yields a (cascade, convert, is_point) tuple for each scenario: its
+        # grand cascade as floats or as scaled integers, a function converting
+        # the values of the cascade back and a function telling whether the
+        # index-th temperature is a point of the cascade.
+        # Raises a ValueError if the heat flow of a stream changes its sign.
+        for scenario, row in enumerate(heat_flows):
+            row = list(row)
+            if len(row) != len(self._streams):
+                raise ValueError(
+                    "Scenario {} has {} heat flows, expected {}".format(
+                        scenario, len(row), len(self._streams)
+                    )
+                )
+            for stream, heat_flow in zip(self._streams, row):
+                if heat_flow * stream.heat_flow < 0:
+                    raise ValueError(
+                        "Heat flow of stream {} changes its sign in scenario "
+                        "{}".format(stream, scenario)
+                    )
+
+            if self._inexact or any(isinstance(h, float) for h in row):
+                yield self._float_cascade(row)
+            else:
+                yield self._scaled_cascade(row)
+
+    def _float_cascade(self, row):
+        if self._float_grid is None:
+            self._float_grid = (
+                [
+                    [(index, float(h), float(r)) for index, h, r in events]
+                    for events in self._events
+                ],
+                float_widths(self._temps),
+            )
+        events, widths = self._float_grid
+
+        heat_flows = [0.0] * len(self._temps)
+        rate_changes = [0.0] * len(self._temps)
+        for factor, stream_events in zip(row, events):
+            factor = float(factor)
+            for index, heat_flow, rate_change in stream_events:
+                heat_flows[index] += heat_flow * factor
+                rate_changes[index] += rate_change * factor
+        cascade = grid_cascade(heat_flows, rate_changes, widths, self._count_changes)
+
+        def is_point(index):
+            # The events at the temperature are summed exactly, so that
+            # rounding errors do not turn it into a point
+            events = self._events_at[index]
+            heat_flow = sum(to_exact(row[i]) * h for i, h, _ in events)
+            rate_change = sum(to_exact(row[i]) * r for i, _, r in events)
+            return heat_flow != 0 or rate_change != 0
+
+        return cascade, float, is_point
+
+    def _scaled_cascade(self, row):
+        if self._scaled_grid is None:
+            widths, width_scale = scaled_widths(self._temps)
+            scale = common_denominator(
+                Fraction(value).denominator
+                for events in self._events
+                for _, heat_flow, rate_change in events
+                for value in (heat_flow, rate_change)
+            )
+            events = [
+                [
+                    (
+                        index,
+                        int(heat_flow * scale * width_scale),
+                        int(rate_change * scale),
+                    )
+                    for index, heat_flow, rate_change in stream_events
+                ]
+                for stream_events in self._events
+            ]
+            self._scaled_grid = events, widths, scale * width_scale
+        events, widths, scale = self._scaled_grid
+
+        ratios = [integer_ratio(h) for h in row]
+        row_scale = common_denominator(d for _, d in ratios)
+        heat_flows = [0] * len(self._temps)
+        rate_changes = [0] * len(self._temps)
+        for (numerator, denominator), stream_events in zip(ratios, events):
+            factor = numerator * (row_scale // denominator)
+            for index, heat_flow, rate_change in stream_events:
+                heat_flows[index] += heat_flow * factor
+                rate_changes[index] += rate_change * factor
+        cascade = grid_cascade(heat_flows, rate_changes, widths, self._count_changes)
+
+        def convert(value):
+            return from_scaled(value, scale * row_scale, False)
+
+        def is_point(index):
+            return heat_flows[index] != 0 or rate_changes[index] != 0
+
+        return cascade, convert, is_point
+
+
+def grid_events(streams, default_temp_shift):
+    """
+    Returns the sorted shifted temperatures of the streams' grid, the events
+    of each stream on the grid and whether any number is a float.
+
+    The events of a stream are a sorted list of (index, heat_flow,
+    rate_change, count_change) tuples with exact values: at the index-th
+    temperature, the grand cascade changes by the latent heat_flow, the heat
+    capacity flow rate of the sensible segments above the temperature changes
+    by rate_change, and the number of these segments by count_change.
+    """
+    inexact = False
+    grand_segments = [
+        [
+            s.shift(default_temp_shift).with_inverted_heat_flow().with_low_supply_temp()
+            for s in stream.cold_segments + stream.hot_segments
+        ]
+        for stream in streams
+    ]
+    temps = sorted(
+        {
+            t
+            for segments in grand_segments
+            for s in segments
+            for t in (s.min_temp, s.max_temp)
+        }
+    )
+    inexact |= any(isinstance(t, float) for t in temps)
+    index_of = {t: i for i, t in enumerate(temps)}
+
+    events = []
+    for segments in grand_segments:
+        stream_events = {}
+
+        def add(index, *changes):
+            event = stream_events.setdefault(index, [0, 0, 0])
+            for i, change in enumerate(changes):
+                event[i] += change
+
+        for s in segments:
+            low = index_of[s.min_temp]
+            if s.heat_type == HeatType.LATENT:
+                inexact |= isinstance(s.heat_flow, float)
+                add(low, to_exact(s.heat_flow), 0, 0)
+            elif s.min_temp != s.max_temp:
+                rate = s.heat_capacity_flow_rate
+                inexact |= isinstance(rate, float)
+                add(low, 0, to_exact(rate), 1)
+                add(index_of[s.max_temp], 0, -to_exact(rate), -1)
+        events.append(
+            [(index,) + tuple(event) for index, event in sorted(stream_events.items())]
+        )
+
+    return temps, events, inexact
+
+
+def float_widths(temps):
+    """
+    Returns the widths of the grid intervals as floats, followed by a zero
+    width above the highest temperature.
+    """
+    return [
+        float(to_exact(high) - to_exact(low)) for low, high in zip(temps, temps[1:])
+    ] + [0.0]
+
+
+def scaled_widths(temps):
+    """
+    Returns the widths of the grid intervals, followed by a zero width above
+    the highest temperature, scaled to integers by their common denominator,
+    and the denominator.
+    """
+    widths = [to_exact(high) - to_exact(low) for low, high in zip(temps, temps[1:])]
+    scale = common_denominator(Fraction(w).denominator for w in widths)
+    return [int(w * scale) for w in widths] + [0], scale
+
+
+def grid_cascade(heat_flows, rate_changes, widths, count_changes):
+    """
+    Sweeps over the grid and returns the cumulative heat flows of the grand
+    cascade at the two positions of each temperature. The arguments contain
+    one value per grid temperature: the latent heat flows, the changes of the
+    heat capacity flow rate, the widths of the intervals above and the
+    changes of the number of sensible segments. The heat capacity flow rate
+    is reset to zero where no sensible segment is left, so that rounding
+    errors do not accumulate across gaps of the grid.
+    """
+    cascade = []
+    heat_flow = 0
+    rate = 0
+    count = 0
+    for latent_heat_flow, rate_change, width, count_change in zip(
+        heat_flows, rate_changes, widths, count_changes
+    ):
+        cascade.append(heat_flow)
+        heat_flow += latent_heat_flow
+        cascade.append(heat_flow)
+        count += count_change
+        rate = rate + rate_change if count else 0
+        heat_flow -= rate * width
+
+    return cascade
+
+
+def cascade_targets(temps, cascade, convert, is_point):
+    """
+    Returns the Targets of a grand cascade returned by grid_cascade. convert
+    converts its values back, is_point(index) tells whether the index-th
+    temperature is a point of the cascade, i.e. whether a latent heat flow or
+    a change of the heat capacity flow rate occurs there.
+    """
+    if not temps:
+        return Targets(0, 0, [])
+
+    min_heat_flow = min(cascade)
+    indices = sorted({p // 2 for p, h in enumerate(cascade) if h == min_heat_flow})
+    return Targets(
+        convert(cascade[-1] - min_heat_flow),
+        convert(-min_heat_flow),
+        [temps[index] for index in indices if is_point(index)],
+    )
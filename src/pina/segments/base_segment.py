@@ -4,11 +4,19 @@ import abc
 class BaseSegment(abc.ABC):
     """
     Abstract base class for stream segments
+
+    Segments are immutable. The heat flow and the minimum and maximum
+    temperatures are computed once, when the segment is created.
     """
 
-    def __init__(self, supply_temp, temp_shift):
+    __slots__ = ("_supply_temp", "_temp_shift", "_heat_flow", "_min_temp", "_max_temp")
+
+    def __init__(self, heat_flow, supply_temp, target_temp, temp_shift):
         self._supply_temp = supply_temp
         self._temp_shift = temp_shift
+        self._heat_flow = heat_flow
+        self._min_temp = min(supply_temp, target_temp)
+        self._max_temp = max(supply_temp, target_temp)
 
     @property
     @abc.abstractmethod
@@ -16,9 +24,8 @@ class BaseSegment(abc.ABC):
         pass
 
     @property
-    @abc.abstractmethod
     def heat_flow(self):
-        pass
+        return self._heat_flow
 
     @property
     def supply_temp(self):
@@ -35,11 +42,11 @@ class BaseSegment(abc.ABC):
 
     @property
     def min_temp(self):
-        return min(self.supply_temp, self.target_temp)
+        return self._min_temp
 
     @property
     def max_temp(self):
-        return max(self.supply_temp, self.target_temp)
+        return self._max_temp
 
     @classmethod
     @abc.abstractmethod
@@ -108,6 +115,14 @@ class BaseSegment(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def try_add(self, other, temp_shift):
+        """
+        Like add, but returns None instead of raising a ValueError if the
+        segments cannot be added.
+        """
+        pass
+
     @abc.abstractmethod
     def link(self, other, temp_shift):
         """
@@ -119,7 +134,18 @@ class BaseSegment(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def try_link(self, other, temp_shift):
+        """
+        Like link, but returns None instead of raising a ValueError if the
+        segments cannot be linked.
+        """
+        pass
+
     def __eq__(self, other):
+        if not isinstance(other, BaseSegment):
+            return NotImplemented
+
         equal = self.heat_type == other.heat_type
         equal &= self.heat_flow == other.heat_flow
         equal &= self.supply_temp == other.supply_temp
@@ -127,3 +153,14 @@ class BaseSegment(abc.ABC):
         equal &= self.temp_shift == other.temp_shift
 
         return equal
+
+    def __hash__(self):
+        return hash(
+            (
+                self.heat_type,
+                self._heat_flow,
+                self._supply_temp,
+                self.target_temp,
+                self._temp_shift,
+            )
+        )
@@ -7,18 +7,20 @@ class LatentSegment(BaseSegment):
     Latent segment of a stream in which its temperature does not change.
     """
 
+    __slots__ = ()
+
     def __init__(self, heat_flow, supply_temp, temp_shift=None):
-        super().__init__(supply_temp=supply_temp, temp_shift=temp_shift)
-        self._heat_flow = heat_flow
+        super().__init__(
+            heat_flow=heat_flow,
+            supply_temp=supply_temp,
+            target_temp=supply_temp,
+            temp_shift=temp_shift,
+        )
 
     @property
     def heat_type(self):
         return HeatType.LATENT
 
-    @property
-    def heat_flow(self):
-        return self._heat_flow
-
     @property
     def target_temp(self):
         # Supply and target temperatures are equal in a latent segment
@@ -69,6 +71,10 @@ class LatentSegment(BaseSegment):
         return [self]
 
     def add(self, other, temp_shift=None):
+        result = self.try_add(other, temp_shift)
+        if result is not None:
+            return result
+
         if self.heat_type != other.heat_type:
             raise ValueError(
                 "Heat type mismatch: {} != {}".format(self.heat_type, other.heat_type)
@@ -80,6 +86,10 @@ class LatentSegment(BaseSegment):
                 )
             )
 
+    def try_add(self, other, temp_shift=None):
+        if self.heat_type != other.heat_type or self.supply_temp != other.supply_temp:
+            return None
+
         return LatentSegment(
             self.heat_flow + other.heat_flow, self.supply_temp, temp_shift
         )
@@ -87,6 +97,9 @@ class LatentSegment(BaseSegment):
     def link(self, other, temp_shift=None):
         return self.add(other, temp_shift)
 
+    def try_link(self, other, temp_shift=None):
+        return self.try_add(other, temp_shift)
+
     def __repr__(self):
         return "{}({}, {}, {})".format(
             type(self).__qualname__,
@@ -7,10 +7,17 @@ class SensibleSegment(BaseSegment):
     Sensible segment of a stream in which its temperature changes.
     """
 
+    __slots__ = ("_target_temp", "_heat_capacity_flow_rate")
+
     def __init__(
         self, heat_capacity_flow_rate, supply_temp, target_temp, temp_shift=None
     ):
-        super().__init__(supply_temp=supply_temp, temp_shift=temp_shift)
+        super().__init__(
+            heat_flow=heat_capacity_flow_rate * (supply_temp - target_temp),
+            supply_temp=supply_temp,
+            target_temp=target_temp,
+            temp_shift=temp_shift,
+        )
         self._target_temp = target_temp
         self._heat_capacity_flow_rate = heat_capacity_flow_rate
 
@@ -22,10 +29,6 @@ class SensibleSegment(BaseSegment):
     def heat_capacity_flow_rate(self):
         return self._heat_capacity_flow_rate
 
-    @property
-    def heat_flow(self):
-        return self._heat_capacity_flow_rate * (self._supply_temp - self._target_temp)
-
     @property
     def target_temp(self):
         return self._target_temp
@@ -98,6 +101,10 @@ class SensibleSegment(BaseSegment):
             return [self]
 
     def add(self, other, temp_shift=None):
+        result = self.try_add(other, temp_shift)
+        if result is not None:
+            return result
+
         if self.heat_type != other.heat_type:
             raise ValueError(
                 "Heat type mismatch: {} != {}".format(self.heat_type, other.heat_type)
@@ -108,13 +115,21 @@ class SensibleSegment(BaseSegment):
                     self.min_temp, other.min_temp
                 )
             )
-        elif self.max_temp != other.max_temp:
+        else:
             raise ValueError(
                 "Maximum temperature mismatch: {} != {}".format(
                     self.max_temp, other.max_temp
                 )
             )
 
+    def try_add(self, other, temp_shift=None):
+        if (
+            self.heat_type != other.heat_type
+            or self.min_temp != other.min_temp
+            or self.max_temp != other.max_temp
+        ):
+            return None
+
         if self.supply_temp == other.supply_temp:
             heat_capacity_flow_rate = (
                 self.heat_capacity_flow_rate + other.heat_capacity_flow_rate
@@ -129,6 +144,10 @@ class SensibleSegment(BaseSegment):
         )
 
     def link(self, other, temp_shift=None):
+        result = self.try_link(other, temp_shift)
+        if result is not None:
+            return result
+
         if self.heat_type != other.heat_type:
             raise ValueError(
                 "Heat type mismatch: {} != {}".format(self.heat_type, other.heat_type)
@@ -139,21 +158,6 @@ class SensibleSegment(BaseSegment):
                     self.heat_capacity_flow_rate, other.heat_capacity_flow_rate
                 )
             )
-
-        temp_match = False
-        if self.target_temp == other.supply_temp:
-            temp_match = True
-            supply_temp = self.supply_temp
-            target_temp = other.target_temp
-        elif self.supply_temp == other.target_temp:
-            temp_match = True
-            supply_temp = other.supply_temp
-            target_temp = self.target_temp
-
-        if temp_match:
-            return SensibleSegment(
-                self.heat_capacity_flow_rate, supply_temp, target_temp, temp_shift
-            )
         else:
             raise ValueError(
                 "No matching supply and target temperatures found:\n"
@@ -166,6 +170,26 @@ class SensibleSegment(BaseSegment):
                 )
             )
 
+    def try_link(self, other, temp_shift=None):
+        if (
+            self.heat_type != other.heat_type
+            or self.heat_capacity_flow_rate != other.heat_capacity_flow_rate
+        ):
+            return None
+
+        if self.target_temp == other.supply_temp:
+            supply_temp = self.supply_temp
+            target_temp = other.target_temp
+        elif self.supply_temp == other.target_temp:
+            supply_temp = other.supply_temp
+            target_temp = self.target_temp
+        else:
+            return None
+
+        return SensibleSegment(
+            self.heat_capacity_flow_rate, supply_temp, target_temp, temp_shift
+        )
+
     def _split_ascending(self, temperatures):
         if not temperatures:
             return [self]
@@ -239,10 +263,13 @@ class SensibleSegment(BaseSegment):
         return subsegments
 
     def __eq__(self, other):
-        return (
-            super().__eq__(other)
-            and self.heat_capacity_flow_rate == other.heat_capacity_flow_rate
-        )
+        equal = super().__eq__(other)
+        if equal is NotImplemented:
+            return equal
+
+        return equal and self.heat_capacity_flow_rate == other.heat_capacity_flow_rate
+
+    __hash__ = BaseSegment.__hash__
 
     def __repr__(self):
         return "{}({}, {}, {}, {})".format(
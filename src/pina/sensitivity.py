@@ -0,0 +1,300 @@
+import math
+from collections import namedtuple
+from fractions import Fraction
+
+from pina.enums import HeatType
+from pina.problem_table import grand_points
+from pina.sweep import from_exact, to_exact
+
+Sensitivity = namedtuple("Sensitivity", ["heat_flow", "supply_temp", "target_temp"])
+Sensitivity.__doc__ = """
+Derivatives of an energy target with respect to the heat flow, the supply
+temperature and the target temperature of a stream.
+"""
+
+StreamSensitivity = namedtuple(
+    "StreamSensitivity", ["hot_utility_target", "cold_utility_target"]
+)
+StreamSensitivity.__doc__ = """
+Sensitivities of the hot and cold utility targets to the data of a stream.
+"""
+
+
+def sensitivities(streams, default_temp_shift=None):
+    """
+    Returns a list with the StreamSensitivity of each stream, i.e. the partial
+    derivatives of the utility targets with respect to its heat flow, supply
+    temperature and target temperature. All derivatives are computed from one
+    grand cascade.
+
+    The derivatives are right derivatives, i.e. they describe the change for
+    a small increase. Changing the heat flow scales all segments of a stream
+    by the same factor; for streams without net heat flow, these derivatives
+    are None. Changing the supply or target temperature moves the
+    corresponding end of the stream, while the heat flows of its segments stay
+    the same. If a target jumps, e.g. because a latent heat flow is moved away
+    from another one at the same temperature, its derivative is infinite.
+
+    The utility targets depend on the minimum of the grand cascade. Each
+    derivative is the smallest derivative of the cumulative heat flow among
+    all points at which the minimum is attained (the pinch points), both at
+    fixed temperatures and moving together with the stream's temperatures.
+    """
+    segments, inexact = _grand_segments(streams, default_temp_shift)
+    rows = [(lo, hi, 0, value) for _, lo, hi, value, _ in segments]
+    points = grand_points(rows, 0, inexact)
+    positions = {
+        (temp, side): heat_flow
+        for temp, _, before, after, _ in points
+        for side, heat_flow in enumerate([before[0], after[0]])
+    }
+
+    if not positions:
+        zero = Sensitivity(0, 0, 0)
+        return [StreamSensitivity(zero, zero) for _ in streams]
+
+    # The pinch points are the same for all streams, and so are the sums over
+    # all segments at their temperatures. The derivatives of each stream only
+    # need its own segments in addition.
+    min_heat_flow = min(positions.values())
+    pinches = [p for p, heat_flow in positions.items() if heat_flow == min_heat_flow]
+    sums = _PinchSums(segments, pinches, positions, min_heat_flow)
+    own_segments = [[] for _ in streams]
+    for s in segments:
+        own_segments[s[0][0]].append(s)
+
+    result = []
+    for stream, own in zip(streams, own_segments):
+        derivatives = [_heat_flow_derivative(own, stream, pinches)] + [
+            _temp_derivative(own, end, sums) for end in ["supply", "target"]
+        ]
+        if derivatives[0] is None:
+            hot = [None]
+            cold = [None]
+        else:
+            # The stream's contribution to the net heat flow of the grand
+            # cascade is its inverted heat flow
+            hot = [-1 - derivatives[0]]
+            cold = [-derivatives[0]]
+        hot += [-d for d in derivatives[1:]]
+        cold += [-d for d in derivatives[1:]]
+        result.append(
+            StreamSensitivity(
+                Sensitivity(*(_from_exact(d, inexact) for d in hot)),
+                Sensitivity(*(_from_exact(d, inexact) for d in cold)),
+            )
+        )
+
+    return result
+
+
+def _grand_segments(streams, default_temp_shift):
+    # Returns a list of (key, min_temp, max_temp, value, moves) tuples of the
+    # grand cascade, like problem_table.grand_rows, with exact shifted
+    # temperatures:
+    # * key is a (stream index, segment index) tuple.
+    # * moves maps "supply" and "target" to a (min_temp, max_temp) tuple of
+    #   flags, which tell whether that end of the segment moves with the
+    #   stream's supply or target temperature.
+    segments = []
+    inexact = False
+    for index, stream in enumerate(streams):
+        moving = _moving_ends(stream.segments)
+        for position, s in enumerate(stream.segments):
+            if s.heat_flow == 0:
+                continue
+
+            shifted = s.shift(default_temp_shift)
+            grand = shifted.with_inverted_heat_flow().with_low_supply_temp()
+            if grand.heat_type == HeatType.LATENT:
+                value = grand.heat_flow
+            else:
+                value = grand.heat_capacity_flow_rate
+            inexact |= any(
+                isinstance(x, float) for x in (grand.min_temp, grand.max_temp, value)
+            )
+
+            # The supply end of the segment is its low end, unless its supply
+            # temperature is higher than its target temperature
+            flipped = s.supply_temp > s.target_temp
+            moves = {}
+            for end in ["supply", "target"]:
+                supply_moves, target_moves = moving[end][position]
+                moves[end] = (
+                    (target_moves, supply_moves)
+                    if flipped
+                    else (supply_moves, target_moves)
+                )
+            segments.append(
+                (
+                    (index, position),
+                    to_exact(grand.min_temp),
+                    to_exact(grand.max_temp),
+                    to_exact(value),
+                    moves,
+                )
+            )
+
+    return segments, inexact
+
+
+def _moving_ends(segments):
+    # Maps "supply" and "target" to a list of (supply end, target end) flags
+    # of the segments, which tell whether that end moves with the stream's
+    # supply or target temperature. Latent segments at the end of a stream
+    # move as a whole, together with the adjacent end of the next segment.
+    moving = {}
+    for end, order in [("supply", 1), ("target", -1)]:
+        flags = [[False, False] for _ in segments]
+        indices = list(range(len(segments)))[::order]
+        for i in indices:
+            flags[i][0 if order == 1 else 1] = True
+            if segments[i].heat_type != HeatType.LATENT:
+                break
+            flags[i][1 if order == 1 else 0] = True
+        moving[end] = [tuple(f) for f in flags]
+
+    return moving
+
+
+def _heat_flow_derivative(own_segments, stream, pinches):
+    # The cumulative heat flow at a fixed temperature is linear in the
+    # stream's heat flow
+    if stream.heat_flow == 0:
+        return None
+
+    per_unit = 1 / Fraction(stream.heat_flow)
+    return min(
+        sum(_heat_flow_below(s, temp, side) for s in own_segments) * per_unit
+        for temp, side in pinches
+    )
+
+
+class _PinchSums:
+    # The pinch points of the grand cascade and sums over all segments at
+    # their temperatures, shared by the derivatives of all streams
+
+    def __init__(self, segments, pinches, positions, min_heat_flow):
+        self.pinches = pinches
+        self.positions = positions
+        self.min_heat_flow = min_heat_flow
+        # Maps the temperature of each latent heat flow to the number and the
+        # sum of the latent heat flows at that temperature
+        self.latent = {}
+        for _, lo, hi, value, _ in segments:
+            if lo == hi:
+                count, heat_flow = self.latent.get(lo, (0, 0))
+                self.latent[lo] = (count + 1, heat_flow + value)
+        # Maps the pinch temperatures to the sum of the heat capacity flow
+        # rates of the sensible segments with lo <= temp < hi
+        changes = sorted(
+            (temp, change)
+            for _, lo, hi, value, _ in segments
+            if lo != hi
+            for temp, change in [(lo, value), (hi, -value)]
+        )
+        self.rates = {}
+        rate = 0
+        index = 0
+        for temp in sorted({temp for temp, _ in pinches}):
+            while index < len(changes) and changes[index][0] <= temp:
+                rate += changes[index][1]
+                index += 1
+            self.rates[temp] = rate
+
+
+def _temp_derivative(own_segments, end, sums):
+    moving_temps = set()
+    # Maps the temperature of each moving latent heat flow to the sum of the
+    # latent heat flows which do not move at that temperature
+    fixed_latent = {}
+    for _, lo, hi, value, moves in own_segments:
+        moving_temps.update(t for t, m in zip((lo, hi), moves[end]) if m)
+        if lo == hi and moves[end][0]:
+            fixed_latent[lo] = fixed_latent.get(lo, sums.latent[lo][1]) - value
+
+    candidates = []
+    for temp, side in sums.pinches:
+        candidates.append(_fixed_derivative(own_segments, end, temp, side))
+        if temp in moving_temps:
+            candidates.append(_moving_derivative(own_segments, end, temp, side, sums))
+
+    # Moving latent heat flows away from other latent heat flows at the same
+    # temperature creates a new point of the grand composite curve
+    for temp, heat_flow in fixed_latent.items():
+        separated = sums.positions[(temp, 0)] + heat_flow
+        if separated < sums.min_heat_flow:
+            return -math.inf
+        elif separated == sums.min_heat_flow:
+            candidates.append(
+                _fixed_derivative(own_segments, end, temp, 1, separated=True)
+            )
+
+    # A candidate whose cumulative heat flow jumps can only increase, so it
+    # does not determine the derivative of the minimum
+    finite = [c for c in candidates if c is not None]
+    return min(finite) if finite else 0
+
+
+def _fixed_derivative(own_segments, end, temp, side, separated=False):
+    # Derivative of the cumulative heat flow at the fixed position (temp,
+    # side), or None if it jumps. If separated is True, the moving latent heat
+    # flows at temp are already excluded from the position. Only the stream's
+    # own segments depend on its temperatures.
+    derivative = 0
+    for _, lo, hi, value, moves in own_segments:
+        moves_lo, moves_hi = moves[end]
+        if lo == hi:
+            if moves_lo and temp == lo and side == 1 and not separated:
+                # The latent heat flow moves away from the position
+                return None
+        elif lo < temp <= hi:
+            heat_flow = value * (lo - hi)
+            derivative -= (
+                heat_flow * (moves_lo * (hi - temp) + moves_hi * (temp - lo))
+            ) / (hi - lo) ** 2
+
+    return derivative
+
+
+def _moving_derivative(own_segments, end, temp, side, sums):
+    # Derivative of the cumulative heat flow at the position (temp, side),
+    # which moves together with the stream's temperature, or None if it jumps.
+    # The fixed sensible segments with lo <= temp < hi contribute their heat
+    # capacity flow rates, so the derivative starts from the sum of all rates
+    # and the stream's own segments are corrected.
+    derivative = -sums.rates[temp]
+    fixed_latent_count = sums.latent.get(temp, (0, 0))[0]
+    for _, lo, hi, value, moves in own_segments:
+        moves_lo, moves_hi = moves[end]
+        if lo == hi:
+            if lo == temp and moves_lo:
+                fixed_latent_count -= 1
+        elif lo <= temp < hi:
+            derivative += value
+            if not (moves_lo and temp == lo):
+                heat_flow = value * (lo - hi)
+                derivative += (
+                    heat_flow
+                    * ((1 - moves_lo) * (hi - lo) - (temp - lo) * (moves_hi - moves_lo))
+                ) / (hi - lo) ** 2
+
+    if side == 0 and fixed_latent_count:
+        # The position moves past a latent heat flow
+        return None
+
+    return derivative
+
+
+def _heat_flow_below(segment, temp, side):
+    # Returns the segment's contribution to the cumulative heat flow at the
+    # position (temp, side)
+    _, lo, hi, value, _ = segment
+    if lo == hi:
+        return value if temp > lo or (temp == lo and side == 1) else 0
+
+    return value * (lo - min(max(temp, lo), hi))
+
+
+def _from_exact(value, inexact):
+    return None if value is None else from_exact(value, inexact)
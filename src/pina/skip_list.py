@@ -0,0 +1,110 @@
+import random
+
+_MAX_LEVEL = 32
+_PROMOTION_PROBABILITY = 0.25
+
+
+class SkipList:
+    """
+    Ordered container with expected O(log n) insertion, removal and lookup.
+    The items are sorted by key(item). Keys must be unique.
+    """
+
+    def __init__(self, key, items=(), seed=None):
+        self._key = key
+        self._random = random.Random(seed)
+        # Each node is a list: [item, key, next node on level 0, 1, ...]
+        self._head = [None, None] + [None] * _MAX_LEVEL
+        self._level = 1
+        self._len = 0
+        for item in items:
+            self.insert(item)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        node = self._head[2]
+        while node is not None:
+            yield node[0]
+            node = node[2]
+
+    def insert(self, item):
+        """
+        Inserts item. Raises a ValueError if an item with an equal key is
+        already contained.
+        """
+        key = self._key(item)
+        update = self._predecessors(key)
+        successor = update[0][2]
+        if successor is not None and successor[1] == key:
+            raise ValueError("Duplicate key: {}".format(key))
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                update[i] = self._head
+            self._level = level
+
+        node = [item, key] + [None] * level
+        for i in range(level):
+            node[i + 2] = update[i][i + 2]
+            update[i][i + 2] = node
+
+        self._len += 1
+
+    def remove(self, item):
+        """
+        Removes the item with the same key as item. Raises a ValueError if
+        there is no such item.
+        """
+        key = self._key(item)
+        update = self._predecessors(key)
+        node = update[0][2]
+        if node is None or node[1] != key:
+            raise ValueError("Key not found: {}".format(key))
+
+        for i in range(len(node) - 2):
+            update[i][i + 2] = node[i + 2]
+
+        while self._level > 1 and self._head[self._level + 1] is None:
+            self._level -= 1
+
+        self._len -= 1
+
+    def find_lt(self, key):
+        """
+        Returns the last item whose key is less than key, or None if there is
+        no such item.
+        """
+        node = self._predecessors(key)[0]
+        return None if node is self._head else node[0]
+
+    def iter_from(self, key):
+        """
+        Iterates over all items whose key is greater than or equal to key.
+        """
+        node = self._predecessors(key)[0][2]
+        while node is not None:
+            yield node[0]
+            node = node[2]
+
+    def _predecessors(self, key):
+        # Returns the last node with a smaller key for each level
+        update = [None] * _MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            successor = node[i + 2]
+            while successor is not None and successor[1] < key:
+                node = successor
+                successor = node[i + 2]
+            update[i] = node
+
+        return update
+
+    def _random_level(self):
+        level = 1
+        while level < _MAX_LEVEL and self._random.random() < _PROMOTION_PROBABILITY:
+            level += 1
+
+        return level
@@ -0,0 +1,269 @@
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream_table import StreamTable
+
+# File layout (little-endian):
+# * Header: magic, format version, padding, the number of stream rows, pinch
+#   temperatures and points of each composite curve, the default temperature
+#   shift (NaN for None) and the five targets.
+# * Arrays, each aligned to 8 bytes: the stream columns (heat flows, supply
+#   temperatures, target temperatures, temperature shifts, stream ids), the
+#   pinch temperatures and the heat flows and temperatures of each curve.
+_MAGIC = b"PINA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHH7Q6d")
+
+_CURVES = (
+    "cold_composite_curve",
+    "hot_composite_curve",
+    "shifted_cold_composite_curve",
+    "shifted_hot_composite_curve",
+    "grand_composite_curve",
+)
+_TARGETS = (
+    "heating_demand",
+    "cooling_demand",
+    "hot_utility_target",
+    "cold_utility_target",
+    "heat_recovery_target",
+)
+_STREAM_COLUMNS = (
+    ("heat_flows", "d"),
+    ("supply_temps", "d"),
+    ("target_temps", "d"),
+    ("temp_shifts", "d"),
+    ("stream_ids", "q"),
+)
+
+
+def save_snapshot(analyzer, file):
+    """
+    Saves the streams, composite curves and targets of a PinchAnalyzer to a
+    binary snapshot. `file` is a path or a binary file object. All numbers are
+    stored as 64-bit floats (stream ids as 64-bit integers).
+    """
+    table = StreamTable.from_streams(analyzer.streams)
+    curves = [getattr(analyzer, name) for name in _CURVES]
+    pinch_temps = analyzer.pinch_temps
+    default_temp_shift = analyzer.default_temp_shift
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        0,
+        len(table),
+        len(pinch_temps),
+        *(len(heat_flows) for heat_flows, _ in curves),
+        math.nan if default_temp_shift is None else default_temp_shift,
+        *(getattr(analyzer, name) for name in _TARGETS),
+    )
+    arrays = [getattr(table, name) for name, _ in _STREAM_COLUMNS]
+    arrays.append(array("d", pinch_temps))
+    for heat_flows, temps in curves:
+        arrays += [array("d", heat_flows), array("d", temps)]
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "wb") as f:
+            _write(f, header, arrays)
+    else:
+        _write(file, header, arrays)
+
+
+def load_snapshot(file):
+    """
+    Loads a snapshot saved by save_snapshot. `file` is a path or a binary file
+    object. Files are memory-mapped if possible, and the arrays of the
+    returned Snapshot are memoryviews of the mapped file, so they are only
+    read from disk when they are accessed.
+
+    Raises a ValueError if the file is not a snapshot or has an unsupported
+    version.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            buffer = _map(f)
+    else:
+        buffer = _map(file)
+
+    try:
+        return Snapshot(buffer)
+    except ValueError:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+        raise
+
+
+class Snapshot:
+    """
+    Streams, composite curves and targets of a pinch analysis loaded from a
+    binary snapshot. The arrays are read-only memoryviews. Their buffer stays
+    valid until close is called; afterwards they must not be used.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        with memoryview(buffer) as view:
+            if len(view) < _HEADER.size:
+                raise ValueError("Not a pina snapshot: file too short")
+
+            header = _HEADER.unpack_from(view)
+            magic, version = header[:2]
+            if magic != _MAGIC:
+                raise ValueError(
+                    "Not a pina snapshot: invalid magic {!r}".format(magic)
+                )
+            if version != _VERSION:
+                raise ValueError("Unsupported snapshot version: {}".format(version))
+
+            rows, pinch_count = header[3:5]
+            curve_lengths = header[5:10]
+            default_temp_shift = header[10]
+            self._default_temp_shift = (
+                None if math.isnan(default_temp_shift) else default_temp_shift
+            )
+            self._targets = dict(zip(_TARGETS, header[11:]))
+
+            lengths = [(typecode, rows) for _, typecode in _STREAM_COLUMNS]
+            lengths.append(("d", pinch_count))
+            lengths += [("d", length) for length in curve_lengths for _ in range(2)]
+            if _HEADER.size + 8 * sum(n for _, n in lengths) != len(view):
+                raise ValueError("Invalid snapshot: unexpected file size")
+
+            self._views = []
+            offset = _HEADER.size
+            for typecode, length in lengths:
+                self._views.append(_array_view(view, offset, typecode, length))
+                offset += 8 * length
+
+        self._columns = dict(
+            zip((name for name, _ in _STREAM_COLUMNS), self._views[:5])
+        )
+        self._pinch_temps = self._views[5]
+        self._curves = {
+            name: (self._views[6 + 2 * i], self._views[7 + 2 * i])
+            for i, name in enumerate(_CURVES)
+        }
+
+    @property
+    def default_temp_shift(self):
+        return self._default_temp_shift
+
+    @property
+    def heating_demand(self):
+        return self._targets["heating_demand"]
+
+    @property
+    def cooling_demand(self):
+        return self._targets["cooling_demand"]
+
+    @property
+    def hot_utility_target(self):
+        return self._targets["hot_utility_target"]
+
+    @property
+    def cold_utility_target(self):
+        return self._targets["cold_utility_target"]
+
+    @property
+    def heat_recovery_target(self):
+        return self._targets["heat_recovery_target"]
+
+    @property
+    def pinch_temps(self):
+        return self._pinch_temps
+
+    @property
+    def cold_composite_curve(self):
+        return self._curves["cold_composite_curve"]
+
+    @property
+    def hot_composite_curve(self):
+        return self._curves["hot_composite_curve"]
+
+    @property
+    def shifted_cold_composite_curve(self):
+        return self._curves["shifted_cold_composite_curve"]
+
+    @property
+    def shifted_hot_composite_curve(self):
+        return self._curves["shifted_hot_composite_curve"]
+
+    @property
+    def grand_composite_curve(self):
+        return self._curves["grand_composite_curve"]
+
+    @property
+    def stream_columns(self):
+        """
+        Returns a dict mapping the names of the StreamTable columns
+        (heat_flows, supply_temps, target_temps, temp_shifts, stream_ids) to
+        the stored arrays.
+        """
+        return dict(self._columns)
+
+    def stream_table(self):
+        """
+        Returns a StreamTable of the stored streams. The columns are copied in
+        bulk.
+        """
+        return StreamTable(*(self._columns[name] for name, _ in _STREAM_COLUMNS))
+
+    def analyzer(self):
+        """
+        Returns a new PinchAnalyzer with the stored streams and default
+        temperature shift.
+        """
+        analyzer = PinchAnalyzer(self._default_temp_shift)
+        analyzer.add_streams(self.stream_table())
+        return analyzer
+
+    def close(self):
+        """
+        Releases the arrays and unmaps the file.
+        """
+        for view in self._views:
+            view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _write(f, header, arrays):
+    f.write(header)
+    for values in arrays:
+        if sys.byteorder != "little":
+            values = array(values.typecode, values)
+            values.byteswap()
+        f.write(values.tobytes())
+
+
+def _map(f):
+    # Returns a read-only memory map of the file, or its contents if it cannot
+    # be mapped (e.g. an in-memory file or an empty file)
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        return f.read()
+
+
+def _array_view(view, offset, typecode, length):
+    # Returns the array at offset as a memoryview with the given type code,
+    # without copying it. On big-endian platforms, the array is copied and
+    # byte-swapped instead.
+    data = view[offset : offset + 8 * length]
+    if sys.byteorder == "little":
+        return data.cast(typecode)
+
+    values = array(typecode, data.tobytes())
+    values.byteswap()
+    return memoryview(values).toreadonly()
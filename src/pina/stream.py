@@ -1,8 +1,20 @@
 class Stream:
     """
     A fluid stream carrying heat and consisting of one or multiple segments.
+
+    Streams are immutable. The heat flow and the partitions of the segments
+    into neutral, cold and hot segments are computed once, when the stream is
+    created.
     """
 
+    __slots__ = (
+        "_segments",
+        "_heat_flow",
+        "_neutral_segments",
+        "_cold_segments",
+        "_hot_segments",
+    )
+
     def __init__(self, *segments):
         """
         `segments` must meet the following conditions:
@@ -11,48 +23,53 @@ class Stream:
           adjacent segments.
         If one of those conditions is not met, a ValueError is raised.
         """
+        segments = tuple(segments)
         Stream._check_segments(segments)
         self._segments = segments
+        self._heat_flow = sum(s.heat_flow for s in segments)
+        self._neutral_segments = tuple(s for s in segments if s.heat_flow == 0)
+        self._cold_segments = tuple(s for s in segments if s.heat_flow < 0)
+        self._hot_segments = tuple(s for s in segments if s.heat_flow > 0)
 
     @property
     def heat_flow(self):
-        return sum(s.heat_flow for s in self.segments)
+        return self._heat_flow
 
     @property
     def supply_temp(self):
-        return self.segments[0].supply_temp
+        return self._segments[0].supply_temp
 
     @property
     def target_temp(self):
-        return self.segments[-1].target_temp
+        return self._segments[-1].target_temp
 
     @property
     def segments(self):
         """
-        Returns a list of the stream's segments.
+        Returns a tuple of the stream's segments.
         """
-        return list(self._segments)
+        return self._segments
 
     @property
     def neutral_segments(self):
         """
-        Returns a list of the stream's neutral segments.
+        Returns a tuple of the stream's neutral segments.
         """
-        return [s for s in self.segments if s.heat_flow == 0]
+        return self._neutral_segments
 
     @property
     def cold_segments(self):
         """
-        Returns a list of the stream's cold segments.
+        Returns a tuple of the stream's cold segments.
         """
-        return [s for s in self.segments if s.heat_flow < 0]
+        return self._cold_segments
 
     @property
     def hot_segments(self):
         """
-        Returns a list of the stream's hot segments.
+        Returns a tuple of the stream's hot segments.
         """
-        return [s for s in self.segments if s.heat_flow > 0]
+        return self._hot_segments
 
     @staticmethod
     def _check_segments(segments):
@@ -71,7 +88,13 @@ class Stream:
             prev = current
 
     def __eq__(self, other):
-        return self.segments == other.segments
+        if not isinstance(other, Stream):
+            return NotImplemented
+
+        return self._segments == other._segments
+
+    def __hash__(self):
+        return hash(self._segments)
 
     def __repr__(self):
         return "{}{}".format(type(self).__qualname__, self._segments)
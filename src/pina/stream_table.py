@@ -0,0 +1,241 @@
+import math
+from array import array
+
+from pina.segments.latent_segment import LatentSegment
+from pina.segments.sensible_segment import SensibleSegment
+from pina.stream import Stream
+
+
+class StreamTable:
+    """
+    Columnar table of stream segments. Each row is one segment and the
+    columns are kept in contiguous arrays:
+    * heat_flows, supply_temps and target_temps (float64)
+    * temp_shifts (float64, NaN for segments without individual temperature
+      shift)
+    * stream_ids (int64): consecutive rows with equal stream ids form one
+      segmented stream
+
+    A PinchAnalyzer builds its cascades directly from the columns, so no
+    segment or stream objects are created for the rows. They are only created
+    when the streams property is read.
+    """
+
+    def __init__(
+        self, heat_flows, supply_temps, target_temps, temp_shifts=None, stream_ids=None
+    ):
+        """
+        The columns can be any sequences of numbers, including NumPy arrays
+        and other objects supporting the buffer protocol, which are copied in
+        bulk. Missing temperature shifts may be given as None or NaN. If
+        stream_ids is None, each row is a stream of its own.
+
+        Raises a ValueError if the columns have different lengths or if there
+        is a temperature gap between adjacent segments of a stream.
+        """
+        self._heat_flows = _column(heat_flows, "d")
+        self._supply_temps = _column(supply_temps, "d")
+        self._target_temps = _column(target_temps, "d")
+        rows = len(self._heat_flows)
+        if temp_shifts is None:
+            self._temp_shifts = array("d", [math.nan]) * rows
+        else:
+            self._temp_shifts = _column(temp_shifts, "d")
+        if stream_ids is None:
+            self._stream_ids = array("q", range(rows))
+        else:
+            self._stream_ids = _column(stream_ids, "q")
+
+        lengths = [
+            len(c)
+            for c in (
+                self._heat_flows,
+                self._supply_temps,
+                self._target_temps,
+                self._temp_shifts,
+                self._stream_ids,
+            )
+        ]
+        if len(set(lengths)) != 1:
+            raise ValueError("Columns have different lengths: {}".format(lengths))
+
+        for i in range(1, rows):
+            if (
+                self._stream_ids[i] == self._stream_ids[i - 1]
+                and self._supply_temps[i] != self._target_temps[i - 1]
+            ):
+                raise ValueError(
+                    "Temperature gap between adjacent segments: rows {}, {}".format(
+                        i - 1, i
+                    )
+                )
+
+        self._streams = None
+
+    @classmethod
+    def from_streams(cls, streams):
+        """
+        Creates a table containing the segments of the given streams.
+        """
+        columns = ([], [], [], [], [])
+        for stream_id, stream in enumerate(streams):
+            for s in stream.segments:
+                for column, value in zip(
+                    columns,
+                    (
+                        s.heat_flow,
+                        s.supply_temp,
+                        s.target_temp,
+                        math.nan if s.temp_shift is None else s.temp_shift,
+                        stream_id,
+                    ),
+                ):
+                    column.append(value)
+
+        return cls(*columns)
+
+    @property
+    def heat_flows(self):
+        return self._heat_flows
+
+    @property
+    def supply_temps(self):
+        return self._supply_temps
+
+    @property
+    def target_temps(self):
+        return self._target_temps
+
+    @property
+    def temp_shifts(self):
+        return self._temp_shifts
+
+    @property
+    def stream_ids(self):
+        return self._stream_ids
+
+    @property
+    def streams(self):
+        """
+        Returns a tuple of the table's streams. The stream objects are created
+        on first access.
+        """
+        if self._streams is None:
+            streams = []
+            segments = []
+            for i, row in enumerate(self._rows()):
+                if segments and self._stream_ids[i] != self._stream_ids[i - 1]:
+                    streams.append(Stream(*segments))
+                    segments = []
+                heat_flow, supply_temp, target_temp, temp_shift = row
+                if supply_temp == target_temp:
+                    segments.append(LatentSegment(heat_flow, supply_temp, temp_shift))
+                else:
+                    segments.append(
+                        SensibleSegment.new(
+                            heat_flow, supply_temp, target_temp, temp_shift
+                        )
+                    )
+            if segments:
+                streams.append(Stream(*segments))
+            self._streams = tuple(streams)
+
+        return self._streams
+
+    def missing_temp_shift(self):
+        """
+        Returns True if a segment with heat flow has no temperature shift.
+        """
+        return any(
+            heat_flow != 0 and math.isnan(temp_shift)
+            for heat_flow, temp_shift in zip(self._heat_flows, self._temp_shifts)
+        )
+
+    def cascade_rows(self, heat_sign, shifted, inverted, default_temp_shift=None):
+        """
+        Returns the rows of the segments for sweep_intervals, as a tuple of the
+        sensible and the latent rows. They are the same as the rows of the
+        corresponding segment objects.
+
+        Only cold segments are included if heat_sign is negative, only hot
+        segments if it is positive and both if it is 0. If shifted is True,
+        the temperatures are shifted like BaseSegment.shift does, which keeps
+        the heat capacity flow rate of the unshifted segment. The heat flows
+        are inverted if inverted is True, otherwise they are absolute.
+        """
+        sensible = []
+        latent = []
+        for heat_flow, supply_temp, target_temp, temp_shift in self._rows():
+            if heat_flow == 0 or heat_flow * heat_sign < 0:
+                continue
+
+            is_latent = supply_temp == target_temp
+            if not is_latent:
+                rate = heat_flow / (supply_temp - target_temp)
+            if shifted:
+                shift_by = default_temp_shift if temp_shift is None else temp_shift
+                if shift_by is None:
+                    raise ValueError("No temperature shift given.")
+                if heat_flow > 0:
+                    shift_by *= -1
+                supply_temp += shift_by
+                target_temp += shift_by
+
+            negate = inverted or heat_flow < 0
+            if is_latent:
+                latent.append((supply_temp, -heat_flow if negate else heat_flow))
+                continue
+            elif supply_temp == target_temp:
+                # Rounding the shifted temperatures removed the span, like in
+                # segment_rows
+                continue
+
+            if negate:
+                rate = -rate
+            if supply_temp < target_temp:
+                sensible.append((supply_temp, target_temp, rate))
+            else:
+                sensible.append((target_temp, supply_temp, -rate))
+
+        return sensible, latent
+
+    def _rows(self):
+        # Yields (heat_flow, supply_temp, target_temp, temp_shift) tuples, with
+        # temp_shift None instead of NaN
+        for heat_flow, supply_temp, target_temp, temp_shift in zip(
+            self._heat_flows, self._supply_temps, self._target_temps, self._temp_shifts
+        ):
+            yield (
+                heat_flow,
+                supply_temp,
+                target_temp,
+                None if math.isnan(temp_shift) else temp_shift,
+            )
+
+    def __len__(self):
+        return len(self._heat_flows)
+
+
+def _column(values, typecode):
+    # Copies objects supporting the buffer protocol with a matching item type in
+    # bulk, all other sequences value by value
+    column = array(typecode)
+    try:
+        view = memoryview(values)
+    except TypeError:
+        view = None
+    if (
+        view is not None
+        and view.ndim == 1
+        and view.itemsize == column.itemsize
+        and view.format.lstrip("@=<") in _FORMATS[typecode]
+    ):
+        column.frombytes(view.tobytes())
+    else:
+        column.extend(math.nan if v is None else v for v in values)
+
+    return column
+
+
+# Buffer formats which can be copied to the array type codes in bulk
+_FORMATS = {"d": ("d",), "q": ("q", "l")}
@@ -0,0 +1,197 @@
+from fractions import Fraction
+from functools import reduce
+from math import gcd
+
+from pina.enums import HeatType
+
+
+def segment_rows(segments):
+    """
+    Converts segments to the input of sweep_intervals. Returns a tuple of two
+    lists: the sensible rows and the latent rows.
+    """
+    sensible = []
+    latent = []
+    for s in segments:
+        s = s.with_low_supply_temp()
+        if s.heat_type == HeatType.LATENT:
+            latent.append((s.supply_temp, s.heat_flow))
+        elif s.min_temp != s.max_temp:
+            sensible.append((s.min_temp, s.max_temp, s.heat_capacity_flow_rate))
+
+    return sensible, latent
+
+
+def sweep_intervals(sensible, latent):
+    """
+    Sweeps over the breakpoints of the given heat flows and yields the
+    resulting cascade intervals, sorted by temperature.
+
+    `sensible` is an iterable of (min_temp, max_temp, heat_capacity_flow_rate)
+    tuples. The heat capacity flow rate refers to the segment with low supply
+    temperature, i.e. the segment's heat flow is
+    heat_capacity_flow_rate * (min_temp - max_temp).
+    `latent` is an iterable of (temp, heat_flow) tuples.
+
+    Each yielded interval is a (min_temp, max_temp, value) tuple. Sensible
+    intervals have min_temp < max_temp and their value is the heat capacity
+    flow rate. Latent intervals have min_temp == max_temp and their value is
+    the heat flow. Adjacent sensible intervals with equal heat capacity flow
+    rates are linked and intervals without heat flow are dropped.
+
+    The breakpoints are sorted once, so the sweep runs in O(n log n). The
+    values are accumulated exactly (see scaled_intervals), so with float data
+    each value is the correctly rounded sum of its contributions.
+    """
+    intervals, denominator, inexact = scaled_intervals(sensible, latent)
+    for min_temp, max_temp, value in intervals:
+        yield min_temp, max_temp, from_scaled(value, denominator, inexact)
+
+
+def scaled_intervals(sensible, latent):
+    """
+    Returns the intervals of sweep_intervals with exact values: a tuple of the
+    list of intervals, the common denominator and a flag telling whether any
+    of the values was a float. The value of each interval is an integer, which
+    from_scaled converts back.
+
+    The heat capacity flow rates and heat flows are scaled by their common
+    denominator, so they are summed as integers without picking up rounding
+    errors from segments entering and leaving the sweep. Intervals are linked
+    if their exact values are equal.
+    """
+    sensible = list(sensible)
+    latent = list(latent)
+    rates = [integer_ratio(rate) for _, _, rate in sensible]
+    heat_flows = [integer_ratio(heat_flow) for _, heat_flow in latent]
+    inexact = any(isinstance(rate, float) for _, _, rate in sensible) or any(
+        isinstance(heat_flow, float) for _, heat_flow in latent
+    )
+    denominator = common_denominator(d for _, d in rates + heat_flows)
+
+    # Maps each breakpoint to [change of the scaled heat capacity flow rate,
+    # scaled latent heat flow, change of the number of sensible segments]
+    breakpoints = {}
+
+    def at(temp):
+        entry = breakpoints.get(temp)
+        if entry is None:
+            entry = breakpoints[temp] = [0, 0, 0]
+        return entry
+
+    for (min_temp, max_temp, _), (numerator, d) in zip(sensible, rates):
+        scaled_rate = numerator * (denominator // d)
+        start = at(min_temp)
+        start[0] += scaled_rate
+        start[2] += 1
+        end = at(max_temp)
+        end[0] -= scaled_rate
+        end[2] -= 1
+
+    for (temp, _), (numerator, d) in zip(latent, heat_flows):
+        at(temp)[1] += numerator * (denominator // d)
+
+    intervals = []
+    active = 0
+    rate = 0
+    prev_temp = None
+    for temp in sorted(breakpoints):
+        rate_change, latent_heat_flow, count_change = breakpoints[temp]
+
+        if rate != 0:
+            last = intervals[-1] if intervals else None
+            if (
+                last is not None
+                and last[0] != last[1]
+                and last[1] == prev_temp
+                and last[2] == rate
+            ):
+                # Link with the previous interval
+                intervals[-1] = (last[0], temp, rate)
+            else:
+                intervals.append((prev_temp, temp, rate))
+
+        if latent_heat_flow != 0:
+            intervals.append((temp, temp, latent_heat_flow))
+
+        active += count_change
+        rate = rate + rate_change if active else 0
+        prev_temp = temp
+
+    return intervals, denominator, inexact
+
+
+def to_exact(value):
+    """
+    Converts floats to fractions without loss. All other numbers are returned
+    as they are.
+    """
+    return Fraction(value) if isinstance(value, float) else value
+
+
+def integer_ratio(value):
+    """
+    Returns the numerator and the positive denominator of an int, a fraction
+    or a float, without loss.
+    """
+    if isinstance(value, float):
+        return value.as_integer_ratio()
+
+    return value.numerator, value.denominator
+
+
+def scaled(value, denominator):
+    """
+    Returns an int, a fraction or a float multiplied by denominator as an int.
+    denominator must be a multiple of the value's denominator.
+    """
+    numerator, value_denominator = integer_ratio(value)
+    return numerator * (denominator // value_denominator)
+
+
+def scaled_heat_flow(min_temp, max_temp, value, temp_denominator):
+    """
+    Returns the heat flow of an interval of scaled_intervals, scaled by
+    temp_denominator in addition to the denominator of its value.
+    temp_denominator must be a multiple of the temperatures' denominators.
+    """
+    if min_temp == max_temp:
+        return value * temp_denominator
+
+    return value * (
+        scaled(min_temp, temp_denominator) - scaled(max_temp, temp_denominator)
+    )
+
+
+def common_denominator(denominators):
+    """
+    Returns the least common multiple of the given positive integers, or 1 if
+    there are none.
+    """
+    return reduce(lambda a, b: a * b // gcd(a, b), denominators, 1)
+
+
+def from_exact(value, inexact):
+    """
+    Converts an exactly accumulated value back: to a float if any of its
+    inputs was a float (inexact is True), otherwise to an int if possible.
+    """
+    if inexact:
+        return float(value)
+    elif isinstance(value, Fraction) and value.denominator == 1:
+        return int(value)
+    else:
+        return value
+
+
+def from_scaled(numerator, denominator, inexact):
+    """
+    Converts an integer scaled by denominator back like from_exact. The true
+    division of two ints is correctly rounded.
+    """
+    if inexact:
+        return numerator / denominator
+    elif denominator == 1:
+        return numerator
+    else:
+        return from_exact(Fraction(numerator, denominator), False)
@@ -0,0 +1,397 @@
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+
+from pina.problem_table import Targets, grand_points, grand_rows, targets_at
+from pina.sweep import (
+    common_denominator,
+    from_exact,
+    from_scaled,
+    integer_ratio,
+    scaled,
+    to_exact,
+)
+
+
+class TempShiftTargets:
+    """
+    Energy targets of a set of streams as a function of the default
+    temperature shift, over the range from min_temp_shift to max_temp_shift.
+
+    As long as the order of the shifted temperatures does not change, the
+    cumulative heat flows of the grand cascade are linear in the temperature
+    shift. The range is split at the critical shifts where two shifted
+    temperatures cross. The grand cascade is swept once, and at each critical
+    shift only the points which cross are reordered and updated. The utility
+    targets are the lower envelope of the resulting lines, so they are exact
+    and piecewise linear between the temperature shifts returned by
+    temp_shifts.
+    """
+
+    def __init__(self, streams, min_temp_shift, max_temp_shift):
+        if min_temp_shift > max_temp_shift:
+            raise ValueError(
+                "Invalid temperature shift range: {}, {}".format(
+                    min_temp_shift, max_temp_shift
+                )
+            )
+
+        self._rows, self._inexact = grand_rows(streams)
+        self._inexact |= any(
+            isinstance(t, float) for t in (min_temp_shift, max_temp_shift)
+        )
+        self._min_temp_shift = to_exact(min_temp_shift)
+        self._max_temp_shift = to_exact(max_temp_shift)
+        self._net_heat_flow = sum(
+            value if min_temp == max_temp else value * (min_temp - max_temp)
+            for min_temp, max_temp, _, value in self._rows
+        )
+
+        # Each piece is a (start, stop, min_line, pinch_lines) tuple. min_line
+        # is the minimum cumulative heat flow of the grand cascade and
+        # pinch_lines are the pinch temperatures, as (a, b) tuples of lines
+        # a + b * temp_shift.
+        self._pieces = self._sweep()
+        self._starts = [p[0] for p in self._pieces]
+
+    @property
+    def temp_shifts(self):
+        """
+        Returns a tuple of the temperature shifts at which the slopes of the
+        targets or the pinch temperatures change, including both ends of the
+        range.
+        """
+        return tuple(from_exact(t, self._inexact) for t, _ in self._breakpoints())
+
+    @property
+    def hot_utility_targets(self):
+        """
+        Returns a tuple of the hot utility targets at temp_shifts.
+        """
+        return tuple(
+            from_exact(self._net_heat_flow - _value(min_line, t), self._inexact)
+            for t, min_line in self._breakpoints()
+        )
+
+    @property
+    def cold_utility_targets(self):
+        """
+        Returns a tuple of the cold utility targets at temp_shifts.
+        """
+        return tuple(
+            from_exact(-_value(min_line, t), self._inexact)
+            for t, min_line in self._breakpoints()
+        )
+
+    @property
+    def pinch_temps(self):
+        """
+        Returns a tuple of the lists of pinch temperatures at temp_shifts.
+        Between two adjacent temperature shifts, each pinch temperature changes
+        linearly.
+        """
+        return tuple(
+            targets_at(self._rows, t, self._inexact).pinch_temps
+            for t, _ in self._breakpoints()
+        )
+
+    def at(self, temp_shift):
+        """
+        Returns the Targets for the given temperature shift. Raises a
+        ValueError if it is out of range.
+        """
+        if not self._min_temp_shift <= temp_shift <= self._max_temp_shift:
+            raise ValueError("Temperature shift out of range: {}".format(temp_shift))
+
+        inexact = self._inexact or isinstance(temp_shift, float)
+        temp_shift = to_exact(temp_shift)
+        index = bisect_right(self._starts, temp_shift) - 1
+        start, stop, min_line, pinch_lines = self._pieces[index]
+        if temp_shift in (start, stop):
+            # The pinch temperatures of adjacent pieces may differ
+            return targets_at(self._rows, temp_shift, inexact)
+
+        min_heat_flow = _value(min_line, temp_shift)
+        return Targets(
+            from_exact(self._net_heat_flow - min_heat_flow, inexact),
+            from_exact(-min_heat_flow, inexact),
+            [from_exact(_value(line, temp_shift), inexact) for line in pinch_lines],
+        )
+
+    def _breakpoints(self):
+        # Returns a list of (temp_shift, min_line) tuples at the bounds of the
+        # pieces
+        first = self._pieces[0]
+        return [(first[0], first[2])] + [
+            (stop, min_line)
+            for start, stop, min_line, _ in self._pieces
+            if stop != start
+        ]
+
+    def _sweep(self):
+        # Returns the pieces, sweeping the temperature shift from the lower to
+        # the upper end of the range. The temperatures and the temperature
+        # shift are scaled by the same integer, so the shifted temperatures
+        # and the critical shifts are integers as well.
+        if self._min_temp_shift == self._max_temp_shift:
+            # The points with equal shifted temperatures coincide, so they are
+            # not ordered like above the shift. Only the minimum is needed.
+            temp_shift = self._min_temp_shift
+            points = grand_points(self._rows, temp_shift, self._inexact)
+            min_heat_flow = min(
+                (_value(line, temp_shift) for p in points for line in p[2:4]),
+                default=0,
+            )
+            return [(temp_shift, temp_shift, (min_heat_flow, 0), ())]
+
+        temp_scale = 2 * common_denominator(
+            integer_ratio(t)[1]
+            for t in [self._min_temp_shift, self._max_temp_shift]
+            + [t for row in self._rows for t in row[:2]]
+        )
+        low = scaled(self._min_temp_shift, temp_scale)
+        high = scaled(self._max_temp_shift, temp_scale)
+        cascade = _ShiftedCascade(self._rows, temp_scale, low, self._inexact)
+        crossings = _crossings(cascade.keys, low, high)
+
+        pieces = []
+        min_line = None
+        # The next shift at which a line with a smaller slope crosses min_line,
+        # as a (numerator, denominator) tuple, or None
+        next_change = None
+        bounds = [low] + sorted(crossings) + [high]
+        for start, stop in zip(bounds, bounds[1:]):
+            rescan = min_line is None
+            if start in crossings:
+                added = cascade.cross(start, crossings[start])
+                rescan |= min_line not in cascade.lines
+                # Only the added lines can undercut min_line or cross it first
+                for line in added:
+                    if rescan:
+                        break
+                    if (_at(line, start), line[1]) < (
+                        _at(min_line, start),
+                        min_line[1],
+                    ):
+                        rescan = True
+                    elif line[1] < min_line[1]:
+                        crossing = (line[0] - min_line[0], min_line[1] - line[1])
+                        if next_change is None or _less(crossing, next_change):
+                            next_change = crossing
+            if next_change is not None and not _less((start, 1), next_change):
+                rescan = True
+
+            temp_shift = start
+            while True:
+                if rescan:
+                    min_line, next_change = _min_line(cascade.lines, temp_shift)
+                if next_change is None or not _less(next_change, (stop, 1)):
+                    end = stop
+                else:
+                    end = Fraction(*next_change)
+                pinch_keys = tuple(
+                    sorted(
+                        cascade.lines[min_line][1],
+                        key=lambda key: (_at(key, temp_shift), key[1]),
+                    )
+                )
+                if pieces and pieces[-1][2:] == (min_line, pinch_keys):
+                    pieces[-1] = (pieces[-1][0], end, min_line, pinch_keys)
+                else:
+                    pieces.append((temp_shift, end, min_line, pinch_keys))
+
+                if end == stop:
+                    break
+                temp_shift = end
+                rescan = True
+
+        # Convert the scaled lines back to lines in the temperature shift
+        heat_scale = temp_scale * cascade.value_scale
+        return [
+            (
+                Fraction(start) / temp_scale,
+                Fraction(stop) / temp_scale,
+                (Fraction(line[0], heat_scale), Fraction(line[1], cascade.value_scale)),
+                tuple((Fraction(key[0], temp_scale), key[1]) for key in pinch_keys),
+            )
+            for start, stop, line, pinch_keys in pieces
+        ]
+
+
+class _ShiftedCascade:
+    # The points of the grand cascade for an increasing scaled temperature
+    # shift u. Each point is keyed by its scaled shifted temperature as a
+    # (a, b) line a + b * u, and its cumulative heat flow lines before and
+    # after the latent heat flow at the point are (c, d) lines c + d * u,
+    # scaled by temp_scale and value_scale.
+
+    def __init__(self, rows, temp_scale, start, inexact):
+        self.value_scale = common_denominator(integer_ratio(row[3])[1] for row in rows)
+        self._temp_scale = temp_scale
+        self._inexact = inexact
+        # The rate change and latent heat flow at each point
+        self._changes = {}
+        for min_temp, max_temp, slope, value in rows:
+            value = scaled(value, self.value_scale)
+            low_key = (scaled(min_temp, temp_scale), slope)
+            if min_temp == max_temp:
+                self._changes.setdefault(low_key, [0, 0])[1] += value
+            else:
+                high_key = (scaled(max_temp, temp_scale), slope)
+                self._changes.setdefault(low_key, [0, 0])[0] += value
+                self._changes.setdefault(high_key, [0, 0])[0] -= value
+        self.keys = list(self._changes)
+
+        # The points sorted by their temperature just above start, and their
+        # lines, cumulative rates and whether they are points of the curve
+        self._order = sorted(self.keys, key=lambda key: (_at(key, start), key[1]))
+        self._positions = {key: i for i, key in enumerate(self._order)}
+        self._befores = [None] * len(self._order)
+        self._afters = [None] * len(self._order)
+        self._rates = [None] * len(self._order)
+        self._is_points = [False] * len(self._order)
+        # Maps the lines of all points to their number and the keys of the
+        # points of the curve on them
+        self.lines = {}
+        self._update(0, len(self._order) - 1, set())
+        if not self.lines:
+            # Without streams, the grand cascade is empty
+            self.lines[(0, 0)] = [1, []]
+
+    def cross(self, u, pairs):
+        # Reorders the points whose temperatures cross at u, given as pairs of
+        # keys. They form runs of adjacent points with the same temperature at
+        # u, which are sorted by slope above u. Returns the set of new lines.
+        indices = sorted({self._positions[key] for pair in pairs for key in pair})
+        runs = []
+        for i in indices:
+            if (
+                runs
+                and runs[-1][-1] == i - 1
+                and _at(self._order[i], u) == _at(self._order[i - 1], u)
+            ):
+                runs[-1].append(i)
+            else:
+                runs.append([i])
+
+        added = set()
+        for run in runs:
+            for i in run:
+                self._remove_lines(i)
+            keys = sorted((self._order[i] for i in run), key=lambda key: key[1])
+            for i, key in zip(run, keys):
+                self._order[i] = key
+                self._positions[key] = i
+            self._update(run[0], run[-1], added)
+        return added
+
+    def _update(self, first, last, added):
+        # Computes the lines of the points from first to last, whose previous
+        # lines must have been removed. The lines of the other points do not
+        # depend on the order of these points.
+        if first == 0:
+            heat_flow = (0, 0)
+            rate = 0
+        else:
+            heat_flow = self._afters[first - 1]
+            rate = self._rates[first - 1]
+        for i in range(first, last + 1):
+            key = self._order[i]
+            if i > 0:
+                prev_key = self._order[i - 1]
+                heat_flow = (
+                    heat_flow[0] - rate * (key[0] - prev_key[0]),
+                    heat_flow[1] - rate * (key[1] - prev_key[1]),
+                )
+            rate_change, latent = self._changes[key]
+            self._befores[i] = heat_flow
+            heat_flow = (heat_flow[0] + latent * self._temp_scale, heat_flow[1])
+            self._afters[i] = heat_flow
+            self._is_points[i] = self._rounded(latent) != 0 or self._rounded(
+                rate
+            ) != self._rounded(rate + rate_change)
+            rate += rate_change
+            self._rates[i] = rate
+            self._add_lines(i, added)
+
+    def _rounded(self, value):
+        return from_scaled(value, self.value_scale, self._inexact)
+
+    def _remove_lines(self, i):
+        for line in {self._befores[i], self._afters[i]}:
+            entry = self.lines[line]
+            entry[0] -= 1
+            if self._is_points[i]:
+                entry[1].remove(self._order[i])
+            if entry[0] == 0:
+                del self.lines[line]
+
+    def _add_lines(self, i, added):
+        for line in {self._befores[i], self._afters[i]}:
+            if line not in self.lines:
+                self.lines[line] = [0, []]
+                added.add(line)
+            entry = self.lines[line]
+            entry[0] += 1
+            if self._is_points[i]:
+                entry[1].append(self._order[i])
+
+
+def _crossings(keys, low, high):
+    # Maps the scaled shifts within (low, high) at which the temperatures of
+    # two keys cross to the lists of the pairs of keys
+    temps_by_slope = {}
+    for temp, slope in keys:
+        temps_by_slope.setdefault(slope, []).append(temp)
+    for slope in temps_by_slope:
+        temps_by_slope[slope].sort()
+
+    crossings = {}
+    slopes = sorted(temps_by_slope)
+    for i, low_slope in enumerate(slopes):
+        for high_slope in slopes[i + 1 :]:
+            # The temperatures cross at (temp - other) / slope_diff, which is
+            # an integer as the temperatures are scaled by twice their
+            # common denominator
+            slope_diff = high_slope - low_slope
+            others = temps_by_slope[high_slope]
+            for temp in temps_by_slope[low_slope]:
+                first = bisect_right(others, temp - slope_diff * high)
+                last = bisect_left(others, temp - slope_diff * low)
+                for other in others[first:last]:
+                    crossings.setdefault((temp - other) // slope_diff, []).append(
+                        ((temp, low_slope), (other, high_slope))
+                    )
+
+    return crossings
+
+
+def _min_line(lines, u):
+    # Returns the minimum line at u (or just above u if several lines are
+    # minimal at u), and the next shift at which a line with a smaller slope
+    # crosses it as a (numerator, denominator) tuple, or None
+    numerator, denominator = u.numerator, u.denominator
+    min_line = min(
+        lines, key=lambda line: (line[0] * denominator + line[1] * numerator, line[1])
+    )
+    next_change = None
+    for line in lines:
+        if line[1] < min_line[1]:
+            # The line is above min_line at u, so they cross above u
+            crossing = (line[0] - min_line[0], min_line[1] - line[1])
+            if next_change is None or _less(crossing, next_change):
+                next_change = crossing
+
+    return min_line, next_change
+
+
+def _less(a, b):
+    # Compares two fractions given as (numerator, positive denominator)
+    return a[0] * b[1] < b[0] * a[1]
+
+
+def _at(line, u):
+    return line[0] + line[1] * u
+
+
+def _value(line, temp_shift):
+    return line[0] + line[1] * temp_shift
@@ -0,0 +1,253 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from fractions import Fraction
+from itertools import groupby
+
+from pina.batch import map_analyzers
+from pina.sweep import from_exact, to_exact
+
+SiteTargets = namedtuple(
+    "SiteTargets",
+    [
+        "utility_temps",
+        "generation",
+        "use",
+        "imports",
+        "hot_utility_target",
+        "cold_utility_target",
+        "heat_recovery_target",
+    ],
+)
+SiteTargets.__doc__ = """
+Targets of a total site with steam mains (utility levels). utility_temps
+contains the shifted temperatures of the utility levels in descending order.
+generation, use and imports contain, for each level, the heat which the site
+source profile can generate, the heat which the site sink profile can use and
+the heat which has to be imported after surplus generation has been let down
+from higher levels. The hot utility target includes the imports and the sink
+heat above the highest level, the cold utility target the source heat below
+the lowest level and the surplus generation left over at the lowest level.
+"""
+
+
+class TotalSite:
+    """
+    Total site analysis of multiple plants, each given as a PinchAnalyzer.
+
+    The site source and sink profiles of each plant are taken from its grand
+    composite curve without its heat pockets: the source profile below the
+    (lowest) pinch and the sink profile above the (highest) pinch. The heat
+    flow of the source profile at a shifted temperature is the heat which the
+    plant can deliver at or above that temperature, the heat flow of the sink
+    profile the heat which it can take at or below that temperature.
+
+    The profiles of the plants are built in worker processes. The site
+    profiles are their sums, which are computed in a single pass over the
+    breakpoints of all profiles, merged in sorted order.
+    """
+
+    def __init__(self, plants, workers=None, chunksize=None):
+        """
+        `workers` and `chunksize` are used like in analyze_many. The plants
+        are analyzed with their own temperature shifts and tolerances.
+        """
+        plants = list(plants)
+        profiles = map_analyzers(
+            _plant_profiles,
+            [p.streams for p in plants],
+            [p.default_temp_shift for p in plants],
+            workers,
+            chunksize,
+            [(p.abs_tol, p.rel_tol) for p in plants],
+        )
+        self._inexact = any(inexact for _, _, inexact in profiles)
+        self._source = _sum_profiles([source for source, _, _ in profiles])
+        self._sink = _sum_profiles([sink for _, sink, _ in profiles])
+
+    @property
+    def source_profile(self):
+        """
+        Returns the site source profile as a tuple of the heat flows and the
+        shifted temperatures, ordered by temperature.
+        """
+        return self._curve(self._source)
+
+    @property
+    def sink_profile(self):
+        """
+        Returns the site sink profile as a tuple of the heat flows and the
+        shifted temperatures, ordered by temperature.
+        """
+        return self._curve(self._sink)
+
+    def targets(self, utility_temps):
+        """
+        Returns the SiteTargets for utility levels at the given shifted
+        temperatures. Generation is assigned to the highest possible levels
+        and use to the lowest possible levels. Surplus generation of a level
+        is let down to the levels below it.
+
+        Raises a ValueError if a utility temperature occurs twice.
+        """
+        temps = sorted((to_exact(t) for t in utility_temps), reverse=True)
+        if len(set(temps)) != len(temps):
+            raise ValueError("Duplicate utility temperatures: {}".format(temps))
+
+        inexact = self._inexact or any(isinstance(t, float) for t in utility_temps)
+        # The heat at a level's temperature itself can be delivered to and
+        # taken from the level
+        generation = []
+        for temp in temps:
+            generation.append(_value_at(self._source, temp, 0) - sum(generation))
+        use = []
+        for temp in reversed(temps):
+            use.append(_value_at(self._sink, temp, 1) - sum(use))
+        use.reverse()
+
+        imports = []
+        surplus = 0
+        for generated, used in zip(generation, use):
+            surplus += generated - used
+            imports.append(max(-surplus, 0))
+            surplus = max(surplus, 0)
+
+        sink_total = self._sink[-1][1] if self._sink else 0
+        source_total = self._source[0][1] if self._source else 0
+        hot_utility_target = sink_total - sum(use) + sum(imports)
+        cold_utility_target = source_total - sum(generation) + surplus
+
+        def convert(values):
+            return tuple(from_exact(v, inexact) for v in values)
+
+        return SiteTargets(
+            convert(temps),
+            convert(generation),
+            convert(use),
+            convert(imports),
+            from_exact(hot_utility_target, inexact),
+            from_exact(cold_utility_target, inexact),
+            from_exact(sum(use) - sum(imports), inexact),
+        )
+
+    def _curve(self, points):
+        return (
+            tuple(from_exact(h, self._inexact) for _, h in points),
+            tuple(from_exact(t, self._inexact) for t, _ in points),
+        )
+
+
+def _plant_profiles(analyzer):
+    # Returns the source and sink profiles of a plant as lists of exact
+    # (temp, heat flow) points ordered by temperature, and whether the grand
+    # composite curve contains floats
+    heat_flows, temps = analyzer.grand_composite_curve
+    inexact = any(isinstance(v, float) for v in heat_flows + temps)
+    points = [(to_exact(t), to_exact(h)) for h, t in zip(heat_flows, temps)]
+    if not points:
+        return [], [], inexact
+
+    min_heat_flow = min(h for _, h in points)
+    pinches = [i for i, (_, h) in enumerate(points) if h == min_heat_flow]
+    source = _without_pockets(points[: pinches[0] + 1])
+    sink = _without_pockets(points[pinches[-1] :][::-1])[::-1]
+    return source, sink, inexact
+
+
+def _without_pockets(points):
+    # Walks along the points and returns the points of the curve which never
+    # exceeds the lowest heat flow so far, i.e. the curve with its pockets
+    # replaced by constant heat flows
+    result = [points[0]]
+    lowest = points[0][1]
+    for (temp_0, heat_flow_0), (temp_1, heat_flow_1) in zip(points, points[1:]):
+        if heat_flow_1 >= lowest:
+            continue
+
+        if heat_flow_0 > lowest:
+            # The curve crosses the lowest heat flow so far
+            temp = temp_0 + (lowest - heat_flow_0) * Fraction(temp_1 - temp_0) / (
+                heat_flow_1 - heat_flow_0
+            )
+            result.append((temp, lowest))
+        elif result[-1][0] != temp_0:
+            result.append((temp_0, lowest))
+        result.append((temp_1, heat_flow_1))
+        lowest = heat_flow_1
+    if result[-1][0] != points[-1][0]:
+        result.append((points[-1][0], lowest))
+
+    return result
+
+
+def _sum_profiles(profiles):
+    # Returns the sum of the profiles (lists of (temp, heat flow) points
+    # ordered by temperature, constant outside their temperature ranges). The
+    # changes of the slope and the jumps of each profile are merged by
+    # temperature, so the sum is built in one pass.
+    events = []
+    value = 0
+    for points in profiles:
+        if not points:
+            continue
+
+        value += points[0][1]
+        changes = []
+        slope = 0
+        groups = [
+            (temp, [h for _, h in group])
+            for temp, group in groupby(points, key=lambda p: p[0])
+        ]
+        for i, (temp, heat_flows) in enumerate(groups):
+            if i + 1 < len(groups):
+                next_temp, next_heat_flows = groups[i + 1]
+                new_slope = Fraction(next_heat_flows[0] - heat_flows[-1]) / (
+                    next_temp - temp
+                )
+            else:
+                new_slope = 0
+            changes.append((temp, new_slope - slope, heat_flows[-1] - heat_flows[0]))
+            slope = new_slope
+        events.append(changes)
+
+    result = []
+    slope = 0
+    prev_temp = None
+    for temp, group in groupby(heapq.merge(*events), key=lambda e: e[0]):
+        if prev_temp is not None:
+            value += slope * (temp - prev_temp)
+        result.append((temp, value))
+        for _, slope_change, jump in group:
+            slope += slope_change
+            value += jump
+        if value != result[-1][1]:
+            result.append((temp, value))
+        prev_temp = temp
+
+    return result
+
+
+def _value_at(points, temp, side):
+    # Returns the heat flow of a profile at temp, before (side 0) or after
+    # (side 1) a jump at that temperature
+    if not points:
+        return 0
+
+    temps = [t for t, _ in points]
+    if side == 0:
+        i = bisect_left(temps, temp)
+        if i < len(points) and temps[i] == temp:
+            return points[i][1]
+    else:
+        i = bisect_right(temps, temp)
+        if i > 0 and temps[i - 1] == temp:
+            return points[i - 1][1]
+    if i == 0:
+        return points[0][1]
+    if i == len(points):
+        return points[-1][1]
+
+    (temp_0, heat_flow_0), (temp_1, heat_flow_1) = points[i - 1], points[i]
+    return heat_flow_0 + (heat_flow_1 - heat_flow_0) * Fraction(temp - temp_0) / (
+        temp_1 - temp_0
+    )
@@ -0,0 +1,249 @@
+import random
+
+
+class MinTreap:
+    """
+    Balanced binary search tree (a treap) of (key, value) items, sorted by key.
+    Each node keeps the minimum value of its subtree, and additions and
+    multiplications are applied to whole subtrees lazily. Replacing the items
+    within a range of keys and adding a value to all items above the range
+    take expected O(k + log n) for k items within the range.
+    """
+
+    def __init__(self, items=(), seed=None):
+        """
+        items must be sorted by key, and the keys must be unique.
+        """
+        self._random = random.Random(seed)
+        self._root, self._len = self._build(items)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(_items(self._root))
+
+    def min(self):
+        """
+        Returns the minimum of all values. Raises a ValueError if the tree is
+        empty.
+        """
+        if self._root is None:
+            raise ValueError("min() of empty tree")
+
+        return self._root.min
+
+    def argmins(self):
+        """
+        Returns a sorted list of the keys of all items whose value equals the
+        minimum.
+        """
+        keys = []
+        if self._root is not None:
+            _collect(self._root, self._root.min, keys)
+        return keys
+
+    def last(self):
+        """
+        Returns the item with the highest key, or None if the tree is empty.
+        """
+        node = self._root
+        while node is not None and node.right is not None:
+            _push(node)
+            node = node.right
+
+        return None if node is None else (node.key, node.value)
+
+    def find_lt(self, key):
+        """
+        Returns the last item whose key is less than key, or None if there is
+        no such item.
+        """
+        result = None
+        node = self._root
+        while node is not None:
+            _push(node)
+            if node.key < key:
+                result = node
+                node = node.right
+            else:
+                node = node.left
+
+        return None if result is None else (result.key, result.value)
+
+    def items(self, start, stop):
+        """
+        Returns a list of the items with start <= key <= stop, sorted by key.
+        """
+        left, rest = _split(self._root, start, False)
+        middle, right = _split(rest, stop, True)
+        items = _items(middle)
+        self._root = _merge(_merge(left, middle), right)
+        return items
+
+    def replace(self, start, stop, items, shift=0):
+        """
+        Replaces the items with start <= key <= stop by the given items, which
+        must be sorted by key and lie within the same range, and adds shift to
+        the values of all items with key > stop.
+        """
+        left, rest = _split(self._root, start, False)
+        middle, right = _split(rest, stop, True)
+        _apply(right, 1, shift)
+        self._len -= _count(middle)
+        middle, count = self._build(items)
+        self._len += count
+        self._root = _merge(_merge(left, middle), right)
+
+    def scale(self, factor):
+        """
+        Multiplies all values by a positive factor.
+        """
+        _apply(self._root, factor, 0)
+
+    def _build(self, items):
+        # Returns the root of a subtree of the sorted items and their number,
+        # in O(n): the nodes on the right spine are kept on a stack while the
+        # items are appended with random priorities
+        stack = []
+        count = 0
+        for key, value in items:
+            count += 1
+            node = _Node(key, value, self._random.random())
+            while stack and stack[-1].priority < node.priority:
+                node.left = stack.pop()
+                _update(node.left)
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+
+        root = None
+        while stack:
+            root = stack.pop()
+            _update(root)
+        return root, count
+
+
+class _Node:
+    # value and min include the pending operation of the node itself, factor
+    # and shift are pending for its children: their values are to be
+    # multiplied by factor and increased by shift
+    __slots__ = ("key", "value", "min", "priority", "factor", "shift", "left", "right")
+
+    def __init__(self, key, value, priority):
+        self.key = key
+        self.value = value
+        self.min = value
+        self.priority = priority
+        self.factor = 1
+        self.shift = 0
+        self.left = None
+        self.right = None
+
+
+def _apply(node, factor, shift):
+    # Multiplies the values of the subtree by factor and adds shift to them
+    if node is not None:
+        node.value = node.value * factor + shift
+        node.min = node.min * factor + shift
+        node.factor *= factor
+        node.shift = node.shift * factor + shift
+
+
+def _push(node):
+    # Applies the pending operation of the node to its children
+    if node.factor != 1 or node.shift != 0:
+        _apply(node.left, node.factor, node.shift)
+        _apply(node.right, node.factor, node.shift)
+        node.factor = 1
+        node.shift = 0
+
+
+def _update(node):
+    # Recomputes the minimum of the node from its children, whose pending
+    # operations must have been pushed
+    node.min = node.value
+    if node.left is not None and node.left.min < node.min:
+        node.min = node.left.min
+    if node.right is not None and node.right.min < node.min:
+        node.min = node.right.min
+
+
+def _split(node, key, inclusive):
+    # Splits the subtree into the nodes with lower keys (or lower or equal
+    # keys, if inclusive is True) and the others
+    if node is None:
+        return None, None
+
+    _push(node)
+    if node.key < key or (inclusive and node.key == key):
+        node.right, right = _split(node.right, key, inclusive)
+        _update(node)
+        return node, right
+
+    left, node.left = _split(node.left, key, inclusive)
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    # Merges two subtrees, all keys of left being lower than those of right
+    if left is None:
+        return right
+    if right is None:
+        return left
+
+    if left.priority > right.priority:
+        _push(left)
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+
+    _push(right)
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _items(node):
+    # Returns the items of the subtree, sorted by key
+    items = []
+    stack = []
+    while stack or node is not None:
+        if node is not None:
+            _push(node)
+            stack.append(node)
+            node = node.left
+        else:
+            node = stack.pop()
+            items.append((node.key, node.value))
+            node = node.right
+
+    return items
+
+
+def _count(node):
+    # Returns the number of nodes in the subtree
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is not None:
+            count += 1
+            stack.append(node.left)
+            stack.append(node.right)
+
+    return count
+
+
+def _collect(node, target, keys):
+    # Appends the keys of the subtree's items whose value equals target, which
+    # is not less than the subtree's minimum
+    if node is None or node.min != target:
+        return
+
+    _push(node)
+    _collect(node.left, target, keys)
+    if node.value == target:
+        keys.append(node.key)
+    _collect(node.right, target, keys)
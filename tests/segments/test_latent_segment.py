@@ -199,6 +199,16 @@ class TestLatentSegment(unittest.TestCase):
             LatentSegment(50, 100, 10),
         )
 
+    def test_try_add(self):
+        self.assertIsNone(self.cold_segment.try_add(self.neutral_segment))
+        self.assertIsNone(self.cold_segment.try_add(self.hot_segment))
+        self.assertIsNone(self.cold_segment.try_add(SensibleSegment(2, 100, 100)))
+
+        self.assertEqual(
+            LatentSegment(200, 100, 20).try_add(LatentSegment(-150, 100, 5), 10),
+            LatentSegment(50, 100, 10),
+        )
+
     def test_link(self):
         with self.assertRaises(ValueError):
             self.cold_segment.link(self.neutral_segment)
@@ -222,6 +232,13 @@ class TestLatentSegment(unittest.TestCase):
             LatentSegment(50, 100, 10),
         )
 
+    def test_try_link(self):
+        self.assertIsNone(self.cold_segment.try_link(self.hot_segment))
+        self.assertEqual(
+            LatentSegment(200, 100).try_link(LatentSegment(50, 100)),
+            LatentSegment(250, 100),
+        )
+
     def test_equality_comparison(self):
         self.assertEqual(self.neutral_segment, LatentSegment(0, 80))
         self.assertNotEqual(self.neutral_segment, LatentSegment(0, 80, 10))
@@ -241,6 +258,19 @@ class TestLatentSegment(unittest.TestCase):
         self.assertNotEqual(self.hot_segment, LatentSegment(300, 240))
         self.assertNotEqual(self.cold_segment, SensibleSegment(6, 150, 100))
 
+    def test_hash(self):
+        self.assertEqual(hash(self.cold_segment), hash(LatentSegment(-200, 100)))
+        self.assertEqual(hash(self.hot_segment), hash(LatentSegment(300.0, 150.0)))
+        self.assertEqual(
+            len({self.cold_segment, LatentSegment(-200, 100), self.hot_segment}), 2
+        )
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.cold_segment.heat_flow = 100
+        with self.assertRaises(AttributeError):
+            self.cold_segment.heat_capacity = 100
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -398,6 +398,22 @@ class TestSensibleSegment(unittest.TestCase):
             SensibleSegment(1.5, 100, 180, 10),
         )
 
+    def test_try_add(self):
+        self.assertIsNone(self.cold_segment.try_add(self.neutral_segment))
+        self.assertIsNone(self.cold_segment.try_add(self.hot_segment))
+        self.assertIsNone(self.cold_segment.try_add(LatentSegment(-200, 20)))
+
+        self.assertEqual(
+            SensibleSegment(2, 100, 180).try_add(SensibleSegment(5, 100, 180)),
+            SensibleSegment(7, 100, 180),
+        )
+        self.assertEqual(
+            SensibleSegment(4, 100, 180, 2).try_add(
+                SensibleSegment(2.5, 180, 100, 5), 10
+            ),
+            SensibleSegment(1.5, 100, 180, 10),
+        )
+
     def test_link(self):
         with self.assertRaises(ValueError):
             self.cold_segment.link(self.neutral_segment)
@@ -446,6 +462,25 @@ class TestSensibleSegment(unittest.TestCase):
             SensibleSegment(2, 100, 140, 5),
         )
 
+    def test_try_link(self):
+        self.assertIsNone(self.cold_segment.try_link(self.hot_segment))
+        self.assertIsNone(
+            SensibleSegment(2, 100, 180).try_link(SensibleSegment(5, 180, 240))
+        )
+        self.assertIsNone(
+            SensibleSegment(2, 100, 180).try_link(SensibleSegment(2, 150, 220))
+        )
+        self.assertIsNone(SensibleSegment(2, 100, 180).try_link(LatentSegment(0, 180)))
+
+        self.assertEqual(
+            SensibleSegment(2, 100, 180).try_link(SensibleSegment(2, 180, 220)),
+            SensibleSegment(2, 100, 220),
+        )
+        self.assertEqual(
+            SensibleSegment(2, 180, 140).try_link(SensibleSegment(2, 100, 180), 5),
+            SensibleSegment(2, 100, 140, 5),
+        )
+
     def test_equality_comparison(self):
         self.assertEqual(self.neutral_segment, SensibleSegment(2, 50, 50))
         self.assertNotEqual(self.neutral_segment, SensibleSegment(2, 50, 50, 5))
@@ -479,6 +514,23 @@ class TestSensibleSegment(unittest.TestCase):
         self.assertNotEqual(self.hot_segment, LatentSegment(-180, 150))
         self.assertNotEqual(self.hot_segment, LatentSegment(-180, 50))
 
+    def test_hash(self):
+        self.assertEqual(hash(self.cold_segment), hash(SensibleSegment(1, 20, 200)))
+        self.assertEqual(
+            hash(self.cold_segment), hash(SensibleSegment(1.0, 20.0, 200.0))
+        )
+        self.assertEqual(
+            len({self.cold_segment, SensibleSegment(1, 20, 200), self.hot_segment}), 2
+        )
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.cold_segment.heat_capacity_flow_rate = 2
+        with self.assertRaises(AttributeError):
+            self.cold_segment.min_temp = 0
+        with self.assertRaises(AttributeError):
+            self.cold_segment.heat_capacity = 2
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+
+from pina.batch import AnalysisResult, analyze_many, map_analyzers
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.segments import make_segment
+from pina.segments.sensible_segment import SensibleSegment
+from pina.stream import Stream, make_segmented_stream, make_stream
+
+
+class TestBatch(unittest.TestCase):
+    """
+    Test class for analyze_many
+    """
+
+    def setUp(self):
+        self.problems = [
+            [make_stream(-230, 20, 135), make_stream(330, 170, 60)],
+            [],
+            [
+                make_stream(-230, 20, 135),
+                make_stream(330, 170, 60),
+                make_stream(-240, 80, 140),
+                make_stream(180, 150, 30),
+            ],
+            [
+                make_segmented_stream([-100, 20, 50], [-200, 50, 50], [-30, 50, 60]),
+                make_stream(290, 130, 30, 2.5),
+            ],
+        ] * 3
+
+    def tearDown(self):
+        pass
+
+    def expected_results(self, default_temp_shift):
+        results = []
+        for streams in self.problems:
+            analyzer = PinchAnalyzer(default_temp_shift)
+            analyzer.add_streams(*streams)
+            results.append(
+                AnalysisResult(
+                    analyzer.heating_demand,
+                    analyzer.cooling_demand,
+                    analyzer.hot_utility_target,
+                    analyzer.cold_utility_target,
+                    analyzer.heat_recovery_target,
+                    analyzer.pinch_temps,
+                )
+            )
+        return results
+
+    def test_single_worker(self):
+        self.assertEqual(
+            analyze_many(self.problems, 5, workers=1), self.expected_results(5)
+        )
+
+    def test_process_pool(self):
+        self.assertEqual(
+            analyze_many(self.problems, 5, workers=2, chunksize=2),
+            self.expected_results(5),
+        )
+        self.assertEqual(
+            analyze_many(self.problems, 7.5, workers=3), self.expected_results(7.5)
+        )
+
+    def test_empty(self):
+        self.assertEqual(analyze_many([], 5, workers=2), [])
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            analyze_many(self.problems, 5, workers=0)
+
+    def test_no_temp_shift(self):
+        with self.assertRaises(ValueError):
+            analyze_many(self.problems, workers=2)
+
+    def test_sensible_segment_without_span(self):
+        # A sensible segment with equal temperatures has no heat flow, unlike
+        # a latent segment
+        stream = Stream(
+            SensibleSegment(-2, 20, 80),
+            SensibleSegment(-5, 80, 80),
+            make_segment(-100, 80, 80),
+        )
+        problem = [stream, make_stream(300, 150, 50)]
+        self.problems = [problem]
+        self.assertEqual(
+            analyze_many([problem], 5, workers=1), self.expected_results(5)
+        )
+        self.assertEqual(
+            map_analyzers(lambda a: a.streams, [problem], [5], workers=1), [problem]
+        )
+
+    def test_map_analyzers(self):
+        problems = self.problems[:4]
+        temp_shifts = [5, 2.5, 7.5, 10]
+        expected = []
+        for streams, temp_shift in zip(problems, temp_shifts):
+            analyzer = PinchAnalyzer(temp_shift)
+            analyzer.add_streams(*streams)
+            expected.append(analyzer.pinch_temps)
+        self.assertEqual(
+            map_analyzers(lambda a: a.pinch_temps, problems, temp_shifts, workers=1),
+            expected,
+        )
+        with self.assertRaises(ValueError):
+            map_analyzers(lambda a: a.pinch_temps, problems, temp_shifts[:3])
+
+    def test_map_analyzers_tolerances(self):
+        problems = self.problems[:2]
+        tolerances = [(0.5, 0), (0, 1e-9)]
+        self.assertEqual(
+            map_analyzers(
+                lambda a: (a.abs_tol, a.rel_tol),
+                problems,
+                [5, 5],
+                workers=1,
+                tolerances=tolerances,
+            ),
+            tolerances,
+        )
+        self.assertEqual(
+            map_analyzers(lambda a: (a.abs_tol, a.rel_tol), problems, [5, 5], 1),
+            [(0, 0), (0, 0)],
+        )
+        with self.assertRaises(ValueError):
+            map_analyzers(lambda a: a.pinch_temps, problems, [5, 5], 1, None, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import pickle
+import unittest
+from fractions import Fraction
+
+from pina.composite_curve import CompositeCurve
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream import make_stream
+
+
+class TestCompositeCurve(unittest.TestCase):
+    """
+    Test class for CompositeCurve
+    """
+
+    def setUp(self):
+        self.analyzer = PinchAnalyzer(5)
+        self.analyzer.add_streams(
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_stream(180, 150, 30),
+            make_stream(-50, 100, 100),
+        )
+
+    def tearDown(self):
+        pass
+
+    def test_analyzer_curves(self):
+        curve = self.analyzer.grand_composite_curve
+        self.assertIsInstance(curve, CompositeCurve)
+        self.assertEqual(
+            curve,
+            (
+                (60, 75, 0, 30, 80, 132.5, 130, 70),
+                (25, 55, 85, 105, 105, 140, 145, 165),
+            ),
+        )
+        heat_flows, temps = curve
+        self.assertEqual(curve.heat_flows, heat_flows)
+        self.assertEqual(curve.temps, temps)
+        self.assertIsInstance(self.analyzer.hot_composite_curve, CompositeCurve)
+
+    def test_heat_flow_at(self):
+        curve = self.analyzer.grand_composite_curve
+        self.assertEqual(curve.heat_flow_at(85), 0)
+        self.assertEqual(curve.heat_flow_at(100), 22.5)
+        self.assertEqual(curve.heat_flow_at(105), 30)
+        self.assertEqual(curve.heat_flow_at(105, after=True), 80)
+        self.assertEqual(curve.heat_flow_at(0), 60)
+        self.assertEqual(curve.heat_flow_at(200), 70)
+        self.assertEqual(curve.heat_flow_at([25, 40, 105, 165]), (60, 67.5, 30, 70))
+        self.assertEqual(curve.heat_flow_at(range(85, 106, 10)), (0, 15, 30))
+
+    def test_temp_at(self):
+        curve = self.analyzer.grand_composite_curve
+        # First crossing from the low temperature end
+        self.assertEqual(curve.temp_at(60), 25)
+        self.assertEqual(curve.temp_at(20), 77)
+        self.assertEqual(curve.temp_at(0), 85)
+        self.assertEqual(curve.temp_at(70), 45)
+        self.assertEqual(curve.temp_at(110), 125)
+        # The jump at 105 reaches the heat flow
+        self.assertEqual(curve.temp_at(77), 105)
+        self.assertEqual(curve.temp_at([0, 132.5]), (85, 140))
+        with self.assertRaises(ValueError):
+            curve.temp_at(-1)
+        with self.assertRaises(ValueError):
+            curve.temp_at(140)
+
+        curve = self.analyzer.cold_composite_curve
+        heat_flows, temps = curve
+        self.assertEqual(curve.temp_at(heat_flows), temps)
+
+    def test_exact_interpolation(self):
+        curve = CompositeCurve((0, 10, 10), (Fraction(1, 3), 1, 2))
+        self.assertEqual(curve.heat_flow_at(Fraction(1, 2)), Fraction(5, 2))
+        self.assertEqual(curve.heat_flow_at(Fraction(2, 3)), 5)
+        self.assertIsInstance(curve.heat_flow_at(Fraction(2, 3)), int)
+        self.assertEqual(curve.temp_at(5), Fraction(2, 3))
+        self.assertEqual(curve.temp_at(10), 1)
+        self.assertEqual(curve.heat_flow_at(0.5), 2.5)
+
+    def test_simplified_straight_lines(self):
+        curve = CompositeCurve((0, 10, 20, 20, 50, 50, 60), (0, 1, 2, 2, 5, 7, 8))
+        self.assertEqual(curve.simplified(), ((0, 50, 50, 60), (0, 5, 7, 8)))
+        # Points on a jump
+        curve = CompositeCurve((0, 10, 30, 40), (0, 1, 1, 2))
+        self.assertEqual(curve.simplified(), curve)
+        curve = CompositeCurve((0, 10, 20, 30), (0, 1, 1, 1))
+        self.assertEqual(curve.simplified(), ((0, 10, 30), (0, 1, 1)))
+
+    def test_simplified_errors(self):
+        curve = CompositeCurve((0, 1, 0, 3, 10, 9, 12), (0, 1, 2, 3, 4, 5, 6))
+        self.assertEqual(
+            curve.simplified(1), ((0, 0, 3, 10, 9, 12), (0, 2, 3, 4, 5, 6))
+        )
+        self.assertEqual(curve.simplified(2), ((0, 0, 10, 12), (0, 2, 4, 6)))
+        self.assertEqual(
+            curve.simplified(2, keep_temps=[3]),
+            ((0, 0, 3, 10, 12), (0, 2, 3, 4, 6)),
+        )
+        # Both minimum points are kept
+        self.assertEqual(curve.simplified(100), ((0, 0, 12), (0, 2, 6)))
+        # The line around the point in the first pocket does not reach its
+        # heat flow, so its temperature deviation is infinite
+        self.assertEqual(
+            curve.simplified(temp_error=100), ((0, 1, 0, 12), (0, 1, 2, 6))
+        )
+        self.assertEqual(
+            curve.simplified(temp_error=1), ((0, 1, 0, 10, 9, 12), (0, 1, 2, 4, 5, 6))
+        )
+
+        with self.assertRaises(ValueError):
+            curve.simplified(-1)
+
+    def test_simplified_analyzer_curves(self):
+        for curve in [
+            self.analyzer.hot_composite_curve,
+            self.analyzer.cold_composite_curve,
+            self.analyzer.grand_composite_curve,
+        ]:
+            for error in [0, 5, 50]:
+                simplified = curve.simplified(error)
+                self.assertEqual(simplified.heat_flows[0], curve.heat_flows[0])
+                self.assertEqual(simplified.heat_flows[-1], curve.heat_flows[-1])
+                for heat_flow, temp in zip(*curve):
+                    heat_flows = [
+                        simplified.heat_flow_at(temp),
+                        simplified.heat_flow_at(temp, after=True),
+                    ]
+                    self.assertLessEqual(
+                        max(min(heat_flows) - heat_flow, heat_flow - max(heat_flows)),
+                        error,
+                    )
+
+        curve = self.analyzer.grand_composite_curve
+        self.assertIn(85, curve.simplified(50).temps)
+
+    def test_empty(self):
+        curve = PinchAnalyzer().grand_composite_curve
+        self.assertEqual(curve, ((), ()))
+        self.assertEqual(curve.heat_flow_at(100), 0)
+        self.assertEqual(curve.heat_flow_at([]), ())
+        with self.assertRaises(ValueError):
+            curve.temp_at(0)
+
+    def test_pickle(self):
+        curve = self.analyzer.grand_composite_curve
+        curve.temp_at(0)
+        copy = pickle.loads(pickle.dumps(curve))
+        self.assertIsInstance(copy, CompositeCurve)
+        self.assertEqual(copy, curve)
+        self.assertEqual(copy.temp_at(0), 85)
+
+
+if __name__ == "__main__":
+    unittest.main()
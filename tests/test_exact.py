@@ -0,0 +1,146 @@
+import random
+import unittest
+from fractions import Fraction
+
+from pina.enums import HeatType
+from pina.exact import exact_targets
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.segments.latent_segment import LatentSegment
+from pina.segments.sensible_segment import SensibleSegment
+from pina.stream import Stream, make_segmented_stream, make_stream
+
+
+class TestExactTargets(unittest.TestCase):
+    """
+    Test class for exact_targets
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def assertMatchesAnalyzer(self, streams, temp_shift):
+        # Compares the targets with those of an analyzer for the same streams,
+        # with all numbers converted to fractions
+        analyzer = PinchAnalyzer(to_fraction(temp_shift))
+        analyzer.add_streams(*(exact_stream(s) for s in streams))
+        targets = exact_targets(streams, temp_shift)
+        self.assertEqual(
+            targets,
+            (
+                analyzer.hot_utility_target,
+                analyzer.cold_utility_target,
+                analyzer.pinch_temps,
+            ),
+        )
+        for value in [targets.hot_utility_target, targets.cold_utility_target]:
+            self.assertIsInstance(value, (int, Fraction))
+
+    def test_empty(self):
+        self.assertEqual(exact_targets([]), (0, 0, []))
+        self.assertEqual(exact_targets([make_stream(0, 20, 100)], 5), (0, 0, []))
+
+    def test_4_stream_example(self):
+        streams = [
+            make_stream(Fraction(-230), 20, 135),
+            make_stream(Fraction(330), 170, 60),
+            make_stream(Fraction(-240), 80, 140),
+            make_stream(Fraction(180), 150, 30),
+        ]
+        self.assertEqual(exact_targets(streams, 5), (20, 60, [85]))
+        self.assertMatchesAnalyzer(streams, 5)
+
+    def test_float_data(self):
+        # The results are exact for the floats as they are stored
+        streams = [
+            make_stream(-0.3, 0.1, 0.4),
+            make_stream(-1.1, 0.4, 1.4),
+            make_stream(2.2, 1.1 + 0.2, 0.1 + 0.2),
+            make_segmented_stream([0.7, 1.2, 1.2], [0.5, 1.2, 0.2, 0.05]),
+        ]
+        targets = exact_targets(streams, 0.1)
+        self.assertIsInstance(targets.hot_utility_target, Fraction)
+        self.assertMatchesAnalyzer(streams, 0.1)
+
+        analyzer = PinchAnalyzer(0.1)
+        analyzer.add_streams(*streams)
+        self.assertAlmostEqual(
+            float(targets.hot_utility_target), analyzer.hot_utility_target
+        )
+        self.assertAlmostEqual(
+            float(targets.cold_utility_target), analyzer.cold_utility_target
+        )
+
+    def test_random(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            data = []
+            for _ in range(rng.randint(1, 10)):
+                supply_temp = rng.choice([0.1, 0.5, 1, 0.3]) * rng.randint(0, 40)
+                target_temp = rng.choice([0.1, 0.5, 1, 0.7]) * rng.randint(0, 40)
+                heat_flow = rng.choice([-1, 1]) * rng.randint(1, 50) * 0.25
+                segment = [heat_flow, supply_temp, target_temp]
+                if rng.random() < 0.2:
+                    segment.append(rng.choice([0.5, 2]))
+                data.append(segment)
+            streams = [make_segmented_stream(d) for d in data]
+            self.assertMatchesAnalyzer(streams, rng.choice([0, 0.1, 1, 2.5]))
+
+    def test_close_temperatures(self):
+        # The shifted temperatures of the latent segments round to the same
+        # float, which hides the pocket between them from the float pre-pass
+        tiny = Fraction(1, 10**30)
+        streams = [
+            make_stream(100, Fraction(50), Fraction(50)),
+            make_stream(-100, 50 + tiny, 50 + tiny),
+            make_stream(Fraction(-10), 0, 100),
+        ]
+        self.assertEqual(exact_targets(streams, 0), (105, 95, [50]))
+        self.assertMatchesAnalyzer(streams, 0)
+
+        streams = [
+            make_stream(Fraction(-10), 0, 50),
+            make_stream(Fraction(-10), 50 + tiny, 100),
+        ]
+        self.assertEqual(exact_targets(streams, 0), (20, 0, [0]))
+        self.assertMatchesAnalyzer(streams, 0)
+
+    def test_no_temp_shift(self):
+        with self.assertRaises(ValueError):
+            exact_targets([make_stream(-40, 100, 100, 10), make_stream(40, 0, 10)])
+        self.assertEqual(
+            exact_targets([make_stream(-40, 100, 100, 10), make_stream(0, 0, 10)]),
+            (40, 0, [110]),
+        )
+
+
+def to_fraction(value):
+    return None if value is None else Fraction(value)
+
+
+def exact_stream(stream):
+    # Returns the stream with all numbers converted to fractions
+    segments = []
+    for s in stream.segments:
+        if s.heat_type == HeatType.LATENT:
+            segment = LatentSegment(
+                Fraction(s.heat_flow),
+                Fraction(s.supply_temp),
+                to_fraction(s.temp_shift),
+            )
+        else:
+            segment = SensibleSegment(
+                Fraction(s.heat_capacity_flow_rate),
+                Fraction(s.supply_temp),
+                Fraction(s.target_temp),
+                to_fraction(s.temp_shift),
+            )
+        segments.append(segment)
+
+    return Stream(*segments)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
+import random
 import unittest
+from fractions import Fraction
 
+from pina.enums import HeatType
 from pina.heat_cascade import HeatCascade
 from pina.segments import make_segment
 
@@ -19,8 +22,8 @@ class TestHeatCascade(unittest.TestCase):
         cascade = HeatCascade()
         self.assertEqual(cascade.intervals, [])
         self.assertEqual(cascade.net_heat_flow(), 0)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([], []))
-        self.assertEqual(cascade.cumulative_heat_flow(-100), ([], []))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((), ()))
+        self.assertEqual(cascade.cumulative_heat_flow(-100), ((), ()))
 
     def test_neutral_sensible_segment(self):
         neutral_segment = make_segment(0, 80, 120)
@@ -28,8 +31,8 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(neutral_segment)
         self.assertEqual(cascade.intervals, [])
         self.assertEqual(cascade.net_heat_flow(), 0)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([], []))
-        self.assertEqual(cascade.cumulative_heat_flow(-100), ([], []))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((), ()))
+        self.assertEqual(cascade.cumulative_heat_flow(-100), ((), ()))
 
     def test_cold_sensible_segment(self):
         cold_segment = make_segment(-180, 20, 200)
@@ -37,8 +40,8 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(cold_segment)
         self.assertEqual(cascade.intervals, [cold_segment])
         self.assertEqual(cascade.net_heat_flow(), -180)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, -180], [20, 200]))
-        self.assertEqual(cascade.cumulative_heat_flow(50), ([50, -130], [20, 200]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, -180), (20, 200)))
+        self.assertEqual(cascade.cumulative_heat_flow(50), ((50, -130), (20, 200)))
 
     def test_hot_sensible_segment(self):
         hot_segment = make_segment(180, 150, 50)
@@ -46,9 +49,9 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(hot_segment)
         self.assertEqual(cascade.intervals, [make_segment(180, 50, 150)])
         self.assertEqual(cascade.net_heat_flow(), 180)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, 180], [50, 150]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, 180), (50, 150)))
         self.assertEqual(cascade.net_heat_flow(), 180)
-        self.assertEqual(cascade.cumulative_heat_flow(-180), ([-180, 0], [50, 150]))
+        self.assertEqual(cascade.cumulative_heat_flow(-180), ((-180, 0), (50, 150)))
 
     def test_neutral_latent_segment(self):
         neutral_segment = make_segment(0, 80, 80)
@@ -56,8 +59,8 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(neutral_segment)
         self.assertEqual(cascade.intervals, [])
         self.assertEqual(cascade.net_heat_flow(), 0)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([], []))
-        self.assertEqual(cascade.cumulative_heat_flow(-100), ([], []))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((), ()))
+        self.assertEqual(cascade.cumulative_heat_flow(-100), ((), ()))
 
     def test_cold_latent_segment(self):
         cold_segment = make_segment(-200, 100, 100)
@@ -65,8 +68,8 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(cold_segment)
         self.assertEqual(cascade.intervals, [cold_segment])
         self.assertEqual(cascade.net_heat_flow(), -200)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, -200], [100, 100]))
-        self.assertEqual(cascade.cumulative_heat_flow(-50), ([-50, -250], [100, 100]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, -200), (100, 100)))
+        self.assertEqual(cascade.cumulative_heat_flow(-50), ((-50, -250), (100, 100)))
 
     def test_hot_latent_segment(self):
         hot_segment = make_segment(300, 150, 150)
@@ -74,8 +77,8 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(hot_segment)
         self.assertEqual(cascade.intervals, [hot_segment])
         self.assertEqual(cascade.net_heat_flow(), 300)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, 300], [150, 150]))
-        self.assertEqual(cascade.cumulative_heat_flow(100), ([100, 400], [150, 150]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, 300), (150, 150)))
+        self.assertEqual(cascade.cumulative_heat_flow(100), ((100, 400), (150, 150)))
 
     def test_touching_segments(self):
         cold_segments = [make_segment(-60, 20, 80), make_segment(-80, 80, 120)]
@@ -84,7 +87,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(cold_cascade.intervals, cold_segments)
         self.assertEqual(cold_cascade.net_heat_flow(), -140)
         self.assertEqual(
-            cold_cascade.cumulative_heat_flow(), ([0, -60, -140], [20, 80, 120])
+            cold_cascade.cumulative_heat_flow(), ((0, -60, -140), (20, 80, 120))
         )
 
         hot_segments = [make_segment(80, 120, 80), make_segment(60, 80, 20)]
@@ -95,7 +98,7 @@ class TestHeatCascade(unittest.TestCase):
         )
         self.assertEqual(hot_cascade.net_heat_flow(), 140)
         self.assertEqual(
-            hot_cascade.cumulative_heat_flow(), ([0, 60, 140], [20, 80, 120])
+            hot_cascade.cumulative_heat_flow(), ((0, 60, 140), (20, 80, 120))
         )
 
     def test_detached_segments(self):
@@ -105,7 +108,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(cascade.intervals, detached_segments)
         self.assertEqual(cascade.net_heat_flow(), -110)
         self.assertEqual(
-            cascade.cumulative_heat_flow(), ([0, -30, -30, -110], [20, 50, 80, 120])
+            cascade.cumulative_heat_flow(), ((0, -30, -30, -110), (20, 50, 80, 120))
         )
 
     def test_overlapping_cold_segments(self):
@@ -120,7 +123,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(cascade.intervals, expected_intervals)
         self.assertEqual(cascade.net_heat_flow(), -185)
         self.assertEqual(
-            cascade.cumulative_heat_flow(), ([0, -40, -115, -185], [20, 60, 85, 120])
+            cascade.cumulative_heat_flow(), ((0, -40, -115, -185), (20, 60, 85, 120))
         )
 
     def test_overlapping_hot_segments(self):
@@ -135,7 +138,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(cascade.intervals, expected_intervals)
         self.assertEqual(cascade.net_heat_flow(), 190)
         self.assertEqual(
-            cascade.cumulative_heat_flow(), ([0, 80, 155, 190], [20, 60, 85, 120])
+            cascade.cumulative_heat_flow(), ((0, 80, 155, 190), (20, 60, 85, 120))
         )
 
     def test_link_cold_sensible_segments(self):
@@ -144,7 +147,7 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(*cold_segments)
         self.assertEqual(cascade.intervals, [make_segment(-200, 20, 120)])
         self.assertEqual(cascade.net_heat_flow(), -200)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, -200], [20, 120]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, -200), (20, 120)))
 
     def test_link_hot_sensible_segments(self):
         hot_segments = [make_segment(80, 120, 80), make_segment(120, 80, 20)]
@@ -152,7 +155,7 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(*hot_segments)
         self.assertEqual(cascade.intervals, [make_segment(200, 20, 120)])
         self.assertEqual(cascade.net_heat_flow(), 200)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, 200], [20, 120]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, 200), (20, 120)))
 
     def test_link_latent_segments(self):
         latent_segments = [
@@ -165,7 +168,7 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(*latent_segments)
         self.assertEqual(cascade.intervals, expected_intervals)
         self.assertEqual(cascade.net_heat_flow(), -100)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([0, -100], [100, 100]))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, -100), (100, 100)))
 
     def test_detached_latent_segments(self):
         latent_segments = [make_segment(-200, 100, 100), make_segment(-150, 200, 200)]
@@ -175,7 +178,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(cascade.net_heat_flow(), -350)
         self.assertEqual(
             cascade.cumulative_heat_flow(),
-            ([0, -200, -200, -350], [100, 100, 200, 200]),
+            ((0, -200, -200, -350), (100, 100, 200, 200)),
         )
 
     def test_add_sensible_then_latent_segment(self):
@@ -192,7 +195,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(sensible_then_latent.net_heat_flow(), -280)
         self.assertEqual(
             sensible_then_latent.cumulative_heat_flow(),
-            ([0, -40, -240, -280], [80, 100, 100, 120]),
+            ((0, -40, -240, -280), (80, 100, 100, 120)),
         )
 
     def test_add_latent_then_sensible_segment(self):
@@ -209,7 +212,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(latent_then_sensible.net_heat_flow(), -280)
         self.assertEqual(
             latent_then_sensible.cumulative_heat_flow(),
-            ([0, -40, -240, -280], [80, 100, 100, 120]),
+            ((0, -40, -240, -280), (80, 100, 100, 120)),
         )
 
     def test_mixed_sensible_segments(self):
@@ -228,7 +231,7 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(cascade.intervals, expected_intervals)
         self.assertEqual(cascade.net_heat_flow(), 60)
         self.assertEqual(
-            cascade.cumulative_heat_flow(), ([0, 80, 80, 95, 60], [20, 60, 70, 85, 120])
+            cascade.cumulative_heat_flow(), ((0, 80, 80, 95, 60), (20, 60, 70, 85, 120))
         )
 
     def test_neutralized_heat_flow(self):
@@ -237,7 +240,7 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(*neutralizing_segments)
         self.assertEqual(cascade.intervals, [])
         self.assertEqual(cascade.net_heat_flow(), 0)
-        self.assertEqual(cascade.cumulative_heat_flow(), ([], []))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((), ()))
 
     def test_add_cascades(self):
         cold_cascade = HeatCascade()
@@ -264,13 +267,221 @@ class TestHeatCascade(unittest.TestCase):
         self.assertEqual(mixed_cascade.net_heat_flow(), 40)
         self.assertEqual(
             mixed_cascade.cumulative_heat_flow(),
-            ([0, -15, 60, -22.5, -20, 40], [25, 55, 85, 140, 145, 165]),
+            ((0, -15, 60, -22.5, -20, 40), (25, 55, 85, 140, 145, 165)),
         )
         self.assertEqual(
             mixed_cascade.cumulative_heat_flow(22.5),
-            ([22.5, 7.5, 82.5, 0, 2.5, 62.5], [25, 55, 85, 140, 145, 165]),
+            ((22.5, 7.5, 82.5, 0, 2.5, 62.5), (25, 55, 85, 140, 145, 165)),
         )
 
+    def test_from_segments(self):
+        segment_lists = [
+            [],
+            [make_segment(0, 80, 120)],
+            [make_segment(-180, 20, 200, 5)],
+            [make_segment(180, 150, 50)],
+            [make_segment(-200, 100, 100, 10)],
+            [make_segment(-30, 20, 50), make_segment(-80, 80, 120)],
+            [make_segment(-65, 20, 85), make_segment(-120, 60, 120)],
+            [make_segment(60, 120, 60), make_segment(130, 85, 20)],
+            [make_segment(-120, 20, 80), make_segment(-80, 80, 120)],
+            [
+                make_segment(-200, 100, 100),
+                make_segment(-150, 100, 100),
+                make_segment(250, 100, 100),
+            ],
+            [make_segment(-80, 80, 120, 5), make_segment(-200, 100, 100, 5)],
+            [
+                make_segment(-60, 60, 120),
+                make_segment(-10, 60, 70),
+                make_segment(130, 85, 20),
+            ],
+            [make_segment(-60, 60, 120), make_segment(60, 120, 60)],
+            [
+                make_segment(-230, 25, 140),
+                make_segment(-240, 85, 145),
+                make_segment(330, 165, 55),
+                make_segment(180, 145, 25),
+            ],
+        ]
+
+        for segments in segment_lists:
+            incremental = HeatCascade()
+            incremental.add_segments(*segments)
+            bulk = HeatCascade.from_segments(*segments)
+            self.assertEqual(bulk.intervals, incremental.intervals)
+            self.assertEqual(
+                bulk.cumulative_heat_flow(), incremental.cumulative_heat_flow()
+            )
+
+    def test_from_segments_random(self):
+        rng = random.Random(42)
+        for _ in range(50):
+            segments = []
+            for _ in range(rng.randint(1, 30)):
+                supply_temp = rng.randint(0, 40) * 5
+                target_temp = rng.randint(0, 40) * 5
+                heat_capacity_flow_rate = rng.randint(-8, 8) / 4
+                if supply_temp == target_temp:
+                    heat_flow = heat_capacity_flow_rate * 100
+                else:
+                    heat_flow = heat_capacity_flow_rate * (supply_temp - target_temp)
+                segments.append(make_segment(heat_flow, supply_temp, target_temp))
+
+            incremental = HeatCascade()
+            incremental.add_segments(*segments)
+            bulk = HeatCascade.from_segments(*segments)
+            self.assertEqual(bulk.intervals, incremental.intervals)
+            self.assertEqual(
+                bulk.cumulative_heat_flow(), incremental.cumulative_heat_flow()
+            )
+
+    def test_from_segments_random_floats(self):
+        # The values are the correctly rounded sums of the segments' values,
+        # in both cases
+        rng = random.Random(3)
+        for _ in range(100):
+            segments = _random_float_segments(rng, rng.randint(1, 30))
+            incremental = HeatCascade()
+            incremental.add_segments(*segments)
+            bulk = HeatCascade.from_segments(*segments)
+            self.assertEqual(bulk.intervals, incremental.intervals)
+            for interval in bulk.intervals:
+                contributions = [
+                    s.with_low_supply_temp()
+                    for s in segments
+                    if s.heat_type == interval.heat_type
+                    and s.min_temp <= interval.min_temp
+                    and interval.max_temp <= s.max_temp
+                ]
+                if interval.heat_type == HeatType.LATENT:
+                    exact = sum(Fraction(s.heat_flow) for s in contributions)
+                    self.assertEqual(interval.heat_flow, float(exact))
+                else:
+                    exact = sum(
+                        Fraction(s.heat_capacity_flow_rate) for s in contributions
+                    )
+                    self.assertEqual(interval.heat_capacity_flow_rate, float(exact))
+
+    def test_remove_random_floats(self):
+        rng = random.Random(5)
+        for _ in range(50):
+            segments = _random_float_segments(rng, 30)
+            cascade = HeatCascade.from_segments(*segments[:15])
+            intervals = cascade.intervals
+            curve = cascade.cumulative_heat_flow()
+            cascade.add_segments(*segments[15:])
+            cascade.remove_segments(*reversed(segments[15:]))
+            self.assertEqual(cascade.intervals, intervals)
+            self.assertEqual(cascade.cumulative_heat_flow(), curve)
+
+            cascade = HeatCascade()
+            cascade.add_segments(*segments)
+            cascade.remove_segments(*segments[::2])
+            self.assertEqual(cascade, HeatCascade.from_segments(*segments[1::2]))
+
+    def test_online_insertion(self):
+        rng = random.Random(7)
+        segments = []
+        for _ in range(300):
+            supply_temp = rng.randint(0, 100)
+            target_temp = rng.randint(0, 100)
+            heat_flow = rng.randint(-8, 8) / 4 * (supply_temp - target_temp or 1)
+            segments.append(make_segment(heat_flow, supply_temp, target_temp))
+
+        cascade = HeatCascade()
+        for s in segments:
+            cascade.add_segments(s)
+        self.assertEqual(cascade, HeatCascade.from_segments(*segments))
+
+    def test_tolerance(self):
+        # Rounding errors of float data make the heat capacity flow rates and
+        # breakpoints differ slightly
+        segments = [make_segment(-0.3, 0.1, 0.4), make_segment(-1, 0.4, 1.4)]
+        cascade = HeatCascade()
+        cascade.add_segments(*segments)
+        self.assertEqual(len(cascade.intervals), 2)
+        cascade = HeatCascade(rel_tol=1e-9)
+        cascade.add_segments(*segments)
+        self.assertEqual(len(cascade.intervals), 1)
+        self.assertAlmostEqual(cascade.net_heat_flow(), -1.3)
+        self.assertEqual(cascade, HeatCascade.from_segments(*segments, rel_tol=1e-9))
+
+        segments = [make_segment(-1, 0.1 + 0.2, 1.3), make_segment(-2, 0.3, 1.3)]
+        self.assertEqual(len(HeatCascade.from_segments(*segments).intervals), 2)
+        cascade = HeatCascade.from_segments(*segments, abs_tol=1e-9)
+        self.assertEqual(len(cascade.intervals), 1)
+        self.assertEqual(cascade.intervals[0].min_temp, 0.3)
+        self.assertAlmostEqual(cascade.net_heat_flow(), -3)
+
+        cascade = HeatCascade(abs_tol=1e-9)
+        for s in segments:
+            cascade.add_segments(s)
+        self.assertEqual(cascade, HeatCascade.from_segments(*segments, abs_tol=1e-9))
+        for s in segments:
+            cascade.remove_segments(s)
+        self.assertEqual(cascade.intervals, [])
+
+        with self.assertRaises(ValueError):
+            HeatCascade(abs_tol=-1)
+
+    def test_tolerance_window_edges(self):
+        # Snapping the new interval at 9.995 stretches the interval above it,
+        # which starts beyond the segment's temperatures
+        segments = [make_segment(-10, 0, 10), make_segment(-20, 10, 20)]
+        segment = make_segment(-4.995, 5, 9.995)
+        cascade = HeatCascade(abs_tol=0.01)
+        cascade.add_segments(*segments)
+        rows = cascade.scaled_rows()
+        denominator = cascade.denominator
+        removed, inserted = cascade.add_segment(segment)
+        self.assertEqual(
+            cascade, HeatCascade.from_segments(*segments, segment, abs_tol=0.01)
+        )
+        self.assertEqual([i.min_temp for i in cascade.intervals], [0, 5])
+        factor = cascade.denominator // denominator
+        self.assertEqual(removed, [(a, b, v * factor) for a, b, v in rows])
+        self.assertEqual(inserted, cascade.scaled_rows())
+
+    def test_curve_positions(self):
+        cascade = HeatCascade()
+        cascade.add_segments(
+            make_segment(-80, 80, 120),
+            make_segment(-200, 100, 100),
+            make_segment(-50, 150, 200),
+        )
+        self.assertEqual(cascade.curve_positions(50), ())
+        self.assertEqual(cascade.curve_positions(80), (0,))
+        self.assertEqual(cascade.curve_positions(90), ())
+        self.assertEqual(cascade.curve_positions(100), (0, 1))
+        self.assertEqual(cascade.curve_positions(120), (0,))
+        self.assertEqual(cascade.curve_positions(130), ())
+        self.assertEqual(cascade.curve_positions(150), (0,))
+        self.assertEqual(cascade.curve_positions(200), (0,))
+
+    def test_cached_results(self):
+        cascade = HeatCascade()
+        cascade.add_segments(make_segment(-80, 80, 120))
+        curve = cascade.cumulative_heat_flow()
+        self.assertIs(cascade.cumulative_heat_flow(), curve)
+        self.assertEqual(cascade.net_heat_flow(), -80)
+
+        cascade.add_segments(make_segment(-200, 100, 100))
+        self.assertEqual(
+            cascade.cumulative_heat_flow(),
+            ((0, -40, -240, -280), (80, 100, 100, 120)),
+        )
+        self.assertEqual(cascade.cumulative_heat_flow(10)[0], (10, -30, -230, -270))
+        self.assertEqual(cascade.net_heat_flow(), -280)
+
+        cascade.remove_segments(make_segment(-80, 80, 120))
+        self.assertEqual(cascade.cumulative_heat_flow(), ((0, -200), (100, 100)))
+        self.assertEqual(cascade.net_heat_flow(), -200)
+
+        intervals = cascade.intervals
+        intervals.clear()
+        self.assertEqual(len(cascade.intervals), 1)
+
     def test_equality_comparison(self):
         cascade = HeatCascade()
         self.assertEqual(cascade, HeatCascade())
@@ -284,6 +495,41 @@ class TestHeatCascade(unittest.TestCase):
         cascade.add_segments(make_segment(-240, 85, 145))
         self.assertEqual(cascade, compare_to)
 
+    def test_equality_temp_shifts(self):
+        # The intervals have no temperature shift, however the cascade was
+        # built
+        rng = random.Random(11)
+        for _ in range(100):
+            segments = []
+            for _ in range(rng.randint(1, 12)):
+                supply_temp = rng.randint(0, 10) * 10
+                target_temp = rng.choice([supply_temp, rng.randint(0, 10) * 10])
+                heat_flow = rng.choice([-1, 1]) * rng.randint(1, 5) * 10
+                temp_shift = rng.choice([None, 5, 10])
+                segments.append(
+                    make_segment(heat_flow, supply_temp, target_temp, temp_shift)
+                )
+
+            bulk = HeatCascade.from_segments(*segments)
+            incremental = HeatCascade()
+            incremental.add_segments(*segments)
+            self.assertEqual(incremental, bulk)
+            incremental.add_segments(*segments)
+            incremental.remove_segments(*segments)
+            self.assertEqual(incremental, bulk)
+            self.assertTrue(all(i.temp_shift is None for i in bulk.intervals))
+
+
+def _random_float_segments(rng, count):
+    segments = []
+    for _ in range(count):
+        supply_temp = rng.uniform(0, 200)
+        target_temp = supply_temp if rng.random() < 0.1 else rng.uniform(0, 200)
+        heat_flow = rng.uniform(-100, 100)
+        segments.append(make_segment(heat_flow, supply_temp, target_temp))
+
+    return segments
+
 
 if __name__ == "__main__":
     unittest.main()
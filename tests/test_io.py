@@ -0,0 +1,115 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pina.io import read_stream_tables_csv, read_streams_csv
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream import make_segmented_stream, make_stream
+
+
+class TestIO(unittest.TestCase):
+    """
+    Test class for reading stream data files
+    """
+
+    def setUp(self):
+        self.streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_segmented_stream([-100, 20, 50], [-200.5, 50, 50], [-30, 50, 60]),
+            make_stream(290, 130, 30, 2.5),
+        ]
+        self.csv = (
+            "name,stream_id,heat_flow,supply_temp,target_temp,temp_shift\n"
+            "C1,a,-230,20,135,\n"
+            "H1,b,330,170,60,\n"
+            "C2,c,-100,20,50,\n"
+            "C2,c,-200.5,50,50,\n"
+            "C2,c,-30,50,60,\n"
+            "\n"
+            "H2,d,290,130,30,2.5\n"
+        )
+
+    def tearDown(self):
+        pass
+
+    def test_read_streams(self):
+        streams = read_streams_csv(io.StringIO(self.csv))
+        self.assertNotIsInstance(streams, list)
+        self.assertEqual(list(streams), self.streams)
+
+    def test_continuity_rule(self):
+        text = (
+            "heat_flow;supply_temp;target_temp\n"
+            "-230;20;135\n"
+            "330;170;60\n"
+            "-100;20;50\n"
+            "-200.5;50;50\n"
+            "-30;50;60\n"
+            "290;130;30\n"
+        )
+        streams = list(read_streams_csv(io.StringIO(text), delimiter=";"))
+        self.assertEqual(len(streams), 4)
+        self.assertEqual(streams[2], self.streams[2])
+        self.assertEqual(streams[3], make_stream(290, 130, 30))
+
+        # Without stream ids, continuous rows are always one stream
+        text = "heat_flow,supply_temp,target_temp\n330,170,60\n-100,60,80\n"
+        streams = list(read_streams_csv(io.StringIO(text)))
+        self.assertEqual(
+            streams, [make_segmented_stream([330, 170, 60], [-100, 60, 80])]
+        )
+
+        # With stream ids, they can be separated
+        text = (
+            "heat_flow,supply_temp,target_temp,stream_id\n"
+            "330,170,60,1\n"
+            "-100,60,80,2\n"
+        )
+        streams = list(read_streams_csv(io.StringIO(text)))
+        self.assertEqual(
+            streams, [make_stream(330, 170, 60), make_stream(-100, 60, 80)]
+        )
+
+    def test_read_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "streams.csv")
+            with open(path, "w", newline="") as f:
+                f.write(self.csv)
+            self.assertEqual(list(read_streams_csv(path)), self.streams)
+
+    def test_read_stream_tables(self):
+        tables = list(read_stream_tables_csv(io.StringIO(self.csv), chunk_size=2))
+        self.assertEqual([len(t) for t in tables], [2, 3, 1])
+        self.assertEqual(
+            [s for t in tables for s in t.streams],
+            [make_stream(-230.0, 20.0, 135.0), *self.streams[1:]],
+        )
+
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*self.streams)
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(*read_stream_tables_csv(io.StringIO(self.csv)))
+        self.assertEqual(analyzer.hot_utility_target, expected.hot_utility_target)
+        self.assertEqual(analyzer.cold_utility_target, expected.cold_utility_target)
+        self.assertEqual(analyzer.pinch_temps, expected.pinch_temps)
+
+        with self.assertRaises(ValueError):
+            next(read_stream_tables_csv(io.StringIO(self.csv), chunk_size=0))
+
+    def test_invalid_files(self):
+        invalid = [
+            "heat_flow,supply_temp\n-230,20\n",
+            "heat_flow,supply_temp,target_temp\n-230,20\n",
+            "heat_flow,supply_temp,target_temp\n-230,20,x\n",
+            "heat_flow,supply_temp,target_temp,stream_id\n-230,20,50,1\n-30,60,80,1\n",
+        ]
+        for text in invalid:
+            with self.assertRaises(ValueError):
+                list(read_streams_csv(io.StringIO(text)))
+        self.assertEqual(list(read_streams_csv(io.StringIO(""))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import random
+import statistics
+import unittest
+
+from pina.monte_carlo import StreamUncertainty, monte_carlo
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream import make_segmented_stream, make_stream
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """
+    Test class for monte_carlo
+    """
+
+    def setUp(self):
+        self.streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_segmented_stream([100, 150, 100], [-80, 100, 100], [80, 100, 30]),
+        ]
+
+    def tearDown(self):
+        pass
+
+    def test_exact_streams(self):
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(*self.streams)
+        result = monte_carlo(self.streams, [None] * 4, 5, samples=3)
+        self.assertEqual(len(result.hot_utility_targets), 3)
+        for hot, cold, pinch_temps in zip(*result):
+            self.assertAlmostEqual(hot, analyzer.hot_utility_target)
+            self.assertAlmostEqual(cold, analyzer.cold_utility_target)
+            self.assertEqual(pinch_temps, analyzer.pinch_temps)
+
+    def test_uncertain_streams(self):
+        uncertainties = [
+            StreamUncertainty(5, 0.5, 0.5),
+            StreamUncertainty(5, 0.5, 0.5),
+            None,
+            StreamUncertainty(2, 0, 0),
+        ]
+        result = monte_carlo(self.streams, uncertainties, 5, samples=500, seed=1)
+        self.assertEqual(
+            result, monte_carlo(self.streams, uncertainties, 5, samples=500, seed=1)
+        )
+        self.assertEqual(len(set(result.hot_utility_targets)), 500)
+
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(*self.streams)
+        self.assertAlmostEqual(
+            statistics.mean(result.hot_utility_targets),
+            analyzer.hot_utility_target,
+            delta=1,
+        )
+        self.assertAlmostEqual(
+            statistics.mean(result.cold_utility_targets),
+            analyzer.cold_utility_target,
+            delta=1,
+        )
+        self.assertGreater(statistics.stdev(result.hot_utility_targets), 1)
+
+    def test_uncertain_heat_flows(self):
+        # Without temperature noise, the samples are evaluated column by
+        # column unless a sampled heat flow changes its sign
+        for std in [2, 150]:
+            uncertainties = [StreamUncertainty(std, 0, 0), None, None, None]
+            result = monte_carlo(self.streams, uncertainties, 5, samples=50, seed=2)
+            rng = random.Random(2)
+            noise = [rng.gauss(0, std) for _ in range(50)]
+            for sample, (hot, cold, pinch_temps) in enumerate(zip(*result)):
+                analyzer = PinchAnalyzer(5)
+                analyzer.add_streams(
+                    make_stream(-230 + noise[sample], 20, 135), *self.streams[1:]
+                )
+                self.assertAlmostEqual(hot, analyzer.hot_utility_target)
+                self.assertAlmostEqual(cold, analyzer.cold_utility_target)
+                self.assertEqual(len(pinch_temps), len(analyzer.pinch_temps))
+                for temp, expected in zip(pinch_temps, analyzer.pinch_temps):
+                    self.assertAlmostEqual(temp, expected)
+
+    def test_no_samples(self):
+        self.assertEqual(
+            monte_carlo(self.streams, [None] * 4, 5, samples=0), ((), (), ())
+        )
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            monte_carlo(self.streams, [None] * 3, 5)
+        with self.assertRaises(ValueError):
+            monte_carlo(self.streams, [None] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
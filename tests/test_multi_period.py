@@ -0,0 +1,186 @@
+import unittest
+
+from pina.multi_period import MultiPeriodAnalyzer
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.scenario_matrix import ScenarioMatrix
+from pina.stream import make_segmented_stream, make_stream
+
+
+class TestMultiPeriodAnalyzer(unittest.TestCase):
+    """
+    Test class for MultiPeriodAnalyzer
+    """
+
+    def setUp(self):
+        self.stream_data = [
+            [[-230, 20, 135]],
+            [[330, 170, 60]],
+            [[-240, 80, 140]],
+            [[180, 150, 30]],
+            [[-20, 40, 60], [-80, 60, 60], [-40, 60, 100, 2]],
+        ]
+        self.streams = [make_segmented_stream(*d) for d in self.stream_data]
+        self.active_periods = [
+            [0, 1, 2, 3],
+            [1, 2, 4],
+            [0, 3, 4],
+            [2, 3],
+            range(5),
+        ]
+        self.durations = [1, 2, 1, 0.5, 4]
+
+    def tearDown(self):
+        pass
+
+    def period_analyzer(self, period, default_temp_shift):
+        analyzer = PinchAnalyzer(default_temp_shift)
+        analyzer.add_streams(
+            *(
+                s
+                for s, periods in zip(self.streams, self.active_periods)
+                if period in periods
+            )
+        )
+        return analyzer
+
+    def test_targets(self):
+        analyzer = MultiPeriodAnalyzer(
+            self.streams, self.active_periods, self.durations, 5
+        )
+        targets = analyzer.targets
+        self.assertEqual(len(targets), 5)
+        for period, t in enumerate(targets):
+            expected = self.period_analyzer(period, 5)
+            self.assertEqual(t.hot_utility_target, expected.hot_utility_target)
+            self.assertEqual(t.cold_utility_target, expected.cold_utility_target)
+            self.assertEqual(t.pinch_temps, expected.pinch_temps)
+
+    def test_demands(self):
+        analyzer = MultiPeriodAnalyzer(
+            self.streams, self.active_periods, self.durations, 5
+        )
+        for period in range(5):
+            expected = self.period_analyzer(period, 5)
+            self.assertEqual(analyzer.heating_demands[period], expected.heating_demand)
+            self.assertEqual(analyzer.cooling_demands[period], expected.cooling_demand)
+
+    def test_grand_cascades(self):
+        analyzer = MultiPeriodAnalyzer(self.streams[:2], [[0, 2], [1, 2]], [1, 1, 1], 5)
+        self.assertEqual(analyzer.temps, (25, 55, 140, 165))
+        self.assertEqual(
+            analyzer.grand_cascades,
+            ScenarioMatrix(self.streams[:2], 5).grand_cascades(
+                [[-230, 0], [0, 330], [-230, 330]]
+            ),
+        )
+        self.assertEqual(analyzer.grand_cascades[0], (0, 0, 60, 60, 230, 230, 230, 230))
+
+    def test_time_average_targets(self):
+        analyzer = MultiPeriodAnalyzer(
+            self.streams, self.active_periods, self.durations, 5
+        )
+        total = sum(self.durations)
+        streams = []
+        for data, periods in zip(self.stream_data, self.active_periods):
+            scale = sum(self.durations[p] for p in periods) / total
+            streams.append(
+                make_segmented_stream(*([s[0] * scale] + s[1:] for s in data))
+            )
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*streams)
+        targets = analyzer.time_average_targets
+        self.assertAlmostEqual(targets.hot_utility_target, expected.hot_utility_target)
+        self.assertAlmostEqual(
+            targets.cold_utility_target, expected.cold_utility_target
+        )
+        self.assertEqual(targets.pinch_temps, expected.pinch_temps)
+
+    def test_storage_targets(self):
+        # All heat of the first period can be stored and used in the second
+        analyzer = MultiPeriodAnalyzer(
+            [make_stream(100, 150, 50), make_stream(-100, 40, 140)],
+            [[0], [1]],
+            [1, 1],
+            5,
+        )
+        self.assertEqual(analyzer.temps, (45, 145))
+        self.assertEqual(
+            analyzer.storage_targets(), (100, 100, 0, 0, 100, (0, 100), 100)
+        )
+
+    def test_storage_targets_time_average(self):
+        analyzer = MultiPeriodAnalyzer(
+            self.streams, self.active_periods, self.durations, 5
+        )
+        targets = analyzer.storage_targets()
+        total = sum(self.durations)
+        self.assertAlmostEqual(
+            targets.hot_utility_demand,
+            sum(
+                t.hot_utility_target * d
+                for t, d in zip(analyzer.targets, self.durations)
+            ),
+        )
+        self.assertAlmostEqual(
+            targets.cold_utility_demand,
+            sum(
+                t.cold_utility_target * d
+                for t, d in zip(analyzer.targets, self.durations)
+            ),
+        )
+        average = analyzer.time_average_targets
+        self.assertAlmostEqual(
+            targets.hot_utility_target, average.hot_utility_target * total
+        )
+        self.assertAlmostEqual(
+            targets.cold_utility_target, average.cold_utility_target * total
+        )
+        self.assertAlmostEqual(
+            targets.storage_heat_recovery,
+            targets.hot_utility_demand - targets.hot_utility_target,
+        )
+
+        # Cumulative balances of the grand cascades across time
+        cascades = analyzer.grand_cascades
+        average_cascade = [
+            sum(c[j] * d for c, d in zip(cascades, self.durations)) / total
+            for j in range(len(cascades[0]))
+        ]
+        capacities = []
+        for j in range(len(average_cascade)):
+            balance = lowest = highest = 0
+            for cascade, duration in zip(cascades, self.durations):
+                balance += duration * (average_cascade[j] - cascade[j])
+                lowest = min(lowest, balance)
+                highest = max(highest, balance)
+            capacities.append(highest - lowest)
+        self.assertEqual(len(targets.storage_capacities), len(analyzer.temps))
+        for i, capacity in enumerate(targets.storage_capacities):
+            self.assertAlmostEqual(
+                capacity, max(capacities[2 * i], capacities[2 * i + 1])
+            )
+        self.assertEqual(targets.storage_capacity, max(targets.storage_capacities))
+
+    def test_empty_periods(self):
+        analyzer = MultiPeriodAnalyzer(self.streams[:1], [[1]], [1, 1, 1], 5)
+        self.assertEqual(analyzer.targets, [(0, 0, []), (230, 0, [25]), (0, 0, [])])
+        self.assertEqual(analyzer.heating_demands, [0, 230, 0])
+
+        analyzer = MultiPeriodAnalyzer([], [], [1, 2])
+        self.assertEqual(analyzer.targets, [(0, 0, []), (0, 0, [])])
+        self.assertEqual(analyzer.time_average_targets, (0, 0, []))
+        self.assertEqual(analyzer.storage_targets(), (0, 0, 0, 0, 0, (), 0))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MultiPeriodAnalyzer(self.streams, self.active_periods[:4], self.durations)
+        with self.assertRaises(ValueError):
+            MultiPeriodAnalyzer(self.streams[:1], [[5]], self.durations, 5)
+        with self.assertRaises(ValueError):
+            MultiPeriodAnalyzer(self.streams[:1], [[0]], [1, 0], 5)
+        with self.assertRaises(ValueError):
+            MultiPeriodAnalyzer(self.streams[:1], [[0]], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
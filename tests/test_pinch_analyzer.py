@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from pina.pinch_analyzer import PinchAnalyzer
@@ -25,11 +26,11 @@ class TestPinchAnalyzer(unittest.TestCase):
         self.assertEqual(analyzer.pinch_temps, [])
         self.assertEqual(analyzer.default_temp_shift, None)
         self.assertEqual(analyzer.streams, [])
-        self.assertEqual(analyzer.cold_composite_curve, ([], []))
-        self.assertEqual(analyzer.hot_composite_curve, ([], []))
-        self.assertEqual(analyzer.shifted_cold_composite_curve, ([], []))
-        self.assertEqual(analyzer.shifted_hot_composite_curve, ([], []))
-        self.assertEqual(analyzer.grand_composite_curve, ([], []))
+        self.assertEqual(analyzer.cold_composite_curve, ((), ()))
+        self.assertEqual(analyzer.hot_composite_curve, ((), ()))
+        self.assertEqual(analyzer.shifted_cold_composite_curve, ((), ()))
+        self.assertEqual(analyzer.shifted_hot_composite_curve, ((), ()))
+        self.assertEqual(analyzer.grand_composite_curve, ((), ()))
 
     def test_2_stream_example(self):
         cold_stream = make_stream(-180, 20, 200)
@@ -47,23 +48,23 @@ class TestPinchAnalyzer(unittest.TestCase):
 
         self.assertEqual(analyzer.streams, [cold_stream, hot_stream])
 
-        expected_cold_composite_curve = ([70, 250], [20, 200])
+        expected_cold_composite_curve = ((70, 250), (20, 200))
         self.assertEqual(analyzer.cold_composite_curve, expected_cold_composite_curve)
 
-        expected_hot_composite_curve = ([0, 180], [50, 150])
+        expected_hot_composite_curve = ((0, 180), (50, 150))
         self.assertEqual(analyzer.hot_composite_curve, expected_hot_composite_curve)
 
-        expected_shifted_cold_composite_curve = ([70, 250], [30, 210])
+        expected_shifted_cold_composite_curve = ((70, 250), (30, 210))
         self.assertEqual(
             analyzer.shifted_cold_composite_curve, expected_shifted_cold_composite_curve
         )
 
-        expected_shifted_hot_composite_curve = ([0, 180], [40, 140])
+        expected_shifted_hot_composite_curve = ((0, 180), (40, 140))
         self.assertEqual(
             analyzer.shifted_hot_composite_curve, expected_shifted_hot_composite_curve
         )
 
-        expected_grand_composite_curve = ([70, 80, 0, 70], [30, 40, 140, 210])
+        expected_grand_composite_curve = ((70, 80, 0, 70), (30, 40, 140, 210))
         self.assertEqual(analyzer.grand_composite_curve, expected_grand_composite_curve)
 
     def test_extended_pinch(self):
@@ -151,6 +152,296 @@ class TestPinchAnalyzer(unittest.TestCase):
         self.assertEqual(analyzer.default_temp_shift, 5)
         self.assertEqual(analyzer.streams, [cold_stream, hot_stream])
 
+    def test_add_streams_one_by_one(self):
+        streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_stream(180, 150, 30),
+            make_stream(-100, 100, 100),
+            make_stream(-230, 20, 135),
+        ]
+        batch = PinchAnalyzer(default_temp_shift=5)
+        batch.add_streams(*streams)
+        one_by_one = PinchAnalyzer(default_temp_shift=5)
+        for s in streams:
+            one_by_one.add_streams(s)
+
+        self.assertEqual(one_by_one.cold_utility_target, batch.cold_utility_target)
+        self.assertEqual(one_by_one.hot_utility_target, batch.hot_utility_target)
+        self.assertEqual(one_by_one.pinch_temps, batch.pinch_temps)
+        self.assertEqual(one_by_one.cold_utility_target, 0)
+        self.assertEqual(one_by_one.hot_utility_target, 290)
+        self.assertEqual(one_by_one.pinch_temps, [25])
+
+    def test_remove_streams(self):
+        streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_stream(180, 150, 30),
+        ]
+        extra = make_segmented_stream([-50, 50, 100], [-40, 100, 100])
+        analyzer = PinchAnalyzer(default_temp_shift=5)
+        analyzer.add_streams(*streams, extra)
+        analyzer.remove_streams(extra)
+
+        expected = PinchAnalyzer(default_temp_shift=5)
+        expected.add_streams(*streams)
+        self.assertEqual(analyzer.streams, streams)
+        self.assertEqual(analyzer.cold_utility_target, 60)
+        self.assertEqual(analyzer.hot_utility_target, 20)
+        self.assertEqual(analyzer.pinch_temps, [85])
+        self.assertEqual(analyzer.heating_demand, expected.heating_demand)
+        self.assertEqual(analyzer.cooling_demand, expected.cooling_demand)
+        self.assertEqual(analyzer.cold_composite_curve, expected.cold_composite_curve)
+        self.assertEqual(analyzer.hot_composite_curve, expected.hot_composite_curve)
+        self.assertEqual(analyzer.grand_composite_curve, expected.grand_composite_curve)
+
+        analyzer.remove_streams(*streams)
+        self.assertEqual(analyzer.streams, [])
+        self.assertEqual(analyzer.cold_utility_target, 0)
+        self.assertEqual(analyzer.hot_utility_target, 0)
+        self.assertEqual(analyzer.pinch_temps, [])
+        self.assertEqual(analyzer.grand_composite_curve, ((), ()))
+
+    def test_remove_missing_stream(self):
+        analyzer = PinchAnalyzer(default_temp_shift=5)
+        analyzer.add_streams(make_stream(-230, 20, 135))
+        with self.assertRaises(ValueError):
+            analyzer.remove_streams(make_stream(330, 170, 60))
+        with self.assertRaises(ValueError):
+            analyzer.replace_stream(make_stream(330, 170, 60), make_stream(1, 2, 3))
+
+    def test_replace_stream(self):
+        cold_1 = make_stream(-230, 20, 135)
+        hot_1 = make_stream(330, 170, 60)
+        cold_2 = make_stream(-240, 80, 140)
+        hot_2 = make_stream(180, 150, 30)
+        analyzer = PinchAnalyzer(default_temp_shift=5)
+        analyzer.add_streams(cold_1, make_stream(100, 200, 100), cold_2, hot_2)
+        analyzer.replace_stream(make_stream(100, 200, 100), hot_1)
+
+        self.assertEqual(analyzer.streams, [cold_1, hot_1, cold_2, hot_2])
+        self.assertEqual(analyzer.cold_utility_target, 60)
+        self.assertEqual(analyzer.hot_utility_target, 20)
+        self.assertEqual(analyzer.pinch_temps, [85])
+
+    def test_toggle_stream(self):
+        cold_stream = make_stream(-225, 20, 95)
+        hot_stream = make_stream(267, 95, 6)
+        analyzer = PinchAnalyzer(default_temp_shift=1)
+        analyzer.add_streams(cold_stream, hot_stream)
+        for _ in range(10):
+            analyzer.remove_streams(cold_stream)
+            self.assertEqual(analyzer.cold_utility_target, 267)
+            self.assertEqual(analyzer.hot_utility_target, 0)
+            self.assertEqual(analyzer.pinch_temps, [94])
+            analyzer.add_streams(cold_stream)
+            self.assertEqual(analyzer.cold_utility_target, 48)
+            self.assertEqual(analyzer.hot_utility_target, 6)
+            self.assertEqual(analyzer.pinch_temps, [21, 94])
+
+    def test_toggle_float_streams(self):
+        # Toggling streams gives the same targets as a new analyzer with the
+        # same streams, without rounding errors
+        rng = random.Random(25)
+        streams = [
+            make_stream(
+                rng.choice([-1, 1]) * rng.uniform(1, 100),
+                rng.uniform(0, 300),
+                rng.uniform(0, 300),
+            )
+            for _ in range(30)
+        ]
+        analyzer = PinchAnalyzer(default_temp_shift=5)
+        for s in streams:
+            analyzer.add_streams(s)
+            analyzer.pinch_temps
+        expected = PinchAnalyzer(default_temp_shift=5)
+        expected.add_streams(*streams)
+        for _ in range(20):
+            s = rng.choice(streams)
+            analyzer.remove_streams(s)
+            analyzer.pinch_temps
+            analyzer.add_streams(s)
+            self.assertEqual(analyzer.hot_utility_target, expected.hot_utility_target)
+            self.assertEqual(analyzer.cold_utility_target, expected.cold_utility_target)
+            self.assertEqual(analyzer.pinch_temps, expected.pinch_temps)
+            self.assertEqual(min(analyzer.grand_composite_curve.heat_flows), 0)
+
+    def test_lazy_cascades(self):
+        analyzer = PinchAnalyzer(default_temp_shift=5)
+        analyzer.add_streams(make_stream(-230, 20, 135), make_stream(330, 170, 60))
+        self.assertEqual(
+            [name for name, c in analyzer._cascades.items() if c is not None], []
+        )
+
+        self.assertEqual(analyzer.hot_utility_target, 0)
+        self.assertEqual(
+            [name for name, c in analyzer._cascades.items() if c is not None],
+            ["grand"],
+        )
+
+        self.assertEqual(analyzer.cooling_demand, 330)
+        self.assertEqual(
+            [name for name, c in analyzer._cascades.items() if c is not None],
+            ["hot", "grand"],
+        )
+
+        analyzer.add_streams(make_stream(-240, 80, 140), make_stream(180, 150, 30))
+        self.assertEqual(analyzer.cooling_demand, 510)
+        self.assertEqual(analyzer.hot_utility_target, 20)
+        self.assertEqual(analyzer.heating_demand, 470)
+
+    def test_cached_curves(self):
+        cold_stream = make_stream(-230, 20, 135)
+        hot_stream = make_stream(330, 170, 60)
+        analyzer = PinchAnalyzer(default_temp_shift=5)
+        analyzer.add_streams(cold_stream, hot_stream)
+        curve = analyzer.grand_composite_curve
+        self.assertIs(analyzer.grand_composite_curve, curve)
+        self.assertIsInstance(curve[0], tuple)
+        self.assertIsInstance(curve[1], tuple)
+
+        analyzer.add_streams(make_stream(-240, 80, 140))
+        self.assertIsNot(analyzer.grand_composite_curve, curve)
+        self.assertEqual(analyzer.heating_demand, 470)
+
+        analyzer.remove_streams(cold_stream)
+        self.assertEqual(analyzer.heating_demand, 240)
+
+        expected = PinchAnalyzer(default_temp_shift=5)
+        expected.add_streams(hot_stream, make_stream(-240, 80, 140))
+        self.assertEqual(analyzer.cold_composite_curve, expected.cold_composite_curve)
+        self.assertEqual(analyzer.grand_composite_curve, expected.grand_composite_curve)
+
+    def test_tolerance(self):
+        streams = [
+            make_stream(-0.3, 0.1, 0.4),
+            make_stream(-1, 0.4, 1.4),
+            make_stream(2.2, 1.1 + 0.2, 0.1 + 0.2),
+        ]
+        analyzer = PinchAnalyzer(0.1, abs_tol=1e-9, rel_tol=1e-9)
+        analyzer.add_streams(*streams)
+        analyzer.remove_streams(streams[1])
+        self.assertAlmostEqual(analyzer.hot_utility_target, 0)
+        analyzer.add_streams(streams[1])
+
+        expected = PinchAnalyzer(0.1, abs_tol=1e-9, rel_tol=1e-9)
+        expected.add_streams(*streams)
+        self.assertEqual(
+            len(analyzer.grand_composite_curve[0]),
+            len(expected.grand_composite_curve[0]),
+        )
+        self.assertAlmostEqual(analyzer.hot_utility_target, expected.hot_utility_target)
+        self.assertAlmostEqual(
+            analyzer.cold_utility_target, expected.cold_utility_target
+        )
+        self.assertEqual(len(analyzer.pinch_temps), len(expected.pinch_temps))
+
+        exact = PinchAnalyzer(0.1)
+        exact.add_streams(*streams)
+        self.assertLess(
+            len(expected.grand_composite_curve[0]), len(exact.grand_composite_curve[0])
+        )
+        self.assertAlmostEqual(analyzer.hot_utility_target, exact.hot_utility_target)
+
+        with self.assertRaises(ValueError):
+            PinchAnalyzer(rel_tol=-1)
+
+    def test_incremental_float_targets(self):
+        # The target tree is updated within the changed (and with tolerances
+        # coalesced) window, and the targets agree with a new analyzer up to
+        # rounding errors
+        rng = random.Random(1)
+        for tol in [0, 1e-9] * 10:
+            streams = [
+                make_stream(
+                    rng.choice([-1, 1]) * rng.uniform(1, 100),
+                    round(rng.uniform(0, 100), 1),
+                    round(rng.uniform(0, 100), 1),
+                )
+                for _ in range(20)
+            ]
+            analyzer = PinchAnalyzer(0.1, abs_tol=tol, rel_tol=tol)
+            analyzer.add_streams(*streams)
+            analyzer.pinch_temps
+            for s in streams[:10]:
+                analyzer.remove_streams(s)
+                analyzer.pinch_temps
+
+            expected = PinchAnalyzer(0.1, abs_tol=tol, rel_tol=tol)
+            expected.add_streams(*streams[10:])
+            self.assertAlmostEqual(
+                analyzer.hot_utility_target, expected.hot_utility_target
+            )
+            self.assertAlmostEqual(
+                analyzer.cold_utility_target, expected.cold_utility_target
+            )
+            self.assertEqual(len(analyzer.pinch_temps), len(expected.pinch_temps))
+            for temp, expected_temp in zip(analyzer.pinch_temps, expected.pinch_temps):
+                self.assertAlmostEqual(temp, expected_temp)
+
+    def test_float_targets_match_curve(self):
+        rng = random.Random(11)
+        for _ in range(50):
+            streams = [
+                make_stream(
+                    rng.choice([-1, 1]) * rng.uniform(1, 100),
+                    rng.uniform(0, 200),
+                    rng.uniform(0, 200),
+                )
+                for _ in range(rng.randint(1, 20))
+            ]
+            analyzer = PinchAnalyzer(default_temp_shift=0.1)
+            analyzer.add_streams(*streams)
+            heat_flows, _ = analyzer.grand_composite_curve
+            self.assertEqual(analyzer.hot_utility_target, heat_flows[-1])
+            self.assertEqual(analyzer.cold_utility_target, heat_flows[0])
+            self.assertEqual(min(heat_flows), 0)
+
+            # The tree values are exact, so incremental updates agree with the
+            # curve as well
+            removed = streams[: len(streams) // 2]
+            analyzer.remove_streams(*removed)
+            analyzer.add_streams(*removed)
+            self.assertEqual(analyzer.hot_utility_target, heat_flows[-1])
+            self.assertEqual(analyzer.cold_utility_target, heat_flows[0])
+
+        rng = random.Random(12)
+        streams = [
+            make_stream(
+                rng.choice([-1, 1]) * rng.uniform(1, 100),
+                rng.uniform(0, 200),
+                rng.uniform(0, 200),
+            )
+            for _ in range(30)
+        ]
+        analyzer = PinchAnalyzer(default_temp_shift=0.1)
+        analyzer.add_streams(*streams)
+        analyzer.grand_composite_curve
+        analyzer.remove_streams(*streams[:15])
+        expected = PinchAnalyzer(default_temp_shift=0.1)
+        expected.add_streams(*streams[15:])
+        self.assertEqual(
+            analyzer.grand_composite_curve.temps, expected.grand_composite_curve.temps
+        )
+
+        analyzer = PinchAnalyzer(default_temp_shift=0.1)
+        analyzer.add_streams(make_stream(-10.5, 20, 50))
+        self.assertEqual(analyzer.hot_utility_target, 10.5)
+        self.assertIs(type(analyzer.cold_utility_target), int)
+
+    def test_no_temp_shift(self):
+        analyzer = PinchAnalyzer()
+        with self.assertRaises(ValueError):
+            analyzer.add_streams(make_stream(-40, 100, 100, 10), make_stream(40, 0, 10))
+        self.assertEqual(analyzer.streams, [])
+
+        analyzer.add_streams(make_stream(-40, 100, 100, 10), make_stream(0, 0, 10))
+        self.assertEqual(analyzer.hot_utility_target, 40)
+
 
 if __name__ == "__main__":
     unittest.main()
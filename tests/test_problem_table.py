@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.problem_table import targets
+from pina.stream import make_segmented_stream, make_stream
+from pina.stream_table import StreamTable
+
+
+class TestTargets(unittest.TestCase):
+    """
+    Test class for the Problem Table Algorithm (targets)
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def assertMatchesAnalyzer(self, streams, temp_shift):
+        analyzer = PinchAnalyzer(temp_shift)
+        analyzer.add_streams(*streams)
+        expected = (
+            analyzer.hot_utility_target,
+            analyzer.cold_utility_target,
+            analyzer.pinch_temps,
+        )
+        result = targets(streams, temp_shift)
+        self.assertEqual(result, expected)
+        for value, expected_value in zip(result[:2], expected[:2]):
+            self.assertIs(type(value), type(expected_value))
+
+    def test_empty(self):
+        self.assertEqual(targets([]), (0, 0, []))
+        self.assertEqual(targets([make_stream(0, 20, 100)], 5), (0, 0, []))
+
+    def test_4_stream_example(self):
+        streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_stream(180, 150, 30),
+        ]
+        self.assertEqual(targets(streams, 5), (20, 60, [85]))
+        self.assertMatchesAnalyzer(streams, 5)
+
+    def test_random(self):
+        rng = random.Random(5)
+        for _ in range(100):
+            data = []
+            for _ in range(rng.randint(1, 8)):
+                temp = rng.choice([0.5, 1, 0.1]) * rng.randint(0, 50)
+                segments = []
+                for _ in range(rng.randint(1, 3)):
+                    if rng.random() < 0.2:
+                        next_temp = temp
+                    else:
+                        next_temp = rng.choice([0.5, 1, 0.1]) * rng.randint(0, 50)
+                    heat_flow = rng.choice([-1, 0, 1]) * rng.randint(1, 40)
+                    segment = [heat_flow * rng.choice([1, 0.5, 0.3]), temp, next_temp]
+                    if rng.random() < 0.2:
+                        segment.append(rng.choice([1, 2.5]))
+                    segments.append(segment)
+                    temp = next_temp
+                data.append(segments)
+            streams = [make_segmented_stream(*d) for d in data]
+            self.assertMatchesAnalyzer(streams, rng.choice([0, 1, 0.1, 2.5]))
+
+    def test_stream_table(self):
+        table = StreamTable(
+            heat_flows=[-230, 330, -240, 180, -50],
+            supply_temps=[20, 170, 80, 150, 100],
+            target_temps=[135, 60, 140, 30, 100],
+            stream_ids=[0, 1, 2, 3, 4],
+        )
+        self.assertMatchesAnalyzer([table], 5)
+        self.assertMatchesAnalyzer([table, make_stream(100, 200, 150)], 5)
+
+    def test_no_temp_shift(self):
+        with self.assertRaises(ValueError):
+            targets([make_stream(-40, 100, 100, 10), make_stream(40, 0, 10)])
+        self.assertEqual(
+            targets([make_stream(-40, 100, 100, 10), make_stream(0, 0, 10)]),
+            (40, 0, [110]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import random
+import unittest
+from fractions import Fraction
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.scenario_matrix import ScenarioMatrix
+from pina.stream import make_segmented_stream
+
+
+class TestScenarioMatrix(unittest.TestCase):
+    """
+    Test class for ScenarioMatrix
+    """
+
+    def setUp(self):
+        self.stream_data = [
+            [[-230, 20, 135]],
+            [[330, 170, 60]],
+            [[-240, 80, 140]],
+            [[180, 150, 30]],
+            [[-20, 40, 60], [-80, 60, 60], [-40, 60, 100, 2]],
+        ]
+        self.streams = [make_segmented_stream(*d) for d in self.stream_data]
+
+    def tearDown(self):
+        pass
+
+    def expected_targets(self, heat_flows, default_temp_shift):
+        # Scales the segments of each stream by the stream's heat flow
+        streams = []
+        for data, stream, heat_flow in zip(self.stream_data, self.streams, heat_flows):
+            scale = heat_flow / stream.heat_flow
+            streams.append(
+                make_segmented_stream(*([s[0] * scale] + s[1:] for s in data))
+            )
+        analyzer = PinchAnalyzer(default_temp_shift)
+        analyzer.add_streams(*streams)
+        return (
+            analyzer.hot_utility_target,
+            analyzer.cold_utility_target,
+            analyzer.pinch_temps,
+        )
+
+    def test_empty(self):
+        matrix = ScenarioMatrix([], 5)
+        self.assertEqual(matrix.temps, ())
+        self.assertEqual(matrix.targets([[], []]), [(0, 0, []), (0, 0, [])])
+        self.assertEqual(matrix.grand_cascades([[]]), [()])
+
+    def test_nominal_heat_flows(self):
+        matrix = ScenarioMatrix(self.streams, 5)
+        heat_flows = [s.heat_flow for s in self.streams]
+        self.assertEqual(
+            matrix.targets([heat_flows]), [self.expected_targets(heat_flows, 5)]
+        )
+
+    def test_grand_cascades(self):
+        matrix = ScenarioMatrix(self.streams[:2], 5)
+        self.assertEqual(matrix.temps, (25, 55, 140, 165))
+        self.assertEqual(
+            matrix.grand_cascades([[-230, 330], [-115, 0]]),
+            [
+                (0, 0, 60, 60, -25, -25, -100, -100),
+                (0, 0, 30, 30, 115, 115, 115, 115),
+            ],
+        )
+
+    def test_random_scenarios(self):
+        rng = random.Random(5)
+        matrix = ScenarioMatrix(self.streams, 5)
+        heat_flows = [
+            [s.heat_flow * rng.randint(0, 16) / 8 for s in self.streams]
+            for _ in range(50)
+        ]
+        self.assertEqual(
+            matrix.targets(heat_flows),
+            [self.expected_targets(row, 5) for row in heat_flows],
+        )
+
+    def test_fraction_scenarios(self):
+        rng = random.Random(3)
+        self.stream_data = [
+            [[Fraction(s[0])] + s[1:] for s in data] for data in self.stream_data
+        ]
+        self.streams = [make_segmented_stream(*d) for d in self.stream_data]
+        matrix = ScenarioMatrix(self.streams, 5)
+        heat_flows = [
+            [s.heat_flow * Fraction(rng.randint(1, 30), 7) for s in self.streams]
+            for _ in range(20)
+        ]
+        self.assertEqual(
+            matrix.targets(heat_flows),
+            [self.expected_targets(row, 5) for row in heat_flows],
+        )
+
+    def test_float_scenarios(self):
+        # Floats are summed in a different order than in PinchAnalyzer, so
+        # the targets only agree up to rounding errors
+        rng = random.Random(4)
+        matrix = ScenarioMatrix(self.streams, 5)
+        heat_flows = [
+            [s.heat_flow * rng.uniform(0.6, 1.2) for s in self.streams]
+            for _ in range(50)
+        ]
+        for targets, row in zip(matrix.targets(heat_flows), heat_flows):
+            expected = self.expected_targets(row, 5)
+            self.assertAlmostEqual(targets.hot_utility_target, expected[0])
+            self.assertAlmostEqual(targets.cold_utility_target, expected[1])
+            self.assertEqual(targets.pinch_temps, expected[2])
+
+    def test_invalid_heat_flows(self):
+        matrix = ScenarioMatrix(self.streams, 5)
+        with self.assertRaises(ValueError):
+            matrix.targets([[-230, 330, -240, 180]])
+        with self.assertRaises(ValueError):
+            matrix.targets([[230, 330, -240, 180, -140]])
+
+    def test_invalid_streams(self):
+        with self.assertRaises(ValueError):
+            ScenarioMatrix(self.streams)
+        with self.assertRaises(ValueError):
+            ScenarioMatrix([make_segmented_stream([-10, 20, 30], [10, 30, 20])], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
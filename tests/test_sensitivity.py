@@ -0,0 +1,136 @@
+import math
+import unittest
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.sensitivity import Sensitivity, sensitivities
+from pina.stream import make_segmented_stream, make_stream
+
+# Step of the finite differences, a power of 2 to avoid rounding errors
+STEP = 2**-16
+
+
+def targets(stream_data, default_temp_shift):
+    analyzer = PinchAnalyzer(default_temp_shift)
+    analyzer.add_streams(*(make_segmented_stream(*d) for d in stream_data))
+    return analyzer.hot_utility_target, analyzer.cold_utility_target
+
+
+def perturbed(stream_data, index, parameter):
+    # Increases the heat flow, supply temperature or target temperature of a
+    # stream by STEP, like sensitivities does
+    stream_data = [[list(s) for s in d] for d in stream_data]
+    segments = stream_data[index]
+    if parameter == "heat_flow":
+        heat_flow = sum(s[0] for s in segments)
+        for s in segments:
+            s[0] *= 1 + STEP / heat_flow
+        return stream_data
+
+    if parameter == "target_temp":
+        segments = reversed(segments)
+    for s in segments:
+        if s[1] == s[2]:
+            # Latent segments move as a whole, together with the next segment
+            s[1] += STEP
+            s[2] += STEP
+            continue
+        s[1 if parameter == "supply_temp" else 2] += STEP
+        break
+
+    return stream_data
+
+
+class TestSensitivity(unittest.TestCase):
+    """
+    Test class for sensitivities
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def assertMatchesFiniteDifferences(self, stream_data, default_temp_shift):
+        streams = [make_segmented_stream(*d) for d in stream_data]
+        base = targets(stream_data, default_temp_shift)
+        for index, sensitivity in enumerate(sensitivities(streams, default_temp_shift)):
+            for parameter in Sensitivity._fields:
+                hot, cold = targets(
+                    perturbed(stream_data, index, parameter), default_temp_shift
+                )
+                self.assertAlmostEqual(
+                    getattr(sensitivity.hot_utility_target, parameter),
+                    (hot - base[0]) / STEP,
+                    places=3,
+                )
+                self.assertAlmostEqual(
+                    getattr(sensitivity.cold_utility_target, parameter),
+                    (cold - base[1]) / STEP,
+                    places=3,
+                )
+
+    def test_empty(self):
+        self.assertEqual(sensitivities([], 5), [])
+        self.assertEqual(
+            sensitivities([make_stream(0, 20, 50)], 5),
+            [((0, 0, 0), (0, 0, 0))],
+        )
+
+    def test_4_stream_example(self):
+        self.assertMatchesFiniteDifferences(
+            [
+                [[-230, 20, 135]],
+                [[330, 170, 60]],
+                [[-240, 80, 140]],
+                [[180, 150, 30]],
+            ],
+            5,
+        )
+
+    def test_latent_segments(self):
+        self.assertMatchesFiniteDifferences(
+            [
+                [[-64, 16, 48], [-160, 48, 48], [-32, 48, 64]],
+                [[96, 104, 104], [128, 104, 40]],
+                [[-48, 32, 32]],
+            ],
+            4,
+        )
+
+    def test_2_pinches(self):
+        self.assertMatchesFiniteDifferences(
+            [
+                [[-20, 20, 40]],
+                [[40, 60, 20]],
+                [[-40, 60, 80]],
+                [[20, 100, 80]],
+            ],
+            0,
+        )
+
+    def test_individual_temp_shift(self):
+        self.assertMatchesFiniteDifferences(
+            [[[-40, 100, 100, 10]], [[40, 0, 16]], [[-32, 40, 72]]], 4
+        )
+
+    def test_jump(self):
+        # Moving the cold latent heat flow separates it from the hot one
+        streams = [
+            make_stream(-160, 128, 128),
+            make_stream(16, 136, 136),
+            make_stream(144, 96, 32),
+        ]
+        sensitivity = sensitivities(streams, 4)[0]
+        self.assertEqual(sensitivity.hot_utility_target.supply_temp, math.inf)
+        self.assertEqual(sensitivity.cold_utility_target.target_temp, math.inf)
+
+    def test_no_heat_flow(self):
+        stream = make_segmented_stream([-40, 20, 60], [40, 60, 20])
+        sensitivity = sensitivities([stream, make_stream(30, 90, 30)], 5)[0]
+        self.assertIsNone(sensitivity.hot_utility_target.heat_flow)
+        self.assertIsNone(sensitivity.cold_utility_target.heat_flow)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from pina.skip_list import SkipList
+
+
+class TestSkipList(unittest.TestCase):
+    """
+    Test class for SkipList
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_empty(self):
+        skip_list = SkipList(key=lambda x: x)
+        self.assertEqual(len(skip_list), 0)
+        self.assertEqual(list(skip_list), [])
+        self.assertIsNone(skip_list.find_lt(0))
+        self.assertEqual(list(skip_list.iter_from(0)), [])
+
+    def test_insert_and_remove(self):
+        rng = random.Random(0)
+        items = list(range(200))
+        rng.shuffle(items)
+        skip_list = SkipList(lambda x: x, items, seed=1)
+        self.assertEqual(len(skip_list), 200)
+        self.assertEqual(list(skip_list), sorted(items))
+
+        for i in items[:100]:
+            skip_list.remove(i)
+        self.assertEqual(len(skip_list), 100)
+        self.assertEqual(list(skip_list), sorted(items[100:]))
+
+    def test_key(self):
+        skip_list = SkipList(lambda x: -x, [1, 3, 2])
+        self.assertEqual(list(skip_list), [3, 2, 1])
+        self.assertEqual(skip_list.find_lt(-2), 3)
+        self.assertEqual(list(skip_list.iter_from(-2)), [2, 1])
+
+    def test_duplicate_key(self):
+        skip_list = SkipList(lambda x: x, [1, 2])
+        with self.assertRaises(ValueError):
+            skip_list.insert(2)
+
+    def test_remove_missing(self):
+        skip_list = SkipList(lambda x: x, [1, 2])
+        with self.assertRaises(ValueError):
+            skip_list.remove(3)
+
+    def test_find_lt(self):
+        skip_list = SkipList(lambda x: x, [10, 20, 30])
+        self.assertIsNone(skip_list.find_lt(10))
+        self.assertEqual(skip_list.find_lt(11), 10)
+        self.assertEqual(skip_list.find_lt(30), 20)
+        self.assertEqual(skip_list.find_lt(100), 30)
+
+    def test_iter_from(self):
+        skip_list = SkipList(lambda x: x, [10, 20, 30])
+        self.assertEqual(list(skip_list.iter_from(0)), [10, 20, 30])
+        self.assertEqual(list(skip_list.iter_from(20)), [20, 30])
+        self.assertEqual(list(skip_list.iter_from(21)), [30])
+        self.assertEqual(list(skip_list.iter_from(31)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
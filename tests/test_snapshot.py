@@ -0,0 +1,105 @@
+import io
+import mmap
+import os
+import tempfile
+import unittest
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.snapshot import load_snapshot, save_snapshot
+from pina.stream import make_segmented_stream, make_stream
+from pina.stream_table import StreamTable
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Test class for binary snapshots
+    """
+
+    def setUp(self):
+        self.analyzer = PinchAnalyzer(5)
+        self.analyzer.add_streams(
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_segmented_stream([-100, 20, 50], [-200, 50, 50], [-30, 50, 60]),
+            make_stream(290, 130, 30, 2.5),
+        )
+
+    def tearDown(self):
+        pass
+
+    def assertSnapshotEqual(self, snapshot, analyzer):
+        for name in [
+            "default_temp_shift",
+            "heating_demand",
+            "cooling_demand",
+            "hot_utility_target",
+            "cold_utility_target",
+            "heat_recovery_target",
+        ]:
+            self.assertEqual(getattr(snapshot, name), getattr(analyzer, name), name)
+        self.assertEqual(snapshot.pinch_temps.tolist(), analyzer.pinch_temps)
+        for name in [
+            "cold_composite_curve",
+            "hot_composite_curve",
+            "shifted_cold_composite_curve",
+            "shifted_hot_composite_curve",
+            "grand_composite_curve",
+        ]:
+            self.assertEqual(
+                tuple(tuple(v) for v in getattr(snapshot, name)),
+                getattr(analyzer, name),
+                name,
+            )
+
+    def test_round_trip(self):
+        buffer = io.BytesIO()
+        save_snapshot(self.analyzer, buffer)
+        buffer.seek(0)
+        snapshot = load_snapshot(buffer)
+        self.assertSnapshotEqual(snapshot, self.analyzer)
+        self.assertEqual(
+            snapshot.stream_table().streams,
+            StreamTable.from_streams(self.analyzer.streams).streams,
+        )
+        self.assertEqual(
+            snapshot.stream_columns["stream_ids"].tolist(), [0, 1, 2, 2, 2, 3]
+        )
+        self.assertSnapshotEqual(snapshot, snapshot.analyzer())
+        snapshot.close()
+
+    def test_memory_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "analysis.pina")
+            save_snapshot(self.analyzer, path)
+            with load_snapshot(path) as snapshot:
+                self.assertIsInstance(snapshot._buffer, mmap.mmap)
+                self.assertTrue(snapshot.pinch_temps.readonly)
+                self.assertSnapshotEqual(snapshot, self.analyzer)
+            self.assertTrue(snapshot._buffer.closed)
+
+    def test_empty_analyzer(self):
+        buffer = io.BytesIO()
+        save_snapshot(PinchAnalyzer(), buffer)
+        buffer.seek(0)
+        snapshot = load_snapshot(buffer)
+        self.assertSnapshotEqual(snapshot, PinchAnalyzer())
+        self.assertEqual(len(snapshot.stream_table()), 0)
+
+    def test_invalid_files(self):
+        buffer = io.BytesIO()
+        save_snapshot(self.analyzer, buffer)
+        data = buffer.getvalue()
+        invalid = [
+            b"",
+            b"PINA",
+            b"XXXX" + data[4:],
+            data[:4] + b"\x02" + data[5:],
+            data[:-8],
+        ]
+        for contents in invalid:
+            with self.assertRaises(ValueError):
+                load_snapshot(io.BytesIO(contents))
+
+
+if __name__ == "__main__":
+    unittest.main()
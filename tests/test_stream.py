@@ -76,11 +76,15 @@ class TestStream(unittest.TestCase):
         self.assertEqual(self.neutral_stream.heat_flow, 0)
 
     def test_segments(self):
-        self.assertEqual(self.single_sensible_segment.segments, self.cold_segments[:1])
-        self.assertEqual(self.single_latent_segment.segments, self.hot_segments[1:2])
-        self.assertEqual(self.cold_stream.segments, self.cold_segments)
-        self.assertEqual(self.hot_stream.segments, self.hot_segments)
-        self.assertEqual(self.neutral_stream.segments, self.mixed_segments)
+        self.assertEqual(
+            self.single_sensible_segment.segments, tuple(self.cold_segments[:1])
+        )
+        self.assertEqual(
+            self.single_latent_segment.segments, tuple(self.hot_segments[1:2])
+        )
+        self.assertEqual(self.cold_stream.segments, tuple(self.cold_segments))
+        self.assertEqual(self.hot_stream.segments, tuple(self.hot_segments))
+        self.assertEqual(self.neutral_stream.segments, tuple(self.mixed_segments))
 
     def test_segments_by_type(self):
         test_segments = [
@@ -94,17 +98,17 @@ class TestStream(unittest.TestCase):
 
         stream = Stream(*test_segments)
 
-        self.assertEqual(stream.segments, test_segments)
+        self.assertEqual(stream.segments, tuple(test_segments))
         self.assertEqual(
             stream.neutral_segments,
-            [make_segment(0, 100, 100), make_segment(0, 0, -20)],
+            (make_segment(0, 100, 100), make_segment(0, 0, -20)),
         )
         self.assertEqual(
             stream.cold_segments,
-            [make_segment(-320, 20, 100), make_segment(-400, 100, 100)],
+            (make_segment(-320, 20, 100), make_segment(-400, 100, 100)),
         )
         self.assertEqual(
-            stream.hot_segments, [make_segment(400, 100, 0), make_segment(300, 0, 0)]
+            stream.hot_segments, (make_segment(400, 100, 0), make_segment(300, 0, 0))
         )
 
     def test_make_stream(self):
@@ -154,6 +158,20 @@ class TestStream(unittest.TestCase):
         )
         self.assertNotEqual(single_seg_stream, multi_seg_stream)
 
+    def test_hash(self):
+        self.assertEqual(
+            hash(make_stream(-320, 20, 100, 5)), hash(make_stream(-320, 20, 100, 5))
+        )
+        self.assertEqual(
+            len({self.cold_stream, Stream(*self.cold_segments), self.hot_stream}), 2
+        )
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.cold_stream.segments = ()
+        with self.assertRaises(AttributeError):
+            self.cold_stream.name = "cold"
+
     def test_repr(self):
         single_seg_stream = make_stream(-320, 20, 100, 5)
         self.assertEqual(
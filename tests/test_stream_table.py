@@ -0,0 +1,200 @@
+import math
+import unittest
+from array import array
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream import make_segmented_stream, make_stream
+from pina.stream_table import StreamTable
+from pina.sweep import segment_rows
+
+
+class TestStreamTable(unittest.TestCase):
+    """
+    Test class for StreamTable
+    """
+
+    def setUp(self):
+        self.streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_segmented_stream([-100, 20, 50], [-200, 50, 50], [-30, 50, 60]),
+            make_stream(290, 130, 30, 2.5),
+        ]
+        self.table = StreamTable(
+            [-230, 330, -100, -200, -30, 290],
+            [20, 170, 20, 50, 50, 130],
+            [135, 60, 50, 50, 60, 30],
+            [None, None, None, None, None, 2.5],
+            [0, 1, 2, 2, 2, 3],
+        )
+
+    def tearDown(self):
+        pass
+
+    def assertAnalyzersEqual(self, analyzer, expected):
+        for name in [
+            "heating_demand",
+            "cooling_demand",
+            "hot_utility_target",
+            "cold_utility_target",
+            "pinch_temps",
+            "cold_composite_curve",
+            "hot_composite_curve",
+            "shifted_cold_composite_curve",
+            "shifted_hot_composite_curve",
+            "grand_composite_curve",
+        ]:
+            self.assertEqual(getattr(analyzer, name), getattr(expected, name), name)
+
+    def test_columns(self):
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(
+            self.table.heat_flows, array("d", [-230, 330, -100, -200, -30, 290])
+        )
+        self.assertEqual(self.table.stream_ids, array("q", [0, 1, 2, 2, 2, 3]))
+        self.assertTrue(all(math.isnan(t) for t in self.table.temp_shifts[:5]))
+        self.assertEqual(self.table.temp_shifts[5], 2.5)
+
+    def test_default_stream_ids(self):
+        table = StreamTable([-230, 330], [20, 170], [135, 60])
+        self.assertEqual(table.stream_ids, array("q", [0, 1]))
+        self.assertEqual(table.streams, tuple(self.streams[:2]))
+
+    def test_buffer_columns(self):
+        table = StreamTable(
+            array("d", [-230, 330]),
+            array("d", [20, 170]),
+            array("d", [135, 60]),
+            array("d", [math.nan, 5]),
+            array("q", [7, 3]),
+        )
+        self.assertEqual(table.stream_ids, array("q", [7, 3]))
+        self.assertEqual(
+            table.streams,
+            (make_stream(-230, 20, 135), make_stream(330, 170, 60, 5)),
+        )
+
+    def test_streams(self):
+        self.assertEqual(self.table.streams, tuple(self.streams))
+        self.assertIs(self.table.streams, self.table.streams)
+        self.assertEqual(
+            StreamTable.from_streams(self.streams).streams, self.table.streams
+        )
+
+    def test_invalid_columns(self):
+        with self.assertRaises(ValueError):
+            StreamTable([-230, 330], [20, 170], [135])
+        with self.assertRaises(ValueError):
+            StreamTable([-230, 330], [20, 170], [135, 60], stream_ids=[0, 0])
+
+    def test_pinch_analyzer(self):
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*self.streams)
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(self.table)
+        self.assertAnalyzersEqual(analyzer, expected)
+        self.assertEqual(analyzer.streams, self.streams)
+
+    def test_mixed_streams_and_tables(self):
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*self.streams)
+        table = StreamTable.from_streams(self.streams[2:])
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(self.streams[0], table)
+        self.assertEqual(analyzer.hot_utility_target, 270)
+        analyzer.add_streams(self.streams[1])
+        self.assertAnalyzersEqual(analyzer, expected)
+
+        analyzer.remove_streams(table)
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*self.streams[:2])
+        self.assertAnalyzersEqual(analyzer, expected)
+        with self.assertRaises(ValueError):
+            analyzer.remove_streams(table)
+
+    def test_remove_table_stream(self):
+        extra = make_stream(-50, 0, 10)
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(extra, self.table)
+        analyzer.hot_utility_target
+        analyzer.remove_streams(self.streams[2], extra)
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*self.streams)
+        expected.remove_streams(self.streams[2])
+        self.assertAnalyzersEqual(analyzer, expected)
+        self.assertEqual(
+            analyzer.streams, [self.streams[0], self.streams[1], self.streams[3]]
+        )
+        with self.assertRaises(ValueError):
+            analyzer.remove_streams(self.streams[2])
+
+    def test_replace_table_stream(self):
+        extra = make_stream(-50, 0, 10)
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(extra, self.table)
+        analyzer.hot_utility_target
+        analyzer.replace_stream(self.streams[2], extra)
+        expected = PinchAnalyzer(5)
+        expected.add_streams(
+            self.streams[0], self.streams[1], extra, self.streams[3], extra
+        )
+        self.assertAnalyzersEqual(analyzer, expected)
+        self.assertEqual(
+            analyzer.streams,
+            [extra, self.streams[0], self.streams[1], extra, self.streams[3]],
+        )
+        with self.assertRaises(ValueError):
+            analyzer.replace_stream(self.streams[2], extra)
+
+    def test_toggle_stream_next_to_table(self):
+        # The table's rows count towards the cost of a rebuild, so toggling a
+        # single stream updates the cascade
+        extra = make_stream(-50, 0, 10)
+        analyzer = PinchAnalyzer(5)
+        analyzer.add_streams(self.table, extra)
+        analyzer.hot_utility_target
+        cascade = analyzer._cascades["grand"]
+        analyzer.remove_streams(extra)
+        analyzer.add_streams(extra)
+        analyzer.hot_utility_target
+        self.assertIs(analyzer._cascades["grand"], cascade)
+        expected = PinchAnalyzer(5)
+        expected.add_streams(*self.streams, extra)
+        self.assertAnalyzersEqual(analyzer, expected)
+
+    def test_shifted_float_rows(self):
+        # The shifted rows keep the heat capacity flow rates of the segments,
+        # which differ from those of the rounded shifted temperatures
+        table = StreamTable([-1.1, 0.7, 2.3], [0.1, 0.3, 100.7], [0.2, 0.1, 0.3])
+        segments = [s for stream in table.streams for s in stream.segments]
+        for heat_sign, shifted, inverted in [(0, True, True), (-1, True, False)]:
+            if inverted:
+                expected = [
+                    s.shift(0.3).with_inverted_heat_flow()
+                    for s in segments
+                    if s.heat_flow * heat_sign >= 0
+                ]
+            else:
+                expected = [
+                    s.shift(0.3).with_absolute_heat_flow()
+                    for s in segments
+                    if s.heat_flow * heat_sign >= 0
+                ]
+            self.assertEqual(
+                table.cascade_rows(heat_sign, shifted, inverted, 0.3),
+                segment_rows(expected),
+            )
+
+    def test_no_temp_shift(self):
+        analyzer = PinchAnalyzer()
+        with self.assertRaises(ValueError):
+            analyzer.add_streams(self.table)
+        self.assertEqual(analyzer.streams, [])
+
+        table = StreamTable([-40, 0], [100, 0], [100, 10], [10, None])
+        analyzer.add_streams(table)
+        self.assertEqual(analyzer.hot_utility_target, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
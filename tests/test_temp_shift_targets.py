@@ -0,0 +1,163 @@
+import random
+import unittest
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream import make_segmented_stream, make_stream
+from pina.temp_shift_targets import TempShiftTargets
+
+
+class TestTempShiftTargets(unittest.TestCase):
+    """
+    Test class for TempShiftTargets
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def assertMatchesAnalyzer(self, streams, targets, temp_shift):
+        analyzer = PinchAnalyzer(default_temp_shift=temp_shift)
+        analyzer.add_streams(*streams)
+        self.assertEqual(
+            targets.at(temp_shift),
+            (
+                analyzer.hot_utility_target,
+                analyzer.cold_utility_target,
+                analyzer.pinch_temps,
+            ),
+        )
+
+    def test_empty(self):
+        targets = TempShiftTargets([], 0, 10)
+        self.assertEqual(targets.temp_shifts, (0, 10))
+        self.assertEqual(targets.hot_utility_targets, (0, 0))
+        self.assertEqual(targets.cold_utility_targets, (0, 0))
+        self.assertEqual(targets.pinch_temps, ([], []))
+        self.assertEqual(targets.at(5), (0, 0, []))
+
+    def test_4_stream_example(self):
+        streams = [
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_stream(180, 150, 30),
+        ]
+        targets = TempShiftTargets(streams, 0, 20)
+        self.assertEqual(len(targets.temp_shifts), 3)
+        self.assertEqual(targets.temp_shifts[0], 0)
+        self.assertAlmostEqual(targets.temp_shifts[1], 25 / 9)
+        self.assertEqual(targets.temp_shifts[2], 20)
+        self.assertEqual(targets.hot_utility_targets, (0, 0, 155))
+        self.assertEqual(targets.cold_utility_targets, (40, 40, 195))
+        self.assertEqual(targets.pinch_temps[0], [170])
+        self.assertEqual(targets.pinch_temps[2], [100])
+        for temp_shift in [0, 1, 2.5, 5, 7.25, 10, 20]:
+            self.assertMatchesAnalyzer(streams, targets, temp_shift)
+
+    def test_individual_temp_shift(self):
+        streams = [
+            make_stream(-40, 100, 100, 10),
+            make_stream(40, 0, 10),
+            make_stream(-30, 40, 70),
+        ]
+        targets = TempShiftTargets(streams, 0, 40)
+        for temp_shift in range(41):
+            self.assertMatchesAnalyzer(streams, targets, temp_shift)
+
+    def test_single_temp_shift(self):
+        streams = [make_stream(-230, 20, 135), make_stream(330, 170, 60)]
+        targets = TempShiftTargets(streams, 5, 5)
+        self.assertEqual(targets.temp_shifts, (5,))
+        self.assertMatchesAnalyzer(streams, targets, 5)
+
+    def test_out_of_range(self):
+        streams = [make_stream(-230, 20, 135), make_stream(330, 170, 60)]
+        with self.assertRaises(ValueError):
+            TempShiftTargets(streams, 10, 5)
+
+        targets = TempShiftTargets(streams, 5, 10)
+        with self.assertRaises(ValueError):
+            targets.at(4.5)
+        with self.assertRaises(ValueError):
+            targets.at(11)
+
+    def test_random_streams(self):
+        # Heat capacity flow rates, temperatures and temperature shifts are
+        # binary fractions, so the analyzer's floats are exact as well
+        rng = random.Random(3)
+        for _ in range(20):
+            streams = []
+            for _ in range(rng.randint(1, 8)):
+                supply_temp = rng.randint(0, 50) * 4
+                target_temp = rng.randint(0, 50) * 4
+                temp_shift = None if rng.random() < 0.8 else rng.randint(1, 8) / 2
+                if supply_temp == target_temp:
+                    heat_flow = rng.randint(-10, 10) * 4
+                    streams.append(
+                        make_stream(heat_flow, supply_temp, target_temp, temp_shift)
+                    )
+                    continue
+
+                rate = rng.randint(-12, 12) / 4
+                heat_flow = rate * (supply_temp - target_temp)
+                # The second segment continues in the same direction with
+                # twice the heat capacity flow rate
+                streams.append(
+                    make_segmented_stream(
+                        [heat_flow, supply_temp, target_temp, temp_shift],
+                        [
+                            2 * heat_flow,
+                            target_temp,
+                            2 * target_temp - supply_temp,
+                            temp_shift,
+                        ],
+                    )
+                )
+
+            targets = TempShiftTargets(streams, 0, 20)
+            for temp_shift in range(0, 161, 7):
+                self.assertMatchesAnalyzer(streams, targets, temp_shift / 8)
+
+    def test_many_crossings(self):
+        # The cascade is updated at each crossing. The analyzer rounds the
+        # shifted float temperatures, so the targets agree up to rounding
+        # errors.
+        rng = random.Random(4)
+        streams = []
+        for _ in range(40):
+            supply_temp = rng.uniform(0, 300)
+            if rng.random() < 0.1:
+                target_temp = supply_temp
+            else:
+                target_temp = rng.uniform(0, 300)
+            heat_flow = rng.choice([-1, 1]) * rng.uniform(1, 100)
+            streams.append(make_stream(heat_flow, supply_temp, target_temp))
+
+        targets = TempShiftTargets(streams, 5, 30)
+        self.assertEqual(targets.temp_shifts[0], 5)
+        self.assertEqual(targets.temp_shifts[-1], 30)
+        for i in range(51):
+            temp_shift = 5 + i / 2
+            analyzer = PinchAnalyzer(default_temp_shift=temp_shift)
+            analyzer.add_streams(*streams)
+            result = targets.at(temp_shift)
+            self.assertAlmostEqual(
+                result.hot_utility_target, analyzer.hot_utility_target, places=6
+            )
+            self.assertAlmostEqual(
+                result.cold_utility_target, analyzer.cold_utility_target, places=6
+            )
+            self.assertEqual(len(result.pinch_temps), len(analyzer.pinch_temps))
+            for temp, expected_temp in zip(result.pinch_temps, analyzer.pinch_temps):
+                self.assertAlmostEqual(temp, expected_temp)
+
+        for temp_shift, hot_utility_target in zip(
+            targets.temp_shifts, targets.hot_utility_targets
+        ):
+            self.assertAlmostEqual(hot_utility_target, targets.at(temp_shift)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+
+from pina.pinch_analyzer import PinchAnalyzer
+from pina.stream import make_segmented_stream, make_stream
+from pina.total_site import TotalSite
+
+
+class TestTotalSite(unittest.TestCase):
+    """
+    Test class for TotalSite
+    """
+
+    def setUp(self):
+        self.plant_a = PinchAnalyzer(5)
+        self.plant_a.add_streams(
+            make_stream(-230, 20, 135),
+            make_stream(330, 170, 60),
+            make_stream(-240, 80, 140),
+            make_stream(180, 150, 30),
+            make_segmented_stream([-80, 60, 60]),
+        )
+        self.plant_b = PinchAnalyzer(5)
+        self.plant_b.add_streams(make_stream(100, 200, 150))
+        self.plant_c = PinchAnalyzer(10)
+        self.plant_c.add_streams(
+            make_stream(-200, 40, 120),
+            make_stream(150, 130, 70),
+            make_stream(50, 90, 90),
+        )
+
+    def tearDown(self):
+        pass
+
+    def assertProfileSum(self, profile, profiles):
+        # Compares the profile with the sum of the profiles at all their
+        # temperatures, before and after jumps
+        temps = sorted({t for p in [profile, *profiles] for t in p[1]})
+        for temp in temps:
+            for side in [0, 1]:
+                self.assertAlmostEqual(
+                    value_at(profile, temp, side),
+                    sum(value_at(p, temp, side) for p in profiles),
+                )
+
+    def test_profiles_without_pockets(self):
+        site = TotalSite([self.plant_a], workers=1)
+        self.assertEqual(site.source_profile, ((10, 10, 0), (25, 61, 65)))
+        self.assertEqual(
+            site.sink_profile,
+            ((0, 30, 30, 50, 50), (65, 65, 85, 295 / 3, 165)),
+        )
+
+    def test_profile_sums(self):
+        plants = [self.plant_a, self.plant_b, self.plant_c]
+        site = TotalSite(plants, workers=1)
+        single = [TotalSite([p], workers=1) for p in plants]
+        self.assertProfileSum(site.source_profile, [s.source_profile for s in single])
+        self.assertProfileSum(site.sink_profile, [s.sink_profile for s in single])
+
+        parallel = TotalSite(plants, workers=2, chunksize=1)
+        self.assertEqual(parallel.source_profile, site.source_profile)
+        self.assertEqual(parallel.sink_profile, site.sink_profile)
+
+    def test_plant_tolerances(self):
+        # The plants' tolerances coalesce the intervals of their cascades in
+        # the worker processes as well
+        plant = PinchAnalyzer(5, abs_tol=1e-3)
+        plant.add_streams(
+            make_stream(-100.0, 20.0, 100.0),
+            make_stream(-50.0, 100.0000001, 150.0),
+            make_stream(120.0, 160.0, 40.0),
+        )
+        self.assertEqual(
+            plant.grand_composite_curve, ((0, 12.5, 30.0), (25.0, 35.0, 105.0))
+        )
+        for workers in [1, 2]:
+            site = TotalSite([plant, self.plant_b], workers=workers)
+            single = TotalSite([plant], workers=workers)
+            self.assertEqual(single.sink_profile, tuple(plant.grand_composite_curve))
+            self.assertProfileSum(
+                site.sink_profile,
+                [single.sink_profile, TotalSite([self.plant_b]).sink_profile],
+            )
+
+    def test_targets(self):
+        targets = TotalSite([self.plant_a], workers=1).targets([40, 120, 70])
+        self.assertEqual(
+            targets,
+            ((120, 70, 40), (0, 0, 10), (20, 30, 0), (20, 30, 0), 50, 10, 0),
+        )
+        self.assertEqual(targets.hot_utility_target, self.plant_a.hot_utility_target)
+        self.assertEqual(targets.cold_utility_target, self.plant_a.cold_utility_target)
+
+        targets = TotalSite([self.plant_a, self.plant_b], workers=1).targets(
+            [40, 120, 70]
+        )
+        self.assertEqual(
+            targets,
+            ((120, 70, 40), (100, 0, 10), (20, 30, 0), (0, 0, 0), 0, 60, 50),
+        )
+
+        targets = TotalSite([self.plant_a, self.plant_b], workers=1).targets([])
+        self.assertEqual(targets, ((), (), (), (), 50, 110, 0))
+
+    def test_empty(self):
+        site = TotalSite([PinchAnalyzer()], workers=1)
+        self.assertEqual(site.source_profile, ((), ()))
+        self.assertEqual(site.targets([100]), ((100,), (0,), (0,), (0,), 0, 0, 0))
+
+    def test_duplicate_utility_temps(self):
+        with self.assertRaises(ValueError):
+            TotalSite([self.plant_a], workers=1).targets([100, 100.0])
+
+
+def value_at(profile, temp, side):
+    # Evaluates a profile before (side 0) or after (side 1) a jump
+    heat_flows, temps = profile
+    if not temps:
+        return 0
+    if temp < temps[0]:
+        return heat_flows[0]
+    if temp > temps[-1]:
+        return heat_flows[-1]
+
+    points = list(zip(temps, heat_flows))
+    if side == 1:
+        points.reverse()
+    for (t0, h0), (t1, h1) in zip(points, points[1:]):
+        if min(t0, t1) <= temp <= max(t0, t1):
+            if t0 == t1:
+                return h0
+            return h0 + (h1 - h0) * (temp - t0) / (t1 - t0)
+    return points[0][1]
+
+
+if __name__ == "__main__":
+    unittest.main()
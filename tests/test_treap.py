@@ -0,0 +1,101 @@
+import random
+import unittest
+
+from pina.treap import MinTreap
+
+
+class TestMinTreap(unittest.TestCase):
+    """
+    Test class for MinTreap
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_empty(self):
+        tree = MinTreap()
+        self.assertEqual(len(tree), 0)
+        self.assertEqual(list(tree), [])
+        self.assertEqual(tree.argmins(), [])
+        self.assertIsNone(tree.last())
+        self.assertIsNone(tree.find_lt(1))
+        with self.assertRaises(ValueError):
+            tree.min()
+
+    def test_initial_items(self):
+        items = [(1, 3), (2, 1), (4, 4), (5, 1), (7, 5)]
+        tree = MinTreap(items, seed=1)
+        self.assertEqual(len(tree), 5)
+        self.assertEqual(list(tree), items)
+        self.assertEqual(tree.min(), 1)
+        self.assertEqual(tree.argmins(), [2, 5])
+        self.assertEqual(tree.last(), (7, 5))
+        self.assertEqual(tree.find_lt(4), (2, 1))
+        self.assertEqual(tree.find_lt(5), (4, 4))
+        self.assertIsNone(tree.find_lt(1))
+        self.assertEqual(tree.items(2, 5), [(2, 1), (4, 4), (5, 1)])
+        self.assertEqual(tree.items(3, 3), [])
+
+    def test_replace(self):
+        tree = MinTreap([(1, 3), (2, 1), (4, 4), (5, 1), (7, 5)], seed=2)
+        tree.replace(2, 4, [(3, 2)], -2)
+        self.assertEqual(list(tree), [(1, 3), (3, 2), (5, -1), (7, 3)])
+        self.assertEqual(tree.min(), -1)
+        self.assertEqual(tree.argmins(), [5])
+
+        tree.replace(0, 6, [(0, 3), (6, 3)])
+        self.assertEqual(len(tree), 3)
+        self.assertEqual(tree.argmins(), [0, 6, 7])
+
+        tree.replace(6, 9, [])
+        self.assertEqual(list(tree), [(0, 3)])
+
+    def test_scale(self):
+        tree = MinTreap([(1, 3), (2, -1), (4, 4)], seed=3)
+        tree.replace(3, 3, [], 2)
+        tree.scale(3)
+        self.assertEqual(list(tree), [(1, 9), (2, -3), (4, 18)])
+        self.assertEqual(tree.min(), -3)
+
+    def test_random(self):
+        rng = random.Random(0)
+        items = dict((k, rng.randint(-50, 50)) for k in rng.sample(range(100), 40))
+        tree = MinTreap(sorted(items.items()), seed=0)
+        for _ in range(500):
+            start = rng.randint(0, 100)
+            stop = rng.randint(start, 100)
+            if rng.random() < 0.2:
+                factor = rng.randint(1, 3)
+                tree.scale(factor)
+                items = {k: v * factor for k, v in items.items()}
+            else:
+                shift = rng.randint(-5, 5)
+                new_items = {
+                    k: rng.randint(-50, 50)
+                    for k in range(start, stop + 1)
+                    if rng.random() < 0.3
+                }
+                tree.replace(start, stop, sorted(new_items.items()), shift)
+                items = {
+                    k: v + shift if k > stop else v
+                    for k, v in items.items()
+                    if not start <= k <= stop
+                }
+                items.update(new_items)
+
+            self.assertEqual(list(tree), sorted(items.items()))
+            self.assertEqual(len(tree), len(items))
+            if items:
+                min_value = min(items.values())
+                self.assertEqual(tree.min(), min_value)
+                self.assertEqual(
+                    tree.argmins(),
+                    sorted(k for k, v in items.items() if v == min_value),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()